@@ -1,290 +1,321 @@
 import streamlit as st
-import pdfplumber
 import pandas as pd
-import re
 import io
-from datetime import datetime
-
-# =========================
-# Shared helpers.
-# =========================
-def _to_float_money_arg(raw: str) -> float:
-    """Money with $ and Argentine thousands '.' and decimal ',' (e.g., -$ 70.833,71)."""
-    # Normalize unicode dashes to hyphen
-    normalized = raw.replace("–", "-").replace("—", "-").replace("−", "-")
-    return float(
-        normalized.replace("$", "")
-           .replace(".", "")
-           .replace(",", ".")
-           .replace(" ", "")
-           .strip()
-    )
-
-def _to_float_money_us(raw: str) -> float:
-    """Money with US-style thousands ',' and decimal '.' (e.g., 1,234.56)."""
-    # Normalize unicode dashes to hyphen
-    normalized = raw.replace("–", "-").replace("—", "-").replace("−", "-")
-    return float(normalized.replace(",", "").strip())
-
-def get_kpis(df_movs: pd.DataFrame):
-    """Calculate key metrics from transaction data."""
-    if df_movs.empty:
-        return 0.0, 0.0, 0.0
-    try:
-        saldo_inicial = float(df_movs["Saldo"].iloc[0])
-        importes_numeric = pd.to_numeric(df_movs.iloc[1:]["Importe"], errors="coerce")
-        total_movs = importes_numeric.sum()
-        saldo_final = float(df_movs["Saldo"].iloc[-1])
-        return saldo_inicial, total_movs, saldo_final
-    except Exception:
-        return 0.0, 0.0, 0.0
-
-def generate_filenames(base_name: str, choice: str):
-    """Generate standardized filenames for downloads."""
-    ts = datetime.now().strftime("%Y%m%d_%H%M")
-    bank_code = "STDR" if choice.startswith("Santander") else "HSBC"
-    detalle = f"{base_name}_{bank_code}_Detalle_Movimientos_{ts}.csv"
-    resumen = f"{base_name}_{bank_code}_Resumen_Referencias_{ts}.csv"
-    return detalle, resumen
-
-# =========================
-# Santander parser
-# =========================
-saldo_inicial_stdr_re = re.compile(r"Saldo\s+Inicial\s+([-–—−]?\s*\$\s*[\d\.\,]+)")
-
-linea_movimiento_stdr = re.compile(
-    r"""^
-    (?P<fecha>\d{2}/\d{2}/\d{2})?     # Fecha opcional
-    \s*
-    (?:\d+\s+)?                       # Comprobante opcional
-    (?P<movimiento>.*?)               # Movimiento (texto)
-    \s+
-    (?:
-        (?P<debito>[-–—−]?\s*\$\s*[\d\.\,]+)   # Débito
-        \s+
-        (?P<saldo>[-–—−]?\s*\$\s*[\d\.\,]+)    # Saldo si no hay crédito
-      |
-        (?P<credito>[-–—−]?\s*\$\s*[\d\.\,]+)  # Crédito
-        \s+
-        (?P<saldo2>[-–—−]?\s*\$\s*[\d\.\,]+)   # Saldo si no hay débito
-    )
-    $""",
-    re.VERBOSE
-)
-
-linea_transferencia_stdr = re.compile(
-    r'^(?:De|A)(?:\s+[A-Za-zÁÉÍÓÚÑáéíóúñ\s,.]+)?\s*/\s*.*?\s*-\s*.*?\s*/.*$',
-    re.IGNORECASE
+import sys
+
+import ocr_extract_core
+from ocr_extract_core import (
+    LINK_GAP,
+    PARSE_POOL_WORKERS,
+    BankDetection,
+    ParsePool,
+    ParsePoolFull,
+    ParseProfile,
+    bank_for_choice,
+    build_summary,
+    build_zip,
+    cli,
+    detect_bank,
+    file_digest,
+    generate_filenames,
+    get_kpis,
+    merge_statements,
+    parse_statement,
+    parse_uploads,
+    read_first_page_text,
+    registered_banks,
+    to_csv_bytes,
 )
 
-def parse_santander_pdf(file_like) -> pd.DataFrame:
-    movimientos = []
-    fecha_actual = None
-    fecha_anterior = None
-    previous_saldo = None
-    saldo_anterior_registrado = False
-    row_transferencia = False
-    current_row = None
-
-    with pdfplumber.open(file_like) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text() or ""
-            for line in (l.strip() for l in text.splitlines()):
-                if not saldo_anterior_registrado:
-                    m_saldo = saldo_inicial_stdr_re.search(line)
-                    if m_saldo:
-                        saldo_inicial = _to_float_money_arg(m_saldo.group(1))
-                        movimientos.append({
-                            "Fecha": "",
-                            "Referencia": "Saldo Inicial",
-                            "Importe": "",
-                            "Saldo": saldo_inicial
-                        })
-                        previous_saldo = saldo_inicial
-                        saldo_anterior_registrado = True
-                        continue
-
-                m = linea_movimiento_stdr.match(line)
-                if m:
-                    fecha = m.group("fecha")
-                    if fecha:
-                        fecha_actual = fecha
-                        fecha_anterior = fecha
-                    else:
-                        fecha_actual = fecha_anterior
-
-                    referencia = (m.group("movimiento") or "").strip()
-                    raw_imp = m.group("debito") or m.group("credito")
-                    importe = _to_float_money_arg(raw_imp)
-                    if m.group("debito"):
-                        importe = -importe
-
-                    raw_saldo = m.group("saldo") or m.group("saldo2")
-                    saldo = _to_float_money_arg(raw_saldo)
-
-                    if previous_saldo is not None and (saldo - previous_saldo) > 0:
-                        importe = -importe
-
-                    if previous_saldo is not None:
-                        expected = round(previous_saldo + importe, 2)
-                        if abs(expected - round(saldo, 2)) > 0.01:
-                            raise ValueError(
-                                f"Error de consistencia en fila '{referencia}' (fecha {fecha_actual}): "
-                                f"saldo anterior {previous_saldo:,.2f} + importe {importe:,.2f} = {expected:,.2f} "
-                                f"pero el saldo registrado en el PDF es {saldo:,.2f}"
-                            )
-
-                    if referencia.lower() in ("transferencia recibida", "transferencia realizada"):
-                        current_row = {"Fecha": fecha_actual, "Referencia": referencia,
-                                       "Importe": importe, "Saldo": saldo}
-                        row_transferencia = True
-                    else:
-                        movimientos.append({
-                            "Fecha": fecha_actual,
-                            "Referencia": referencia,
-                            "Importe": importe,
-                            "Saldo": saldo
-                        })
-                        row_transferencia = False
-                        current_row = None
-
-                    previous_saldo = saldo
-                    continue
-
-                if linea_transferencia_stdr.match(line):
-                    if row_transferencia and current_row is not None:
-                        movimientos.append({
-                            "Fecha": current_row["Fecha"],
-                            "Referencia": current_row["Referencia"] + " - " + line,
-                            "Importe": current_row["Importe"],
-                            "Saldo": current_row["Saldo"]
-                        })
-                        row_transferencia = False
-                        current_row = None
-
-    return pd.DataFrame(movimientos)
+def __getattr__(name):
+    # Everything else in the parsing core stays importable from here.
+    return getattr(ocr_extract_core, name)
 
 # =========================
-# HSBC parser
+# Streamlit UI
 # =========================
-saldo_anterior_hsbc_re = re.compile(
-    r"(?i)SALDO\s+ANTERIOR.*?((?:\d{1,3}(?:,\d{3})*|\d*)\.\d{2})$"
-)
-linea_con_fecha_hsbc = re.compile(
-    r"""^(?P<fecha>\d{2}-[A-Z]{3})\s+-\s+
-        (?P<referencia>.+?)\s+
-        \d{5}\s+
-        (?P<debito>(?:\d{1,3}(?:,\d{3})*|\d*)?\.\d{2})?\s*
-        (?P<credito>(?:\d{1,3}(?:,\d{3})*|\d*)?\.\d{2})?\s+
-        (?P<saldo>(?:\d{1,3}(?:,\d{3})*|\d*)?\.\d{2})
-    """, re.VERBOSE
-)
-linea_sin_fecha_hsbc = re.compile(
-    r"""^\s*-\s+
-        (?P<referencia>.+?)\s+
-        \d{5}\s+
-        (?P<debito>(?:\d{1,3}(?:,\d{3})*|\d*)?\.\d{2})?\s*
-        (?P<credito>(?:\d{1,3}(?:,\d{3})*|\d*)?\.\d{2})?\s+
-        (?P<saldo>(?:\d{1,3}(?:,\d{3})*|\d*)?\.\d{2})
-    """, re.VERBOSE
-)
-
-def parse_hsbc_pdf(file_like) -> pd.DataFrame:
-    movimientos = []
-    fecha_actual = None
-    previous_saldo = None
-    saldo_anterior_registrado = False
-
-    with pdfplumber.open(file_like) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text() or ""
-            for raw in text.splitlines():
-                line = raw.strip()
-                if not saldo_anterior_registrado:
-                    m_saldo = saldo_anterior_hsbc_re.search(line)
-                    if m_saldo:
-                        saldo_inicial = _to_float_money_us(m_saldo.group(1))
-                        movimientos.append({
-                            "Fecha": "",
-                            "Referencia": "SALDO ANTERIOR",
-                            "Importe": "",
-                            "Saldo": saldo_inicial
-                        })
-                        previous_saldo = saldo_inicial
-                        saldo_anterior_registrado = True
-                        continue
-
-                m_fecha = linea_con_fecha_hsbc.match(line)
-                if m_fecha:
-                    fecha_actual = m_fecha.group("fecha")
-                    referencia = (m_fecha.group("referencia") or "").strip()
-                    saldo = _to_float_money_us(m_fecha.group("saldo"))
-                    importe = round(saldo - previous_saldo, 2) if previous_saldo is not None else 0.0
-
-                    movimientos.append({
-                        "Fecha": fecha_actual, "Referencia": referencia,
-                        "Importe": importe, "Saldo": saldo
-                    })
-                    previous_saldo = saldo
-                    continue
-
-                m_sf = linea_sin_fecha_hsbc.match(line)
-                if m_sf and fecha_actual:
-                    referencia = (m_sf.group("referencia") or "").strip()
-                    saldo = _to_float_money_us(m_sf.group("saldo"))
-                    importe = round(saldo - previous_saldo, 2) if previous_saldo is not None else 0.0
-
-                    movimientos.append({
-                        "Fecha": fecha_actual, "Referencia": referencia,
-                        "Importe": importe, "Saldo": saldo
-                    })
-                    previous_saldo = saldo
-
-    return pd.DataFrame(movimientos)
+# Parsed uploads kept in memory across reruns: one entry per (file, bank).
+UPLOAD_CACHE_MAX_ENTRIES = 32
+UPLOAD_CACHE_TTL_SECONDS = 60 * 60
+
+@st.cache_data(max_entries=UPLOAD_CACHE_MAX_ENTRIES, ttl=UPLOAD_CACHE_TTL_SECONDS, show_spinner=False)
+def process_upload(file_hash: str, choice: str, _pdf_bytes: bytes, _parsed=None) -> dict:
+    """Parse an upload and build everything the page shows for it.
+
+    Memoized on (file_hash, choice); the bytes themselves are excluded from
+    the cache key (leading underscore) so Streamlit doesn't re-hash them on
+    every rerun. A ValueError from the parser is not cached. The profile
+    describes the run that filled the cache entry. _parsed is a
+    (df_movs, profile) pair already parsed elsewhere (see parse_uploads).
+    """
+    if _parsed is not None:
+        df_movs, profile = _parsed
+    else:
+        profile = ParseProfile()
+        df_movs = parse_statement(io.BytesIO(_pdf_bytes), bank_for_choice(choice), profile=profile)
 
-# =========================
-# Summary Builder
-# =========================
-def build_summary(df_movs: pd.DataFrame) -> pd.DataFrame:
     if df_movs.empty:
-        return pd.DataFrame(columns=["Referencia", "Sum_Importe", "Cantidad", "Pct_Importe", "Pct_Cantidad"])
-
-    df_work = df_movs[df_movs["Referencia"] != "Saldo Inicial"].copy()
-    df_work["Importe"] = pd.to_numeric(df_work["Importe"], errors="coerce")
-
-    summary = df_work.groupby("Referencia", dropna=False).agg(
-        Sum_Importe=("Importe", "sum"),
-        Cantidad=("Referencia", "count")
-    ).reset_index()
-
-    total_abs = summary["Sum_Importe"].abs().sum()
-    summary["Pct_Importe"] = (summary["Sum_Importe"].abs() / total_abs * 100).round(4) if total_abs else 0.0
-    summary["Pct_Cantidad"] = (summary["Cantidad"] / summary["Cantidad"].sum() * 100).round(4)
-
-    total_row = {
-        "Referencia": "TOTAL",
-        "Sum_Importe": summary["Sum_Importe"].sum(),
-        "Cantidad": summary["Cantidad"].sum(),
-        "Pct_Importe": summary["Pct_Importe"].sum(),
-        "Pct_Cantidad": summary["Pct_Cantidad"].sum(),
+        return {"df_movs": df_movs, "profile": profile}
+    with profile.stage("summary"):
+        df_summary = build_summary(df_movs)
+        kpis = get_kpis(df_movs)
+    with profile.stage("csv"):
+        detalle_csv = to_csv_bytes(df_movs)
+        resumen_csv = to_csv_bytes(df_summary)
+    return {
+        "df_movs": df_movs,
+        "df_summary": df_summary,
+        "detalle_csv": detalle_csv,
+        "resumen_csv": resumen_csv,
+        "kpis": kpis,
+        "profile": profile,
     }
-    return pd.concat([summary, pd.DataFrame([total_row])], ignore_index=True)
 
-def to_csv_bytes(df: pd.DataFrame) -> bytes:
-    buf = io.StringIO()
-    df.to_csv(buf, index=False, encoding="utf-8")
-    return buf.getvalue().encode("utf-8")
+@st.cache_resource(show_spinner=False)
+def get_parse_pool() -> ParsePool:
+    """The server's ParsePool, shared by every session and started on first use."""
+    return ParsePool(PARSE_POOL_WORKERS)
+
+def parse_pending(uploads, hashes, choice: str) -> dict:
+    """Parse in the shared pool the uploads not yet parsed this session.
+
+    Shows a progress bar fed by page progress, plus a status line per file
+    when there are several. Returns {index: (df_movs, profile) or exception}
+    for the uploads it parsed; the others are in process_upload's cache.
+    """
+    parsed_keys = st.session_state.setdefault("parsed_uploads", set())
+    pending = [i for i, file_hash in enumerate(hashes) if (file_hash, choice) not in parsed_keys]
+    if not pending:
+        return {}
+    what = "el PDF" if len(pending) == 1 else f"{len(pending)} PDFs"
+    bar = st.progress(0.0, text=f"Procesando {what} con {choice}...")
+    lines = {i: st.empty() for i in pending} if len(uploads) > 1 else {}
+    for i, line in lines.items():
+        line.caption(f"⏳ {uploads[i][0]}")
+    share, pages_read = {}, {}  # per index: fraction parsed, pages read
+    finished = 0
+
+    def show():
+        if len(pending) > 1:
+            text = f"{finished} de {len(pending)} PDFs procesados"
+        else:
+            text = f"Procesando el PDF con {choice}"
+        bar.progress(min(sum(share.values()) / len(pending), 1.0),
+                     text=f"{text} · {sum(pages_read.values())} páginas leídas")
+
+    def on_pages(j, done, total):
+        i = pending[j]
+        share[i], pages_read[i] = (done / total if total else 0.0), done
+        show()
+
+    def on_done(j, outcome):
+        nonlocal finished
+        i = pending[j]
+        finished += 1
+        share[i] = 1.0
+        if i in lines:
+            if isinstance(outcome, Exception):
+                lines[i].caption(f"❌ {uploads[i][0]}: {outcome}")
+            else:
+                skipped = outcome[1].skipped_pages
+                lines[i].caption(f"✅ {uploads[i][0]}: {len(outcome[0])} movimientos"
+                                 + (f", {skipped} páginas omitidas tras el cierre" if skipped else ""))
+        show()
+
+    try:
+        results = parse_uploads([uploads[i][1] for i in pending], choice, progress=on_done,
+                                pool=get_parse_pool(), on_pages=on_pages)
+    except ParsePoolFull as e:
+        bar.empty()
+        st.error(str(e))
+        st.stop()
+    if len(pending) == 1:
+        bar.empty()
+    return dict(zip(pending, results))
+
+@st.cache_data(max_entries=UPLOAD_CACHE_MAX_ENTRIES, ttl=UPLOAD_CACHE_TTL_SECONDS, show_spinner=False)
+def detect_upload_bank(file_hash: str, _pdf_bytes: bytes) -> BankDetection:
+    """detect_bank() on an upload's first page, memoized on its hash."""
+    return detect_bank(read_first_page_text(_pdf_bytes))
+
+@st.cache_data(max_entries=UPLOAD_CACHE_MAX_ENTRIES, ttl=UPLOAD_CACHE_TTL_SECONDS, show_spinner=False)
+def combine_uploads(file_hashes: tuple, choice: str, _results: list) -> dict:
+    """Combined Detalle, Resumen, KPIs and zip for several process_upload results.
+
+    _results holds (file name, process_upload result) pairs, in file_hashes
+    order. The statements are merged by period (see merge_statements); the
+    zip has every file's own CSVs plus the combined ones.
+    """
+    merge = merge_statements([(name, result["df_movs"]) for name, result in _results])
+    df_movs = merge.df_movs
+    df_summary = build_summary(df_movs)
+    detalle_filename, resumen_filename = generate_filenames("Consolidado", choice)
+    files = [(detalle_filename, to_csv_bytes(df_movs)), (resumen_filename, to_csv_bytes(df_summary))]
+    for name, result in _results:
+        for filename, key in zip(generate_filenames(name.rsplit(".pdf", 1)[0], choice), ("detalle_csv", "resumen_csv")):
+            files.append((filename, result[key]))
+    return {
+        "df_movs": df_movs,
+        "df_summary": df_summary,
+        "kpis": get_kpis(df_movs),
+        "links": merge.links,
+        "duplicates": merge.duplicates,
+        "zip": build_zip(files),
+        "zip_filename": detalle_filename.replace("_Detalle_Movimientos_", "_").replace(".csv", ".zip"),
+    }
+
+def warn_bank_mismatch(file_hash: str, pdf_bytes: bytes, choice: str, name: str = "El PDF"):
+    """Warn when first-page detection points at another bank than the one chosen."""
+    try:
+        detection = detect_upload_bank(file_hash, pdf_bytes)
+    except Exception:
+        return
+    if detection.choice not in (None, choice):
+        st.warning(
+            f"{name} parece ser un extracto de {detection.choice.split()[0]} "
+            f"(confianza {detection.confidence:.0%}). Revisá el banco elegido."
+        )
+
+def render_upload(uploaded, choice: str):
+    """Results page for a single uploaded statement."""
+    base_name = uploaded.name.rsplit(".pdf", 1)[0]
+    pdf_bytes = uploaded.getvalue()  # the upload's own buffer, not a copy
+    file_hash = file_digest(pdf_bytes)
+    warn_bank_mismatch(file_hash, pdf_bytes, choice)
+    outcome = parse_pending([(uploaded.name, pdf_bytes)], [file_hash], choice).get(0)
+    if isinstance(outcome, Exception):
+        st.error(str(outcome))
+        st.stop()
+    with st.spinner(f"Procesando PDF con {choice}..."):
+        try:
+            result = process_upload(file_hash, choice, pdf_bytes, outcome)
+        except ValueError as e:
+            st.error(str(e))
+            st.stop()
+        st.session_state["parsed_uploads"].add((file_hash, choice))
+
+        df_movs = result["df_movs"]
+        if df_movs.empty:
+            st.error("No se detectaron movimientos.")
+        else:
+            df_summary = result["df_summary"]
+            colA, colB = st.columns(2)
+            with colA:
+                st.subheader("Detalle (preview)")
+                column_config = {}
+                if pd.api.types.is_datetime64_any_dtype(df_movs["Fecha"]):
+                    column_config["Fecha"] = st.column_config.DateColumn("Fecha", format="DD/MM/YYYY")
+                st.dataframe(df_movs.head(30), use_container_width=True, column_config=column_config)
+            with colB:
+                st.subheader("Resumen")
+                st.dataframe(df_summary, use_container_width=True)
+
+            detalle_filename, resumen_filename = generate_filenames(base_name, choice)
+            dcol1, dcol2 = st.columns(2)
+            with dcol1:
+                st.download_button("⬇️ Descargar Detalle (CSV)", result["detalle_csv"], detalle_filename, "text/csv")
+            with dcol2:
+                st.download_button("⬇️ Descargar Resumen (CSV)", result["resumen_csv"], resumen_filename, "text/csv")
+
+            saldo_inicial, total_movs, saldo_final = result["kpis"]
+            st.markdown("### Resumen")
+            k1, k2, k3 = st.columns(3)
+            k1.metric("Saldo Inicial", f"{saldo_inicial:,.2f}")
+            k2.metric("Total Movimientos", f"{total_movs:,.2f}")
+            k3.metric("Saldo Final", f"{saldo_final:,.2f}")
+
+            profile = result["profile"]
+            if profile.skipped_pages:
+                st.caption(
+                    f"Se leyeron {len(profile.pages)} de {profile.total_pages} páginas: "
+                    f"{profile.skipped_pages} omitidas después del cierre de movimientos."
+                )
+            if profile.resumed_pages:
+                st.caption(
+                    f"Se retomó desde un checkpoint: las primeras {profile.resumed_pages} páginas "
+                    f"no se volvieron a procesar."
+                )
+            with st.expander("⏱️ Performance"):
+                st.caption(
+                    f"{len(profile.pages)} páginas, {profile.lines} líneas, {profile.matches} coincidencias, "
+                    f"{profile.total():.3f}s en total (corrida que llenó la caché)."
+                )
+                st.dataframe(profile.stages_frame(), use_container_width=True, hide_index=True)
+                st.dataframe(profile.pages_frame(), use_container_width=True, hide_index=True)
+
+def render_uploads(uploaded_files, choice: str):
+    """Results page for several statements: parsed concurrently, shown and downloaded combined."""
+    uploads = [(f.name, f.getvalue()) for f in uploaded_files]
+    hashes = [file_digest(pdf_bytes) for _, pdf_bytes in uploads]
+    for (name, pdf_bytes), file_hash in zip(uploads, hashes):
+        warn_bank_mismatch(file_hash, pdf_bytes, choice, name)
+
+    outcomes = parse_pending(uploads, hashes, choice)
+    parsed_keys = st.session_state["parsed_uploads"]
+
+    results, errors = [], []
+    for i, ((name, pdf_bytes), file_hash) in enumerate(zip(uploads, hashes)):
+        outcome = outcomes.get(i)
+        if isinstance(outcome, Exception):
+            errors.append((name, outcome))
+            continue
+        try:
+            result = process_upload(file_hash, choice, pdf_bytes, outcome)
+        except ValueError as e:
+            errors.append((name, e))
+            continue
+        parsed_keys.add((file_hash, choice))
+        if result["df_movs"].empty:
+            errors.append((name, "No se detectaron movimientos."))
+        else:
+            results.append((name, result))
+
+    for name, error in errors:
+        st.error(f"{name}: {error}")
+    if not results:
+        return
+
+    combined = combine_uploads(tuple(hashes), choice, results)
+    df_movs = combined["df_movs"]
+    colA, colB = st.columns(2)
+    with colA:
+        st.subheader(f"Detalle consolidado ({len(results)} archivos, preview)")
+        column_config = {}
+        if pd.api.types.is_datetime64_any_dtype(df_movs["Fecha"]):
+            column_config["Fecha"] = st.column_config.DateColumn("Fecha", format="DD/MM/YYYY")
+        st.dataframe(df_movs.head(30), use_container_width=True, column_config=column_config)
+    with colB:
+        st.subheader("Resumen consolidado")
+        st.dataframe(combined["df_summary"], use_container_width=True)
+
+    links = combined["links"]
+    for _, link in links[links["Estado"] == LINK_GAP].iterrows():
+        st.warning(
+            f"Entre {link['Archivo anterior']} y {link['Archivo']} el saldo no continúa: "
+            f"cierre {link['Saldo final anterior']:,.2f}, inicio {link['Saldo inicial']:,.2f} "
+            f"(diferencia {link['Diferencia']:,.2f}). ¿Falta un extracto?"
+        )
+    if combined["duplicates"]:
+        st.info(f"Se descartaron {combined['duplicates']} movimientos repetidos entre extractos superpuestos.")
+    with st.expander("🔗 Continuidad entre extractos"):
+        st.dataframe(links, use_container_width=True, hide_index=True)
+
+    st.download_button("⬇️ Descargar todo (ZIP)", combined["zip"], combined["zip_filename"], "application/zip")
+
+    saldo_inicial, total_movs, saldo_final = combined["kpis"]
+    st.markdown("### Resumen")
+    k1, k2, k3 = st.columns(3)
+    k1.metric("Saldo Inicial", f"{saldo_inicial:,.2f}")
+    k2.metric("Total Movimientos", f"{total_movs:,.2f}")
+    k3.metric("Saldo Final", f"{saldo_final:,.2f}")
 
-# =========================
-# Streamlit UI
-# =========================
 def main():
     st.set_page_config(page_title="OCR Extract PDF (Santander / HSBC)", page_icon="🏦", layout="wide")
     st.title("🏦 Extractor de Movimientos desde PDF")
 
     choice = st.sidebar.radio(
         "Elegí el banco",
-        ["Santander OCR Extract", "HSBC OCR Extract", "System Info"],
+        [*(parser.choice for parser in registered_banks().values()), "System Info"],
         index=0
     )
 
@@ -299,46 +330,19 @@ def main():
         except Exception as e:
             st.error(f"Error: {e}")
     else:
-        uploaded = st.file_uploader("Elegí el extracto bancario (PDF)", type=["pdf"])
-        if uploaded is not None:
-            base_name = uploaded.name.rsplit(".pdf", 1)[0]
-            with st.spinner(f"Procesando PDF con {choice}..."):
-                try:
-                    if choice == "Santander OCR Extract":
-                        df_movs = parse_santander_pdf(uploaded)
-                    else:
-                        df_movs = parse_hsbc_pdf(uploaded)
-                except ValueError as e:
-                    st.error(str(e))
-                    st.stop()
-
-                if df_movs.empty:
-                    st.error("No se detectaron movimientos.")
-                else:
-                    df_summary = build_summary(df_movs)
-                    colA, colB = st.columns(2)
-                    with colA:
-                        st.subheader("Detalle (preview)")
-                        st.dataframe(df_movs.head(30), use_container_width=True)
-                    with colB:
-                        st.subheader("Resumen")
-                        st.dataframe(df_summary, use_container_width=True)
-
-                    detalle_filename, resumen_filename = generate_filenames(base_name, choice)
-                    dcol1, dcol2 = st.columns(2)
-                    with dcol1:
-                        st.download_button("⬇️ Descargar Detalle (CSV)", to_csv_bytes(df_movs), detalle_filename, "text/csv")
-                    with dcol2:
-                        st.download_button("⬇️ Descargar Resumen (CSV)", to_csv_bytes(df_summary), resumen_filename, "text/csv")
-
-                    saldo_inicial, total_movs, saldo_final = get_kpis(df_movs)
-                    st.markdown("### Resumen")
-                    k1, k2, k3 = st.columns(3)
-                    k1.metric("Saldo Inicial", f"{saldo_inicial:,.2f}")
-                    k2.metric("Total Movimientos", f"{total_movs:,.2f}")
-                    k3.metric("Saldo Final", f"{saldo_final:,.2f}")
+        uploaded_files = st.file_uploader(
+            "Elegí los extractos bancarios (PDF)", type=["pdf"], accept_multiple_files=True
+        ) or []
+        if len(uploaded_files) == 1:
+            render_upload(uploaded_files[0], choice)
+        elif uploaded_files:
+            render_uploads(uploaded_files, choice)
         else:
-            st.info("Subí un PDF para comenzar.")
+            st.info("Subí uno o más PDFs para comenzar.")
 
 if __name__ == "__main__":
-    main()
+    from streamlit import runtime
+    if runtime.exists():
+        main()
+    else:
+        sys.exit(cli())
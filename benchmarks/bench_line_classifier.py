@@ -0,0 +1,89 @@
+"""Micro-benchmark: single-pass line classifier vs. sequential regex attempts.
+
+Runs both strategies over every line of the sample statements in PDFs/ and
+reports the per-line cost. Usage:
+
+    python benchmarks/bench_line_classifier.py [--repeat 200]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import ocr_extract_core as core  # noqa: E402
+
+SAMPLES = {
+    "santander": ["03_Santander_Dic24.pdf", "04_Santander ago-25_NEW.pdf"],
+    "hsbc": ["02_HSBC_Extracto.pdf"],
+}
+
+def sequential_santander(line, saldo_pending):
+    """The pre-classifier order: saldo inicial, movimiento, transferencia."""
+    if saldo_pending:
+        m = core.saldo_inicial_stdr_re.search(line)
+        if m:
+            return core.LINE_SALDO_INICIAL, m
+    m = core.linea_movimiento_stdr.match(line)
+    if m:
+        return core.LINE_MOVIMIENTO, m
+    m = core.linea_transferencia_stdr.match(line)
+    if m:
+        return core.LINE_TRANSFERENCIA, m
+    return None, None
+
+def sequential_hsbc(line, saldo_pending):
+    if saldo_pending:
+        m = core.saldo_anterior_hsbc_re.search(line)
+        if m:
+            return core.LINE_SALDO_INICIAL, m
+    m = core.linea_con_fecha_hsbc.match(line)
+    if m:
+        return core.LINE_MOVIMIENTO, m
+    m = core.linea_sin_fecha_hsbc.match(line)
+    if m:
+        return core.LINE_SIN_FECHA, m
+    return None, None
+
+STRATEGIES = {
+    "santander": (sequential_santander, core.classify_santander_line),
+    "hsbc": (sequential_hsbc, core.classify_hsbc_line),
+}
+
+def sample_lines(bank):
+    lines = []
+    for filename in SAMPLES[bank]:
+        path = os.path.join(ROOT, "PDFs", filename)
+        if not os.path.exists(path):
+            continue
+        with open(path, "rb") as fh:
+            for text in core.iter_page_texts(fh, workers=1):
+                lines.extend(l.strip() for l in text.splitlines())
+    return lines
+
+def per_line_ns(classify, lines, repeat):
+    def run():
+        for line in lines:
+            classify(line, False)
+    best = min(timeit.repeat(run, number=1, repeat=repeat))
+    return best / len(lines) * 1e9
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    for bank, (sequential, single_pass) in STRATEGIES.items():
+        lines = sample_lines(bank)
+        if not lines:
+            print(f"{bank}: sample PDFs not found, skipped")
+            continue
+        before = per_line_ns(sequential, lines, args.repeat)
+        after = per_line_ns(single_pass, lines, args.repeat)
+        print(f"{bank:10s} {len(lines):5d} lines  sequential {before:8.0f} ns/line  "
+              f"single-pass {after:8.0f} ns/line  speedup x{before / after:.2f}")
+
+if __name__ == "__main__":
+    main()
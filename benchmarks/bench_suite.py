@@ -0,0 +1,198 @@
+"""Reproducible benchmark suite for the parsers, build_summary, get_kpis and to_csv_bytes.
+
+Cases run on the sample statements in PDFs/ and on synthetic statements
+scaled to 10k/100k/1M movements. Every case runs in a fresh process so its
+peak RSS is its own. Results are written as JSON so runs on different
+commits can be compared:
+
+    python benchmarks/bench_suite.py -o before.json
+    python benchmarks/bench_suite.py -o after.json --compare before.json
+
+Synthetic parser cases feed page text straight into the parsers, so they
+measure parsing (line classification, money conversion, frame building)
+without pdfplumber; the sample-PDF cases include extraction
+and time the parse stage with both engines (text and words).
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic_statements import generate_statement  # noqa: E402
+
+SAMPLES = [
+    ("03_Santander_Dic24.pdf", "santander"),
+    ("04_Santander ago-25_NEW.pdf", "santander"),
+    ("02_HSBC_Extracto.pdf", "hsbc"),
+]
+SCALES = [10_000, 100_000, 1_000_000]
+STAGES = ["parse", "build_summary", "get_kpis", "to_csv_bytes"]
+
+# =========================
+# Measurement
+# =========================
+def _rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _measure(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    rss_peak = _rss_mb()
+    # A second, traced run: tracemalloc slows the call down too much to time it.
+    # Allocations are the blocks added between a snapshot before and one after
+    # the call; temporaries freed inside it only show up in the traced peak.
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = fn()
+    _, traced_peak = tracemalloc.get_traced_memory()
+    grown = [stat for stat in tracemalloc.take_snapshot().compare_to(before, "filename") if stat.count_diff > 0]
+    tracemalloc.stop()
+    return result, {
+        "seconds": best,
+        "peak_rss_mb": round(rss_peak, 1),
+        "traced_peak_mb": round(traced_peak / (1024 * 1024), 2),
+        "allocated_blocks": sum(stat.count_diff for stat in grown),
+        "allocated_mb": round(sum(stat.size_diff for stat in grown) / (1024 * 1024), 2),
+    }
+
+def run_case(case):
+    """Run one (source, stage) case in the current process and return its record."""
+    import ocr_extract_core as core  # the parsers look their settings up on the core
+
+    core.PAGE_CACHE_DIR = ""  # measure extraction, not the page cache (nor checkpoints)
+    parser = core.parse_santander_pdf if case["bank"] == "santander" else core.parse_hsbc_pdf
+    repeat = case.get("repeat", 3)
+
+    if case["source"] == "synthetic":
+        pages = generate_statement(case["bank"], case["rows"], seed=case.get("seed", 0)).pages
+        core.iter_page_texts = lambda *args, **kwargs: iter(pages)
+        pdf_bytes = b""
+    else:
+        with open(os.path.join(ROOT, "PDFs", case["source"]), "rb") as fh:
+            pdf_bytes = fh.read()
+    profile = core.ParseProfile()
+
+    def parse():
+        nonlocal profile
+        profile = core.ParseProfile()
+        return parser(io.BytesIO(pdf_bytes), workers=case.get("workers"), engine=case.get("engine"), profile=profile)
+
+    rss_before = _rss_mb()
+    if case["stage"] == "parse":
+        df, stats = _measure(parse, repeat)
+    else:
+        df = parse()
+        stage = {
+            "build_summary": lambda: core.build_summary(df),
+            "get_kpis": lambda: core.get_kpis(df),
+            "to_csv_bytes": lambda: core.to_csv_bytes(df),
+        }[case["stage"]]
+        _, stats = _measure(stage, repeat)
+
+    seconds = max(stats["seconds"], 1e-9)
+    # Pages actually parsed: the ones after the closing balance are never read.
+    pages_read = len(profile.pages)
+    record = dict(case, rows=len(df), pages=profile.total_pages or pages_read, pages_read=pages_read, **stats)
+    record["rows_per_s"] = round(len(df) / seconds, 1)
+    record["pages_per_s"] = round(pages_read / seconds, 1) if case["stage"] == "parse" else None
+    record["rss_growth_mb"] = round(max(stats["peak_rss_mb"] - rss_before, 0.0), 1)
+    return record
+
+def build_cases(scales):
+    cases = []
+    for filename, bank in SAMPLES:
+        if os.path.exists(os.path.join(ROOT, "PDFs", filename)):
+            for stage in STAGES:
+                cases.append({"source": filename, "bank": bank, "stage": stage, "workers": 1})
+            # The word engine only changes extraction, so only its parse stage differs.
+            cases.append({"source": filename, "bank": bank, "stage": "parse", "workers": 1, "engine": "words"})
+    for n_rows in scales:
+        for bank in ("santander", "hsbc"):
+            for stage in STAGES:
+                cases.append({"source": "synthetic", "bank": bank, "stage": stage, "rows": n_rows,
+                              "repeat": 3 if n_rows <= 100_000 else 1})
+    return cases
+
+def _meta():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    import numpy
+    import pandas
+    import pdfplumber
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "pandas": pandas.__version__,
+        "numpy": numpy.__version__,
+        "pdfplumber": pdfplumber.__version__,
+    }
+
+def _key(record):
+    return (record["source"], record["bank"], record["stage"], record.get("engine"),
+            record.get("rows") if record["source"] == "synthetic" else None)
+
+def compare(results, baseline, threshold=1.1):
+    """Print time ratios against a previous results file (>1 means slower now)."""
+    old = {_key(r): r for r in baseline["results"]}
+    print(f"\nvs {baseline['meta'].get('commit') or 'baseline'}:")
+    for record in results:
+        before = old.get(_key(record))
+        if before:
+            ratio = record["seconds"] / max(before["seconds"], 1e-9)
+            flag = "  REGRESSION" if ratio > threshold else ""
+            print(f"  {_label(record):55s} x{ratio:5.2f}{flag}")
+
+def _label(record):
+    size = f"{record['rows']:,} rows" if record["source"] == "synthetic" else record["source"]
+    stage = record["stage"] + (f"[{record['engine']}]" if record.get("engine") else "")
+    return f"{record['bank']:9s} {stage:13s} {size}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-o", "--output", default="bench_results.json", help="JSON results file")
+    parser.add_argument("--scales", type=int, nargs="*", default=SCALES, help="synthetic movement counts")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.1, help="slowdown ratio flagged as a regression")
+    args = parser.parse_args(argv)
+
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    for case in build_cases(args.scales):
+        with ctx.Pool(1) as pool:
+            record = pool.apply(run_case, (case,))
+        results.append(record)
+        pages_s = f"{record['pages_per_s']:10.1f} pages/s" if record["pages_per_s"] is not None else " " * 17
+        print(f"{_label(record):55s} {record['seconds'] * 1000:10.1f} ms {record['rows_per_s']:12.0f} rows/s "
+              f"{pages_s} rss {record['peak_rss_mb']:7.1f} MB  allocs {record['allocated_blocks']}", flush=True)
+
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump({"meta": _meta(), "results": results}, fh, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            compare(results, json.load(fh), args.threshold)
+
+if __name__ == "__main__":
+    main()
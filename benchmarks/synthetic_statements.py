@@ -0,0 +1,250 @@
+"""Synthetic Santander / HSBC statements for load tests and benchmarks.
+
+Produces page texts laid out like the real statements (what pdfplumber
+returns for them) and, optionally, a PDF that extracts back to those pages.
+Everything is derived from the seed, so a given (bank, rows, seed) is always
+the same statement. Usage:
+
+    python benchmarks/synthetic_statements.py santander 100000 -o stdr_100k.pdf
+    python benchmarks/synthetic_statements.py hsbc 5000 --broken-at 1200 --text hsbc.txt
+"""
+import argparse
+import math
+import random
+import sys
+from datetime import date, timedelta
+from typing import List, NamedTuple, Optional
+
+ROWS_PER_PAGE = 40
+
+# Sign variants accepted by _to_float_money_arg; the PDF writer only has
+# WinAnsi glyphs, so U+2212 is written as a plain hyphen there.
+DASHES = ["-", "–", "—", "−"]
+
+_MESES = ["ENE", "FEB", "MAR", "ABR", "MAY", "JUN", "JUL", "AGO", "SEP", "OCT", "NOV", "DIC"]
+_REFS_STDR = [
+    "Compra con tarjeta de debito",
+    "Impuesto ley 25.413 debito 0,6%",
+    "Iva 21% reg de transfisc ley27744",
+    "Retiro de efectivo en santander adrogue",
+    "Pago a proveedores recibido",
+    "Comision custodia",
+]
+_NAMES = ["fernandez christian nor", "eco agri srl", "abraham claudia c y abr", "agro surcos s. cap. i", ""]
+_REFS_HSBC = ["IMP. LEY 25.413", "TRANSF. ELECTRONICA", "PAGO SERVICIOS", "EXT.CAJ.AUTOMATICO", "INTERBANKING"]
+_DETAILS_HSBC = [
+    "D/MANTEN.CTA COMP BASE 2200,00 AL6,00P/MIL",
+    "CAJ.AUTOM.A CBU 0170165020000000606806 OPERACION: 002746",
+    "CAJERO AUTOMATICO Nø S1JRB024 OPERACION: 001525",
+]
+
+class SyntheticStatement(NamedTuple):
+    bank: str
+    pages: List[str]
+    movements: int              # movement rows, without the opening balance
+    transfers: int              # Santander transfers printed over two lines
+    final_saldo_cents: int
+    broken_at: Optional[int]    # index of the row that breaks the balance chain
+
+# =========================
+# Money formatting
+# =========================
+def format_arg(cents: int, dash: str = "-") -> str:
+    """Santander style: `-$ 1.234,56`."""
+    units, rest = divmod(abs(cents), 100)
+    return f"{dash if cents < 0 else ''}$ {units:,}".replace(",", ".") + f",{rest:02d}"
+
+def format_us(cents: int) -> str:
+    """HSBC style, unsigned: `1,234.56`."""
+    units, rest = divmod(abs(cents), 100)
+    return f"{units:,}.{rest:02d}"
+
+# =========================
+# Page texts
+# =========================
+def _paginate(header, rows, footer, rows_per_page):
+    """rows is a list of line groups (a movement and its detail lines)."""
+    n_pages = max(1, math.ceil(len(rows) / rows_per_page))
+    pages = []
+    for p in range(n_pages):
+        lines = list(header(p + 1, n_pages))
+        for group in rows[p * rows_per_page:(p + 1) * rows_per_page]:
+            lines.extend(group)
+        if p == n_pages - 1:
+            lines.extend(footer)
+        pages.append("\n".join(lines))
+    return pages
+
+def generate_statement(
+    bank: str,
+    n_movements: int,
+    seed: int = 0,
+    rows_per_page: int = ROWS_PER_PAGE,
+    transfer_ratio: float = 0.1,
+    broken_at: Optional[int] = None,
+    start: date = date(2024, 1, 1),
+) -> SyntheticStatement:
+    """Build a statement with n_movements rows after the opening balance.
+
+    Dates advance so the statement spans at most a year (HSBC only prints
+    dd-MON). With broken_at, that row's printed saldo is one peso off and the
+    chain continues from it, so only that row is inconsistent.
+    """
+    if bank not in ("santander", "hsbc"):
+        raise ValueError(f"Banco desconocido: {bank}")
+    rnd = random.Random(seed)
+    rows_per_day = max(1, math.ceil(n_movements / 360))
+    saldo = rnd.randint(-500_000_00, 2_000_000_00) if bank == "santander" else rnd.randint(0, 2_000_000_00)
+    opening = saldo
+    rows, transfers = [], 0
+    last_day = None
+
+    for i in range(n_movements):
+        day = start + timedelta(days=i // rows_per_day)
+        amount = rnd.randint(1, 500_000_00)
+        # HSBC prints unsigned balances, so its chain stays positive.
+        credit = rnd.random() < 0.45 or (bank == "hsbc" and saldo < amount)
+        saldo += amount if credit else -amount
+        if i == broken_at:
+            saldo += 100_00
+        printed_date = day != last_day
+        last_day = day
+
+        if bank == "santander":
+            fecha = day.strftime("%d/%m/%y") + " " if printed_date else ""
+            comprobante = f"{rnd.randint(1000, 99999999)} " if rnd.random() < 0.8 else ""
+            is_transfer = rnd.random() < transfer_ratio
+            if is_transfer:
+                referencia = "Transferencia recibida" if credit else "Transferencia realizada"
+            else:
+                referencia = rnd.choice(_REFS_STDR)
+            line = f"{fecha}{comprobante}{referencia} {format_arg(amount)} {format_arg(saldo, rnd.choice(DASHES))}"
+            group = [line]
+            if is_transfer:
+                transfers += 1
+                # Some transfers print no counterpart name: "A / varios - var / ...".
+                who = " ".join(filter(None, ["De" if credit else "A", rnd.choice(_NAMES)]))
+                group.append(f"{who} / {'transf' if credit else 'varios'} - var / "
+                             f"{rnd.randint(20_000_000_000, 30_999_999_999)}")
+            elif referencia.startswith("Retiro"):
+                group.append(f"Tarj nro. {rnd.randint(1000, 9999)}")
+        else:
+            fecha = f"{day.day:02d}-{_MESES[day.month - 1]} " if printed_date else ""
+            debito, credito = ("", format_us(amount)) if credit else (format_us(amount), "")
+            line = f"{fecha}- {rnd.choice(_REFS_HSBC)} {rnd.randint(0, 99999):05d} {debito or credito} {format_us(saldo)}"
+            group = [line]
+            if rnd.random() < 0.5:
+                group.append(rnd.choice(_DETAILS_HSBC))
+        rows.append(group)
+
+    end = start + timedelta(days=max(n_movements - 1, 0) // rows_per_day)
+    if bank == "santander":
+        def header(page, n_pages):
+            if page == 1:
+                yield "Cuenta Corriente"
+                yield f"Desde: {start:%d/%m/%y}"
+                yield f"Hasta: {end:%d/%m/%y}"
+            yield "Movimientos en pesos"
+            yield "Fecha Comprobante Movimiento Débito Crédito Saldo en cuenta"
+            if page == 1:
+                yield f"{start:%d/%m/%y} Saldo Inicial {format_arg(opening)}"
+        footer = [f"Saldo total {format_arg(saldo)}"]
+    else:
+        def header(page, n_pages):
+            yield f"HOJA {page} DE {n_pages}"
+            if page == 1:
+                yield "HSBC BANK ARGENTINA S.A."
+                yield f"EXTRACTO DEL {start:%d/%m/%Y} AL {end:%d/%m/%Y}"
+            yield "FECHA REFERENCIA NRO DEBITO CREDITO SALDO"
+            if page == 1:
+                yield f"- SALDO ANTERIOR {format_us(opening)}"
+        footer = [f"- SALDO FINAL {format_us(saldo)}"]
+
+    pages = _paginate(header, rows, footer, rows_per_page)
+    return SyntheticStatement(bank, pages, n_movements, transfers, saldo, broken_at)
+
+# =========================
+# PDF writer
+# =========================
+PAGE_WIDTH, PAGE_HEIGHT, MARGIN = 595, 842, 36
+
+def _pdf_string(line: str) -> bytes:
+    raw = line.replace("−", "-").encode("cp1252", errors="replace")
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+def write_pdf(pages, dest) -> int:
+    """Write page texts as a text-only PDF (Helvetica, WinAnsi) to a binary stream.
+
+    Pages are streamed, so large statements never sit in memory as a whole.
+    Returns the number of pages written.
+    """
+    offsets = []
+    written = 0
+
+    def obj(number, body: bytes):
+        nonlocal written
+        offsets.append((number, written))
+        chunk = b"%d 0 obj\n" % number + body + b"\nendobj\n"
+        dest.write(chunk)
+        written += len(chunk)
+
+    header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+    dest.write(header)
+    written += len(header)
+    obj(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    kids = []
+    number = 4
+    for text in pages:
+        lines = text.split("\n")
+        leading = min(10.0, (PAGE_HEIGHT - 2 * MARGIN) / max(len(lines), 1))
+        size = min(8.0, leading * 0.8)
+        content = b"BT /F1 %.2f Tf %.2f TL %d %d Td\n" % (size, leading, MARGIN, PAGE_HEIGHT - MARGIN)
+        content += b"".join(_pdf_string(line) + b" '\n" for line in lines) + b"ET"
+        obj(number, b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        obj(number + 1, b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R "
+                        b"/Resources << /Font << /F1 3 0 R >> >> >>" % (PAGE_WIDTH, PAGE_HEIGHT, number))
+        kids.append(number + 1)
+        number += 2
+
+    obj(2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % k for k in kids), len(kids)))
+    obj(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+    offsets.sort()
+    xref = b"xref\n0 %d\n0000000000 65535 f \n" % (len(offsets) + 1)
+    xref += b"".join(b"%010d 00000 n \n" % offset for _, offset in offsets)
+    dest.write(xref + b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(offsets) + 1, written))
+    return len(kids)
+
+def statement_pdf_bytes(statement: SyntheticStatement) -> bytes:
+    import io
+    buffer = io.BytesIO()
+    write_pdf(statement.pages, buffer)
+    return buffer.getvalue()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera extractos sintéticos (PDF o texto) para pruebas de carga.")
+    parser.add_argument("bank", choices=["santander", "hsbc"])
+    parser.add_argument("movements", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rows-per-page", type=int, default=ROWS_PER_PAGE)
+    parser.add_argument("--transfer-ratio", type=float, default=0.1)
+    parser.add_argument("--broken-at", type=int, help="fila cuyo saldo rompe la cadena")
+    parser.add_argument("-o", "--output", help="PDF de salida")
+    parser.add_argument("--text", help="texto de salida (páginas separadas por form feed)")
+    args = parser.parse_args(argv)
+
+    statement = generate_statement(args.bank, args.movements, args.seed, args.rows_per_page,
+                                   args.transfer_ratio, args.broken_at)
+    if args.output:
+        with open(args.output, "wb") as fh:
+            write_pdf(statement.pages, fh)
+    if args.text:
+        with open(args.text, "w", encoding="utf-8") as fh:
+            fh.write("\f".join(statement.pages))
+    print(f"{statement.bank}: {statement.movements} movimientos, {len(statement.pages)} páginas, "
+          f"{statement.transfers} transferencias, saldo final {statement.final_saldo_cents / 100:.2f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
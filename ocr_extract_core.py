@@ -0,0 +1,2409 @@
+"""Parsing core of the OCR Extract PDF app: page extraction and caching, the
+bank parsers, summaries, CSV export, statement merging and the batch CLI.
+
+Imports without streamlit, and numpy, pandas and pdfplumber are only imported
+on first use, so batch workers and short-lived processes start quickly; call
+warm_up() to pay for them ahead of time.
+"""
+from __future__ import annotations
+
+import re
+import io
+import os
+import sys
+import csv
+import glob
+import time
+import argparse
+import bisect
+import json
+import hashlib
+import importlib
+import itertools
+import logging
+import mmap
+import signal
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, BrokenExecutor, as_completed, wait
+from contextlib import contextmanager, nullcontext
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Iterable, NamedTuple, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# =========================
+# Deferred imports
+# =========================
+class _LazyModule:
+    """Stand-in for a heavy module, imported on first attribute access; the
+    module global is then rebound to the real module."""
+
+    def __init__(self, name: str, alias: str):
+        self._name, self._alias = name, alias
+
+    def _load(self):
+        module = importlib.import_module(self._name)
+        globals()[self._alias] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+np = _LazyModule("numpy", "np")
+pd = _LazyModule("pandas", "pd")
+pdfplumber = _LazyModule("pdfplumber", "pdfplumber")
+
+def warm_up() -> None:
+    """Import the deferred modules now (e.g. in a worker pool initializer), so
+    the first statement doesn't pay for them."""
+    for alias in ("np", "pd", "pdfplumber"):
+        module = globals()[alias]
+        if isinstance(module, _LazyModule):
+            module._load()
+
+def _mp_context():
+    """Start method of the worker pools: a fork server where there is one,
+    spawn elsewhere. Forking the threaded Streamlit server (or a pool with
+    its listener thread) can deadlock the children. The fork server imports
+    the heavy modules once, so the workers it forks still start warm."""
+    import multiprocessing
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(["numpy", "pandas", "pdfplumber"])
+    return context
+
+def _process_pool(max_workers: int, mp_context=None, **kwargs):
+    """A ProcessPoolExecutor; multiprocessing is only imported when one is needed."""
+    from concurrent.futures import ProcessPoolExecutor
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context or _mp_context(), **kwargs)
+
+# =========================
+# Shared helpers.
+# =========================
+def _to_float_money_arg(raw: str) -> float:
+    """Money with $ and Argentine thousands '.' and decimal ',' (e.g., -$ 70.833,71)."""
+    # Normalize unicode dashes to hyphen
+    normalized = raw.replace("–", "-").replace("—", "-").replace("−", "-")
+    return float(
+        normalized.replace("$", "")
+           .replace(".", "")
+           .replace(",", ".")
+           .replace(" ", "")
+           .strip()
+    )
+
+def _to_float_money_us(raw: str) -> float:
+    """Money with US-style thousands ',' and decimal '.' (e.g., 1,234.56)."""
+    # Normalize unicode dashes to hyphen
+    normalized = raw.replace("–", "-").replace("—", "-").replace("−", "-")
+    return float(normalized.replace(",", "").strip())
+
+_MONEY_ARG_TABLE = str.maketrans({"–": "-", "—": "-", "−": "-", "$": None, ".": None, " ": None, ",": "."})
+_MONEY_US_TABLE = str.maketrans({"–": "-", "—": "-", "−": "-", ",": None})
+
+def _money_many(raws, table) -> np.ndarray:
+    # One translate pass over all amounts joined together, one float parse
+    # for the whole batch. Raw amounts come from single lines, so "\n" is
+    # a safe separator.
+    values = raws if isinstance(raws, list) else list(raws)
+    if not values:
+        return np.empty(0, dtype=np.float64)
+    return np.array("\n".join(values).translate(table).split("\n"), dtype=np.float64)
+
+def _to_float_money_arg_many(raws) -> np.ndarray:
+    """Vectorized _to_float_money_arg over a Series, array or list of raw amounts."""
+    return _money_many(raws, _MONEY_ARG_TABLE)
+
+def _to_float_money_us_many(raws) -> np.ndarray:
+    """Vectorized _to_float_money_us over a Series, array or list of raw amounts."""
+    return _money_many(raws, _MONEY_US_TABLE)
+
+# Amounts are carried as int64 cents from parsing through build_summary and
+# get_kpis; floats in display units only appear at the DataFrame/CSV/UI edge.
+# float64 -> cents is exact while |cents| < 2**53.
+_MAX_EXACT_CENTS = 2 ** 53
+
+def _float_to_cents(values: np.ndarray) -> np.ndarray:
+    cents = np.rint(np.asarray(values, dtype=np.float64) * 100)
+    if cents.size and np.nanmax(np.abs(cents)) >= _MAX_EXACT_CENTS:
+        raise ValueError("Importe fuera de rango para una representación exacta en centavos.")
+    return cents.astype(np.int64)
+
+def _to_cents_money_arg(raw: str) -> int:
+    """Argentine-format money as integer cents (e.g., -$ 70.833,71 -> -7083371)."""
+    return int(_float_to_cents(np.array([_to_float_money_arg(raw)]))[0])
+
+def _to_cents_money_us(raw: str) -> int:
+    """US-format money as integer cents (e.g., 1,234.56 -> 123456)."""
+    return int(_float_to_cents(np.array([_to_float_money_us(raw)]))[0])
+
+def _to_cents_money_arg_many(raws) -> np.ndarray:
+    """Vectorized _to_cents_money_arg; returns an int64 array."""
+    return _float_to_cents(_money_many(raws, _MONEY_ARG_TABLE))
+
+def _to_cents_money_us_many(raws) -> np.ndarray:
+    """Vectorized _to_cents_money_us; returns an int64 array."""
+    return _float_to_cents(_money_many(raws, _MONEY_US_TABLE))
+
+def _series_to_cents(values) -> np.ndarray:
+    """Display-unit amounts (blanks/NaN/non-numeric count as 0) as int64 cents.
+
+    Typed float64 columns, as the parsers emit, skip the to_numeric coercion.
+    """
+    values = pd.Series(values)
+    if not pd.api.types.is_float_dtype(values.dtype):
+        values = pd.to_numeric(values, errors="coerce")
+    return _float_to_cents(values.fillna(0.0).to_numpy(dtype=np.float64))
+
+def format_cents(cents: int) -> str:
+    """Cents as a display amount with thousands separators (e.g., -100000 -> -1,000.00)."""
+    units, rest = divmod(abs(int(cents)), 100)
+    return f"{'-' if cents < 0 else ''}{units:,}.{rest:02d}"
+
+def _previous_saldos(saldos: np.ndarray, previous_saldo):
+    """Saldo before each row of a batch, plus a mask of rows that have one."""
+    prev = np.zeros_like(saldos)
+    has_prev = np.ones(len(saldos), dtype=bool)
+    if len(saldos):
+        prev[1:] = saldos[:-1]
+        if previous_saldo is None:
+            has_prev[0] = False
+        else:
+            prev[0] = previous_saldo
+    return prev, has_prev
+
+def get_kpis(df_movs: pd.DataFrame):
+    """Calculate key metrics from transaction data."""
+    if df_movs.empty:
+        return 0.0, 0.0, 0.0
+    try:
+        saldo_inicial = float(df_movs["Saldo"].iloc[0])
+        total_movs = int(_series_to_cents(df_movs.iloc[1:]["Importe"]).sum()) / 100
+        saldo_final = float(df_movs["Saldo"].iloc[-1])
+        return saldo_inicial, total_movs, saldo_final
+    except Exception:
+        return 0.0, 0.0, 0.0
+
+def generate_filenames(base_name: str, choice: str):
+    """Generate standardized filenames for downloads."""
+    ts = datetime.now().strftime("%Y%m%d_%H%M")
+    bank_code = bank_for_choice(choice).code
+    detalle = f"{base_name}_{bank_code}_Detalle_Movimientos_{ts}.csv"
+    resumen = f"{base_name}_{bank_code}_Resumen_Referencias_{ts}.csv"
+    return detalle, resumen
+
+# =========================
+# Instrumentation
+# =========================
+class PageTiming(NamedTuple):
+    page: int
+    extract_seconds: float  # waiting for the text (pdfplumber or cache); page 1 includes opening the PDF
+    parse_seconds: float    # classifying its lines
+    lines: int
+    matches: int
+
+STAGE_LABELS = {
+    "extract": "Extracción de texto (pdfplumber)",
+    "match": "Clasificación de líneas (regex)",
+    "convert": "Conversión de importes y control de saldos",
+    "frame": "Armado del DataFrame",
+    "summary": "Resumen y KPIs",
+    "csv": "Exportación CSV",
+}
+
+class ParseProfile:
+    """Per-stage and per-page timings plus line/match counts for one statement.
+
+    Parsers take an optional profile; with None they skip the bookkeeping.
+    total_pages is set by the page source once the PDF (or its cache entry)
+    is open, so pages never read after the end-of-movements marker show up
+    as skipped_pages. resumed_pages counts the leading pages a resumed parse
+    took from its checkpoint instead of reading them.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.pages = []
+        self.total_pages = None
+        self.resumed_pages = 0
+        self._pending_extract = 0.0
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def total(self) -> float:
+        return sum(self.stages.values())
+
+    def timed_pages(self, pages: Iterable[str]):
+        """Wrap a page text iterator, timing the wait for each page."""
+        it = iter(pages)
+        while True:
+            started = time.perf_counter()
+            try:
+                text = next(it)
+            except StopIteration:
+                return
+            self._pending_extract = time.perf_counter() - started
+            self.add("extract", self._pending_extract)
+            yield text
+
+    def end_page(self, parse_seconds: float, lines: int, matches: int):
+        self.add("match", parse_seconds)
+        self.pages.append(PageTiming(self.resumed_pages + len(self.pages) + 1, self._pending_extract, parse_seconds, lines, matches))
+
+    @property
+    def lines(self) -> int:
+        return sum(p.lines for p in self.pages)
+
+    @property
+    def matches(self) -> int:
+        return sum(p.matches for p in self.pages)
+
+    @property
+    def skipped_pages(self) -> int:
+        if self.total_pages is None:
+            return 0
+        return max(self.total_pages - self.resumed_pages - len(self.pages), 0)
+
+    def as_dict(self) -> dict:
+        """Plain, JSON-ready form (also what batch workers send back)."""
+        return {
+            "stages": {name: round(seconds, 6) for name, seconds in self.stages.items()},
+            "lines": self.lines,
+            "matches": self.matches,
+            "skipped_pages": self.skipped_pages,
+            "resumed_pages": self.resumed_pages,
+            "pages": [
+                {**p._asdict(), "extract_seconds": round(p.extract_seconds, 6), "parse_seconds": round(p.parse_seconds, 6)}
+                for p in self.pages
+            ],
+        }
+
+    def stages_frame(self) -> pd.DataFrame:
+        rows = [(STAGE_LABELS.get(name, name), seconds) for name, seconds in self.stages.items()]
+        return pd.DataFrame(rows, columns=["Etapa", "Segundos"])
+
+    def pages_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            [tuple(p) for p in self.pages],
+            columns=["Página", "Extracción (s)", "Clasificación (s)", "Líneas", "Coincidencias"],
+        )
+
+def _stage(profile: Optional[ParseProfile], name: str):
+    return profile.stage(name) if profile is not None else nullcontext()
+
+# =========================
+# Page text extraction
+# =========================
+# Worker processes for page-parallel extraction. 0 means "one per CPU",
+# 1 forces the serial path. Overridable with OCR_EXTRACT_WORKERS.
+EXTRACT_WORKERS = int(os.environ.get("OCR_EXTRACT_WORKERS", "0") or 0)
+# Below this page count the process start-up costs more than it saves.
+PARALLEL_MIN_PAGES = 8
+# Release each page's parsed layout objects (chars, lines, text map) as soon
+# as its text is taken. pdfplumber otherwise keeps them until the PDF is
+# closed, a few MB per page. OCR_EXTRACT_LOW_MEMORY=0 keeps them.
+LOW_MEMORY_PAGES = os.environ.get("OCR_EXTRACT_LOW_MEMORY", "1") != "0"
+
+def _resolve_workers(workers, n_pages: int) -> int:
+    """Effective worker count for a PDF with n_pages pages (1 = serial)."""
+    if workers is None:
+        workers = EXTRACT_WORKERS
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    if n_pages < PARALLEL_MIN_PAGES:
+        return 1
+    return max(1, min(workers, n_pages))
+
+def _read_pdf_bytes(file_like) -> bytes:
+    """Raw bytes of a path, binary file object or OpenedPDF, leaving the stream rewound."""
+    if isinstance(file_like, OpenedPDF):
+        return file_like.pdf_bytes
+    if isinstance(file_like, (str, os.PathLike)):
+        with open(file_like, "rb") as fh:
+            return fh.read()
+    file_like.seek(0)
+    data = file_like.read()
+    file_like.seek(0)
+    return data
+
+class OpenedPDF:
+    """A statement's pdfplumber document, opened on first use and shared by
+    the passes over it (bank detection, then parsing) instead of each one
+    opening its own. Pass it wherever a file_like is taken; the full text of
+    page 1 read for detection is reused for the parse's first page."""
+
+    def __init__(self, pdf_bytes: bytes):
+        self.pdf_bytes = pdf_bytes
+        self._pdf = None
+        self._first_text = None
+
+    @property
+    def pdf(self):
+        if self._pdf is None:
+            self._pdf = pdfplumber.open(io.BytesIO(self.pdf_bytes))
+        return self._pdf
+
+    @property
+    def n_pages(self) -> Optional[int]:
+        """Page count, or None if the document was never opened."""
+        return None if self._pdf is None else len(self._pdf.pages)
+
+    def first_page_text(self) -> str:
+        if self._first_text is None:
+            pages = self.pdf.pages
+            self._first_text = _extract_page(pages[0]) if pages else ""
+        return self._first_text
+
+    def page(self, i: int, layout: str = "text"):
+        """What _extract_page yields for page i."""
+        if i == 0 and self._first_text is not None:
+            if layout == "text":
+                return self._first_text
+            kind, _, bank = layout.partition(":")
+            if kind == "text":
+                return _first_page_region(self._first_text, get_bank_parser(bank).region)
+        return _extract_page(self.pdf.pages[i], layout, i == 0)
+
+    def close(self) -> None:
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _extract_page(page, layout: str = "text", first: bool = False):
+    """What a page yields for a layout: "text" is extract_text(), "text:<bank>"
+    the text of that bank's movements region and "words:<bank>" its word lines.
+    With LOW_MEMORY_PAGES the page is flushed afterwards and must not be reused."""
+    try:
+        if layout == "text":
+            return page.extract_text() or ""
+        kind, _, bank = layout.partition(":")
+        parser = get_bank_parser(bank)
+        if kind == "words":
+            return _page_word_lines(page, parser.table_headers, None if first else parser.region)
+        return _page_region_text(page, parser.region, first)
+    finally:
+        if LOW_MEMORY_PAGES:
+            page.close()
+
+def _extract_page_range(source, start: int, stop: int, layout: str = "text") -> list:
+    """Worker entry point: pages [start, stop) of an in-memory PDF, or of a
+    PDF file that is memory-mapped so every worker shares the same pages."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        with pdfplumber.open(io.BytesIO(source)) as pdf:
+            return [_extract_page(pdf.pages[i], layout, i == 0) for i in range(start, stop)]
+    with open(source, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        with pdfplumber.open(mapped) as pdf:
+            return [_extract_page(pdf.pages[i], layout, i == 0) for i in range(start, stop)]
+
+def _page_ranges(n_pages: int, workers: int):
+    """Split n_pages into `workers` contiguous, ordered (start, stop) ranges."""
+    size, extra = divmod(n_pages, workers)
+    start = 0
+    for i in range(workers):
+        stop = start + size + (1 if i < extra else 0)
+        if stop > start:
+            yield start, stop
+        start = stop
+
+def _extract_page_texts(pdf_bytes: bytes, workers=None, layout: str = "text", start: int = 0,
+                        on_count=None, document: Optional[OpenedPDF] = None):
+    """Yield the extracted text (or word lines, see _extract_page) of every page
+    from `start` on, in page order. on_count receives the PDF's page count.
+
+    Large PDFs are split into page ranges that worker processes extract from
+    their own copy of the bytes; results are merged back in order, so the
+    output is identical to the serial path. The bytes reach the workers as
+    one temporary file they memory-map, rather than a pickled copy per range.
+    If the pool cannot be used the remaining pages are extracted serially.
+    Closing the generator early cancels the ranges not started yet without
+    waiting for the running ones. With a document, its open PDF is used
+    (and left open) on the serial path.
+    """
+    with nullcontext(document.pdf) if document is not None else pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        n_pages = len(pdf.pages)
+        if on_count is not None:
+            on_count(n_pages)
+        n_workers = _resolve_workers(workers, n_pages - start)
+        if n_workers <= 1:
+            for i in range(start, n_pages):
+                yield document.page(i, layout) if document is not None else _extract_page(pdf.pages[i], layout, i == 0)
+            return
+
+    done = start
+    spool = None
+    try:
+        with tempfile.NamedTemporaryFile(prefix="ocr_extract_", suffix=".pdf", delete=False) as spool:
+            spool.write(pdf_bytes)
+        with _process_pool(n_workers) as pool:
+            ranges = [(a + start, b + start) for a, b in _page_ranges(n_pages - start, n_workers)]
+            chunks = pool.map(_extract_page_range,
+                              [spool.name] * len(ranges),
+                              [r[0] for r in ranges],
+                              [r[1] for r in ranges],
+                              [layout] * len(ranges))
+            try:
+                for texts in chunks:
+                    for text in texts:
+                        yield text
+                        done += 1
+            except GeneratorExit:
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+    except (OSError, NotImplementedError, BrokenExecutor):
+        if done < n_pages:
+            yield from _extract_page_range(pdf_bytes, done, n_pages, layout)
+    finally:
+        if spool is not None:
+            try:
+                os.remove(spool.name)
+            except OSError:
+                pass
+
+def _stop_pages(pages) -> None:
+    """Stop a page iterator the parser no longer needs (ends its extraction)."""
+    close = getattr(pages, "close", None)
+    if close is not None:
+        close()
+
+# =========================
+# Page text cache
+# =========================
+# Directory of the on-disk page text cache; an empty value disables it.
+PAGE_CACHE_DIR = os.environ.get(
+    "OCR_EXTRACT_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "ocr_extract_pdf"),
+)
+PAGE_CACHE_MAX_BYTES = int(os.environ.get("OCR_EXTRACT_CACHE_MAX_MB", "256")) * 1024 * 1024
+
+def file_digest(pdf_bytes: bytes) -> str:
+    """SHA-256 hex digest of an uploaded file's bytes."""
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+class PageTextCache:
+    """Per-page extracted text stored as JSON files, one per PDF.
+
+    Entries are keyed by the SHA-256 of the PDF bytes plus the pdfplumber
+    version, so upgrading pdfplumber never serves stale text. Reads refresh
+    the file's mtime and writes evict the least recently used entries until
+    the directory fits in max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = PAGE_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, pdf_bytes: bytes, layout: str = "text") -> str:
+        suffix = "" if layout == "text" else "." + _layout_key(layout)
+        return f"{file_digest(pdf_bytes)}.{pdfplumber.__version__}{suffix}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get_entry(self, key: str):
+        """(page texts, page count of the PDF) for key, or None on a miss.
+
+        Fewer texts than pages means only the leading pages were read (the
+        parser stopped at the end-of-movements marker).
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                entry = json.load(fh)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            self._discard(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        if isinstance(entry, dict):
+            return entry["pages"], entry["n_pages"]
+        return entry, len(entry)
+
+    def get(self, key: str):
+        """Cached page texts for key, or None on a miss or a partial entry."""
+        entry = self.get_entry(key)
+        if entry is None or len(entry[0]) < entry[1]:
+            return None
+        return entry[0]
+
+    def put(self, key: str, pages: list, n_pages: Optional[int] = None) -> None:
+        """Store page texts for key (best effort) and enforce the size bound.
+
+        With n_pages above len(pages) the entry holds only the leading pages.
+        """
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        entry = pages if n_pages is None or n_pages <= len(pages) else {"pages": pages, "n_pages": n_pages}
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(entry, fh, ensure_ascii=False)
+            os.replace(tmp, path)
+        except OSError:
+            self._discard(tmp)
+            return
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".json"):
+                    try:
+                        info = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((info.st_mtime, info.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._discard(path)
+            total -= size
+
+    @staticmethod
+    def _discard(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def get_page_cache():
+    """The configured PageTextCache, or None when caching is disabled."""
+    if not PAGE_CACHE_DIR:
+        return None
+    return PageTextCache(PAGE_CACHE_DIR, PAGE_CACHE_MAX_BYTES)
+
+def iter_page_texts(file_like, workers=None, cache=True, layout: str = "text",
+                    profile: Optional[ParseProfile] = None, start: int = 0):
+    """Yield the extracted text of every page from `start` (0-based) on, in
+    page order.
+
+    On a page cache hit pdfplumber is not touched at all; on a miss the pages
+    are extracted (in parallel for large PDFs) and stored when the consumer
+    is done with them. If it stops early only the pages read so far are
+    stored, and a later full read extracts the rest. With a bank name as
+    layout, pages are word-line rows instead (see iter_page_words).
+    """
+    n_pages = None
+
+    def on_count(n):
+        nonlocal n_pages
+        n_pages = n
+        if profile is not None:
+            profile.total_pages = n
+
+    pdf_bytes = _read_pdf_bytes(file_like)
+    document = file_like if isinstance(file_like, OpenedPDF) else None
+    page_cache = get_page_cache() if cache else None
+    if page_cache is None:
+        yield from _extract_page_texts(pdf_bytes, workers, layout, start, on_count, document)
+        return
+
+    key = page_cache.key(pdf_bytes, layout)
+    entry = page_cache.get_entry(key)
+    cached = []
+    if entry is not None:
+        cached, count = entry
+        on_count(count)
+        yield from itertools.islice(cached, start, None)
+        if len(cached) >= count:
+            return
+
+    if start > len(cached):
+        # The cache only holds leading pages, so pages read past a gap aren't stored.
+        yield from _extract_page_texts(pdf_bytes, workers, layout, start, on_count, document)
+        return
+    pages = list(cached)
+    try:
+        for text in _extract_page_texts(pdf_bytes, workers, layout, len(pages), on_count, document):
+            pages.append(text)
+            yield text
+    finally:
+        if len(pages) > len(cached):
+            page_cache.put(key, pages, n_pages)
+
+# =========================
+# Word-level extraction
+# =========================
+# Alternative engine to extract_text() + whole-line regexes: words are pulled
+# with their coordinates once per page and the amounts are assigned to the
+# Débito/Crédito/Saldo columns by position, using the table header of each
+# page. Selected with engine="words" or OCR_EXTRACT_ENGINE=words.
+PARSE_ENGINES = ("text", "words")
+PARSE_ENGINE = os.environ.get("OCR_EXTRACT_ENGINE", "text") or "text"
+
+# Amounts are right-aligned under their header; max gap between right edges (pt).
+COLUMN_TOLERANCE = 12
+# Words whose tops differ by at most this much share a line, as in extract_text.
+LINE_TOLERANCE = 3
+_MONEY_SIGNS = {"$", "-$", "–$", "—$", "−$"}
+
+class WordLine(str):
+    """A page line from the word engine: its text plus, inside the movements
+    table, the cells found by position (fecha, the remaining words left of the
+    amounts, debito, credito, saldo). Cells are empty outside the table."""
+
+    def __new__(cls, text, fecha="", words=(), debito="", credito="", saldo=""):
+        line = super().__new__(cls, text)
+        line.fecha, line.words = fecha, tuple(words)
+        line.debito, line.credito, line.saldo = debito, credito, saldo
+        return line
+
+class _Cells(dict):
+    """Row cells with the .group() lookup of a regex match, so the parsers'
+    state machines handle both engines alike."""
+    group = dict.get
+
+def _is_money(text: str) -> bool:
+    # "1.234,56", "$ 80,00", "1,234.56" and HSBC's bare ".16"
+    return len(text) >= 3 and text[-3] in ".," and text[-2:].isdigit() and (len(text) == 3 or text[-4].isdigit())
+
+def _cluster_lines(words: list) -> list:
+    lines, current, top = [], [], None
+    for w in sorted(words, key=lambda w: w["top"]):
+        if current and w["top"] - top > LINE_TOLERANCE:
+            lines.append(sorted(current, key=lambda w: w["x0"]))
+            current = []
+        if not current:
+            top = w["top"]
+        current.append(w)
+    if current:
+        lines.append(sorted(current, key=lambda w: w["x0"]))
+    return lines
+
+def _line_cells(line_words: list, columns: tuple) -> list:
+    """[fecha, words, debito, credito, saldo] of a table line."""
+    fecha_edge, rights = columns[0], columns[1:]
+    tokens, i = [], 0
+    while i < len(line_words):
+        w = line_words[i]
+        # "$" / "-$" are separate words, glued to the number after them.
+        if w["text"] in _MONEY_SIGNS and i + 1 < len(line_words):
+            nxt = line_words[i + 1]
+            tokens.append((f"{w['text']} {nxt['text']}", w["x0"], nxt["x1"]))
+            i += 2
+            continue
+        tokens.append((w["text"], w["x0"], w["x1"]))
+        i += 1
+
+    fecha, left, amounts = "", [], ["", "", ""]
+    for n, (text, x0, x1) in enumerate(tokens):
+        if n == 0 and x0 < fecha_edge and len(text) >= 6 and text[:2].isdigit() and text[2] in "/-":
+            fecha = text
+            continue
+        if _is_money(text):
+            col = min(range(3), key=lambda c: abs(rights[c] - x1))
+            if abs(rights[col] - x1) <= COLUMN_TOLERANCE and not amounts[col]:
+                amounts[col] = text
+                continue
+        left.append(text)
+    return [fecha, left, *amounts]
+
+def _page_word_lines(page, headers: tuple, region: Optional["RegionProfile"] = None) -> list:
+    """Rows for the WordLine of every line on a page (JSON/pickle friendly).
+
+    Lines up to the table header are [text]; below it [text, *cells]. With a
+    region, only the chars of the movements area are looked at.
+    """
+    if region is not None:
+        words = pdfplumber.utils.extract_words(_region_chars(page, region))
+    else:
+        words = page.extract_words()
+    rows, columns = [], None
+    for line_words in _cluster_lines(words):
+        texts = [w["text"] for w in line_words]
+        text = " ".join(texts)
+        if columns is not None:
+            rows.append([text, *_line_cells(line_words, columns)])
+            continue
+        if all(h in texts for h in headers):
+            by_text = {w["text"]: w for w in line_words}
+            columns = (by_text[headers[1]]["x0"], by_text[headers[2]]["x1"], by_text[headers[3]]["x1"],
+                       max(w["x1"] for w in line_words))
+        rows.append([text])
+    return rows
+
+def iter_page_words(file_like, bank: str, workers=None, cache=True, profile: Optional[ParseProfile] = None,
+                    start: int = 0):
+    """Yield every page as a list of WordLine, in page order (cached like the text)."""
+    pages = iter_page_texts(file_like, workers, cache, f"words:{bank}", profile, start)
+    try:
+        for rows in pages:
+            yield [WordLine(*row) for row in rows]
+    finally:
+        _stop_pages(pages)
+
+def _resolve_engine(engine: Optional[str]) -> str:
+    engine = engine or PARSE_ENGINE
+    if engine not in PARSE_ENGINES:
+        raise ValueError(f"Motor de extracción desconocido: {engine}")
+    return engine
+
+# =========================
+# Page regions
+# =========================
+# Statements repeat a header block on every page and carry marketing and
+# legal text around the movements table. Extraction only lays out the chars
+# of the table region, which saves pdfplumber's line layout and the regex
+# attempts on lines that can never be movements. pdfminer still parses the
+# whole page, so the gain is in the layout/matching share of the time.
+# Disable with OCR_EXTRACT_CROP=0.
+CROP_REGIONS = os.environ.get("OCR_EXTRACT_CROP", "1") != "0"
+# Bumped whenever the regions change, so cached region texts are not reused.
+REGION_VERSION = 2
+# The region starts this far above the top of the table header's first char (pt).
+REGION_MARGIN = 3
+
+class RegionProfile(NamedTuple):
+    """How to find a bank's movements table on a page."""
+    anchors: tuple  # page 1: the region starts at the first line beginning with one of these
+    header: str     # other pages: the region starts at the table header holding this text
+    footer: str     # other pages: and ends at the page footer starting with this ("" keeps the bottom)
+
+def _layout_key(layout: str) -> str:
+    """A layout as used in cache and checkpoint keys."""
+    return layout if layout == "text" else f"{layout.replace(':', '-')}-r{REGION_VERSION}"
+
+def _char_top(chars: list, texts: str, at: int) -> float:
+    """Top of the char holding offset at of texts, the chars' joined text
+    (a ligature char carries more than one letter)."""
+    if len(texts) != len(chars):
+        offsets = list(itertools.accumulate((len(c["text"]) for c in chars), initial=0))
+        at = bisect.bisect_right(offsets, at) - 1
+    return chars[at]["top"]
+
+def _region_chars(page, region: RegionProfile) -> list:
+    """The chars from the page's table header down to its footer.
+
+    The box is found on every page instead of using fixed coordinates, and a
+    page without the header is kept whole, so no movement is ever cropped away.
+    """
+    chars = page.chars
+    texts = "".join(c["text"] for c in chars)
+    found = texts.find(region.header)
+    if found < 0:
+        return chars
+    header_top = _char_top(chars, texts, found)
+    bottom = float("inf")
+    end = texts.find(region.footer, found) if region.footer else -1
+    if end >= 0 and _char_top(chars, texts, end) > header_top:
+        bottom = _char_top(chars, texts, end)
+    return [c for c in chars if header_top - REGION_MARGIN <= c["top"] < bottom]
+
+def _page_region_text(page, region: RegionProfile, first: bool = False) -> str:
+    """Text of a page's movements region.
+
+    The first page is laid out whole and kept from the first anchor line
+    down (all of it if no anchor is found); the other pages are cropped to
+    the table's box before layout, by filtering chars (page.crop() re-crops
+    every object type and is slower than not cropping at all).
+    """
+    if not first:
+        return pdfplumber.utils.extract_text(_region_chars(page, region)) or ""
+    return _first_page_region(page.extract_text() or "", region)
+
+def _first_page_region(text: str, region: RegionProfile) -> str:
+    """The first page's full text from its first anchor line down."""
+    lines = text.split("\n")
+    start = next((i for i, l in enumerate(lines) if l.lstrip().startswith(region.anchors)), 0)
+    return "\n".join(lines[start:])
+
+def _text_layout(bank: str) -> str:
+    return f"text:{bank}" if CROP_REGIONS else "text"
+
+# =========================
+# Movement records
+# =========================
+MOVEMENT_COLUMNS = ["Fecha", "Referencia", "Importe", "Saldo"]
+
+class Movement(NamedTuple):
+    """One statement row, amounts in integer cents.
+
+    fecha is the date as printed and fecha_dt the resolved calendar date (None
+    on the opening-balance row or when it can't be resolved). importe_cents is
+    None on the opening-balance row.
+    """
+    fecha: str
+    referencia: str
+    importe_cents: Optional[int]
+    saldo_cents: int
+    fecha_dt: Optional[date] = None
+
+def _movement_row(m: Movement) -> tuple:
+    importe = "" if m.importe_cents is None else m.importe_cents / 100
+    return (m.fecha, m.referencia, importe, m.saldo_cents / 100)
+
+# How each bank prints Fecha, used to render the datetime64 column back to
+# the statement's own format at the CSV edge.
+_MESES_HSBC = ["ENE", "FEB", "MAR", "ABR", "MAY", "JUN", "JUL", "AGO", "SEP", "OCT", "NOV", "DIC"]
+FECHA_FORMATTERS = {}  # fecha_style -> formatter, filled by register_bank
+
+class MovementFrameBuilder:
+    """Accumulates movements into preallocated, typed columns.
+
+    Fecha becomes datetime64 (NaT on the opening row), Importe and Saldo
+    float64 in display units (NaN Importe on the opening row) and Referencia
+    a categorical, so downstream aggregation never has to coerce dtypes.
+    Arrays grow by doubling. If any printed date couldn't be resolved, Fecha
+    falls back to a categorical of the printed text rather than losing it.
+    """
+
+    def __init__(self, fecha_style: Optional[str] = None, capacity: int = 1024):
+        self.fecha_style = fecha_style
+        self._n = 0
+        self._fecha = np.empty(capacity, dtype="datetime64[D]")
+        self._importe = np.empty(capacity, dtype=np.int64)
+        self._has_importe = np.empty(capacity, dtype=bool)
+        self._saldo = np.empty(capacity, dtype=np.int64)
+        self._ref_codes = np.empty(capacity, dtype=np.int32)
+        self._fecha_codes = np.empty(capacity, dtype=np.int32)
+        self._refs = {}
+        self._fechas = {}
+        self._dates_resolved = True
+
+    def _grow(self) -> None:
+        for name in ("_fecha", "_importe", "_has_importe", "_saldo", "_ref_codes", "_fecha_codes"):
+            old = getattr(self, name)
+            new = np.empty(len(old) * 2, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def append(self, m: Movement) -> None:
+        i = self._n
+        if i == len(self._saldo):
+            self._grow()
+        if m.fecha_dt is not None:
+            self._fecha[i] = m.fecha_dt
+        else:
+            self._fecha[i] = np.datetime64("NaT")
+            if m.fecha:
+                self._dates_resolved = False
+        self._fecha_codes[i] = self._fechas.setdefault(m.fecha, len(self._fechas))
+        self._ref_codes[i] = self._refs.setdefault(m.referencia, len(self._refs))
+        self._has_importe[i] = m.importe_cents is not None
+        self._importe[i] = m.importe_cents or 0
+        self._saldo[i] = m.saldo_cents
+        self._n = i + 1
+
+    def extend(self, movements: Iterable[Movement]) -> "MovementFrameBuilder":
+        for m in movements:
+            self.append(m)
+        return self
+
+    @staticmethod
+    def _categorical(codes: np.ndarray, index: dict) -> pd.Categorical:
+        # Sorted categories keep groupby output in the same (lexical) order
+        # as grouping plain strings.
+        labels = list(index)
+        order = sorted(range(len(labels)), key=labels.__getitem__)
+        remap = np.empty(len(labels), dtype=np.int32)
+        remap[order] = np.arange(len(labels), dtype=np.int32)
+        return pd.Categorical.from_codes(remap[codes] if len(labels) else codes,
+                                         categories=[labels[j] for j in order])
+
+    def to_frame(self) -> pd.DataFrame:
+        n = self._n
+        if self._dates_resolved:
+            fecha = pd.Series(self._fecha[:n].astype("datetime64[ns]"))
+        else:
+            fecha = pd.Series(self._categorical(self._fecha_codes[:n], self._fechas))
+        df = pd.DataFrame({
+            "Fecha": fecha,
+            "Referencia": self._categorical(self._ref_codes[:n], self._refs),
+            "Importe": np.where(self._has_importe[:n], self._importe[:n] / 100, np.nan),
+            "Saldo": self._saldo[:n] / 100,
+        })
+        if self._dates_resolved and self.fecha_style:
+            df.attrs["fecha_style"] = self.fecha_style
+        return df
+
+def movements_to_frame(
+    movements: Iterable[Movement], fecha_style: Optional[str] = None, profile: Optional[ParseProfile] = None
+) -> pd.DataFrame:
+    """Collect a movement stream into the typed Detalle DataFrame.
+
+    With a profile, whatever the parser stages did not account for is
+    booked as "frame" (appending rows and building the columns).
+    """
+    if profile is None:
+        return MovementFrameBuilder(fecha_style).extend(movements).to_frame()
+    before, started = profile.total(), time.perf_counter()
+    df = MovementFrameBuilder(fecha_style).extend(movements).to_frame()
+    profile.add("frame", time.perf_counter() - started - (profile.total() - before))
+    return df
+
+# =========================
+# Checkpoints
+# =========================
+# Long statements save the parse state every CHECKPOINT_PAGES pages, so a
+# parse that fails or dies on page 480 of 500 resumes from page 450 instead
+# of extracting and parsing everything again. 0 disables checkpoints.
+CHECKPOINT_PAGES = int(os.environ.get("OCR_EXTRACT_CHECKPOINT_PAGES", "50") or 0)
+# Directory of the checkpoints; empty means a "checkpoints" directory in the page cache.
+CHECKPOINT_DIR = os.environ.get("OCR_EXTRACT_CHECKPOINT_DIR", "")
+# Hours the checkpoint of a parse that never completed is kept (0 = forever).
+CHECKPOINT_MAX_HOURS = float(os.environ.get("OCR_EXTRACT_CHECKPOINT_MAX_HOURS", "168") or 0)
+# Bumped whenever the parsers change the movements a page yields, so a resume
+# never replays journal rows written by an older parser.
+PARSER_VERSION = 1
+
+def _movement_to_json(m: Optional[Movement]):
+    if m is None:
+        return None
+    return [m.fecha, m.referencia, m.importe_cents, m.saldo_cents, m.fecha_dt.isoformat() if m.fecha_dt else None]
+
+def _movement_from_json(row) -> Optional[Movement]:
+    if row is None:
+        return None
+    fecha, referencia, importe_cents, saldo_cents, fecha_dt = row
+    return Movement(fecha, referencia, importe_cents, saldo_cents, date.fromisoformat(fecha_dt) if fecha_dt else None)
+
+def _lock_file(fd: int) -> None:
+    """Exclusive lock on an open file, released when it is closed or its
+    process dies; OSError if someone else holds it."""
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    else:
+        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+
+class ParseCheckpoint:
+    """Saved progress of one statement's parse: a JSON state file plus a
+    JSON-lines journal of the movements yielded before it.
+
+    save() appends to the journal before replacing the state, and the state
+    records the journal's length, so a crash between the two only leaves
+    lines that load() cuts off. A parse owns the checkpoint while it holds
+    its lock file (acquire()); load, save and discard do nothing otherwise,
+    so two parses of one statement never write or drop each other's.
+    """
+
+    def __init__(self, directory: str, key: str):
+        self.directory = directory
+        self.state_path = os.path.join(directory, f"{key}.json")
+        self.journal_path = os.path.join(directory, f"{key}.jsonl")
+        self.lock_path = os.path.join(directory, f"{key}.lock")
+        self.pending = []  # movements yielded since the last save()
+        self.rows = 0  # movements in the journal
+        self.last_saldo = None  # saldo of the journal's last movement
+        self.failed = False
+        self._lock_fd = None
+
+    def acquire(self) -> bool:
+        """Take the checkpoint for this parse; False if another parse holds it."""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT)
+        except OSError:
+            return False
+        try:
+            _lock_file(fd)
+            # The owner before us unlinks the file on release; ours may be that one.
+            if os.fstat(fd).st_ino != os.stat(self.lock_path).st_ino:
+                raise OSError("lock file replaced")
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._lock_fd is not None:
+            PageTextCache._discard(self.lock_path)
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def load(self):
+        """(state, movements) of the last checkpoint, or None if there is none
+        or its journal doesn't hold the rows the state counted."""
+        if self._lock_fd is None:
+            return None
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as fh:
+                state = json.load(fh)
+            with open(self.journal_path, "r+b") as fh:
+                if os.fstat(fh.fileno()).st_size < state["offset"]:
+                    raise ValueError("journal shorter than its checkpoint")
+                fh.truncate(state["offset"])
+                movements = [_movement_from_json(json.loads(line)) for line in fh]
+            last_saldo = movements[-1].saldo_cents if movements else None
+            if len(movements) != state["rows"] or last_saldo != state["last_saldo"]:
+                raise ValueError("journal does not match its checkpoint")
+        except FileNotFoundError:
+            self.discard()
+            return None
+        except (OSError, ValueError, KeyError, TypeError):
+            self.discard()
+            return None
+        self.rows, self.last_saldo = len(movements), last_saldo
+        return state, movements
+
+    def save(self, state: dict) -> None:
+        """Journal the pending movements and record state (best effort: after a
+        write error the checkpoint is dropped and later saves do nothing)."""
+        if self.failed or self._lock_fd is None:
+            return
+        tmp = f"{self.state_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        rows = self.rows + len(self.pending)
+        last_saldo = self.pending[-1].saldo_cents if self.pending else self.last_saldo
+        try:
+            with open(self.journal_path, "ab") as fh:
+                fh.write("".join(
+                    json.dumps(_movement_to_json(m), ensure_ascii=False) + "\n" for m in self.pending
+                ).encode("utf-8"))
+                offset = fh.tell()
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump({**state, "offset": offset, "rows": rows, "last_saldo": last_saldo}, fh, ensure_ascii=False)
+            os.replace(tmp, self.state_path)
+        except OSError:
+            PageTextCache._discard(tmp)
+            self.discard()
+            self.failed = True
+        else:
+            self.rows, self.last_saldo = rows, last_saldo
+        self.pending.clear()
+
+    def discard(self) -> None:
+        if self._lock_fd is None:
+            return
+        PageTextCache._discard(self.state_path)
+        PageTextCache._discard(self.journal_path)
+
+def get_checkpoint(pdf_bytes: bytes, bank: str, layout: str) -> Optional[ParseCheckpoint]:
+    """The checkpoint of a statement parsed as bank from pages of layout, or
+    None when checkpoints are disabled."""
+    directory = CHECKPOINT_DIR or (PAGE_CACHE_DIR and os.path.join(PAGE_CACHE_DIR, "checkpoints"))
+    if CHECKPOINT_PAGES <= 0 or not directory:
+        return None
+    if CHECKPOINT_MAX_HOURS > 0:
+        _expire_checkpoints(directory, CHECKPOINT_MAX_HOURS * 3600)
+    key = f"{file_digest(pdf_bytes)}.{pdfplumber.__version__}.{bank}.{_layout_key(layout)}.p{PARSER_VERSION}"
+    return ParseCheckpoint(directory, key)
+
+def _expire_checkpoints(directory: str, max_age: float) -> None:
+    """Delete the checkpoints in directory whose files were all last written
+    over max_age seconds ago, except those a running parse holds."""
+    cutoff = time.time() - max_age
+    written = {}
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    mtime = entry.stat().st_mtime
+                except OSError:
+                    continue
+                if entry.name.endswith(".tmp"):
+                    if mtime < cutoff:
+                        PageTextCache._discard(entry.path)
+                    continue
+                key = entry.name.rsplit(".", 1)[0]
+                written[key] = max(written.get(key, mtime), mtime)
+    except OSError:
+        return
+    for key, mtime in written.items():
+        if mtime < cutoff:
+            checkpoint = ParseCheckpoint(directory, key)
+            if checkpoint.acquire():
+                checkpoint.discard()
+                checkpoint.release()
+
+# =========================
+# Bank parsers
+# =========================
+# Every bank runs through the same loop, iter_movements(): page iteration,
+# the page cache, parallel extraction, crop regions, the word engine, batched
+# money conversion, the opening and closing balances and profiling. A bank
+# only describes its statements in a BankParser subclass: line classifiers,
+# money converter and the fields of each row. Amount signs and the balance
+# checks are the loop's.
+#
+# Banks shipped in other packages register under the "ocr_extract_pdf.banks"
+# entry point group (name = bank, value = its BankParser subclass) and are
+# only imported when first needed.
+BANK_ENTRY_POINT_GROUP = "ocr_extract_pdf.banks"
+
+LINE_SALDO_INICIAL = "saldo_inicial"
+LINE_MOVIMIENTO = "movimiento"
+LINE_TRANSFERENCIA = "transferencia"
+LINE_SIN_FECHA = "sin_fecha"
+LINE_SALDO_FINAL = "saldo_final"  # end-of-movements marker: no page after it is read
+_NO_MATCH = (None, None)
+
+# Matched rows are buffered and their amounts converted in one vectorized
+# batch at the end of every page, so movements still stream page by page; a
+# page with more rows than this is converted in batches of this size.
+MONEY_BATCH_ROWS = 4096
+
+# Allowed gap between saldo anterior + importe and the printed saldo. Amounts
+# are exact cents, so any difference is a real inconsistency.
+BALANCE_TOLERANCE_CENTS = 0
+
+def _check_saldo_final(saldo_final: int, last_saldo) -> None:
+    """The closing balance printed at the end-of-movements marker must be the last row's saldo."""
+    if last_saldo is not None and abs(saldo_final - last_saldo) > BALANCE_TOLERANCE_CENTS:
+        raise ValueError(
+            f"El saldo final del extracto ({format_cents(saldo_final)}) no coincide con "
+            f"el saldo del último movimiento ({format_cents(last_saldo)})"
+        )
+
+def _chain_break(rows: dict, saldos: np.ndarray, importes: np.ndarray, previous_saldo):
+    """(n_ok, error): the number of leading rows of a batch that keep the
+    balance chain and the ValueError for the first one that breaks it (None
+    if none does)."""
+    prev, has_prev = _previous_saldos(saldos, previous_saldo)
+    broken = np.flatnonzero(has_prev & (np.abs(prev + importes - saldos) > BALANCE_TOLERANCE_CENTS))
+    if not broken.size:
+        return len(saldos), None
+    i = int(broken[0])
+    return i, ValueError(
+        f"Error de consistencia en fila '{rows['referencia'][i]}' (fecha {rows['fecha'][i]}): "
+        f"saldo anterior {format_cents(prev[i])} + importe {format_cents(importes[i])} = "
+        f"{format_cents(prev[i] + importes[i])} "
+        f"pero el saldo registrado en el PDF es {format_cents(saldos[i])}"
+    )
+
+def _settle_rows(parser: "BankParser", previous_saldo):
+    """Convert a parser's buffered rows: (movements, last_saldo, error), the
+    movements to yield, the saldo the next batch chains from and the
+    ValueError to raise after yielding them, if any.
+
+    The text of a row doesn't tell a debit from a credit, so the sign of each
+    amount comes from the saldo's direction. A row with no saldo before it is
+    negative if marked debito, or 0 for a bank without that column, which
+    can't tell. A row without a printed amount takes the difference of saldos. The balance chain is then checked on every row.
+    """
+    rows = parser.rows
+    saldos = parser.to_cents_many(rows["saldo"])
+    prev, has_prev = _previous_saldos(saldos, previous_saldo)
+    missing = None
+    raw_importes = rows["importe"]
+    if None in raw_importes:
+        missing = np.array([raw is None for raw in raw_importes])
+        raw_importes = ["0" if raw is None else raw for raw in raw_importes]
+    importes = np.abs(parser.to_cents_many(raw_importes))
+    first = np.where(rows["debito"], -importes, importes) if "debito" in rows else 0
+    importes = np.where(has_prev, np.where(saldos > prev, importes, -importes), first)
+    if missing is not None:
+        importes = np.where(missing, np.where(has_prev, saldos - prev, 0), importes)
+    n_ok, error = _chain_break(rows, saldos, importes, previous_saldo)
+
+    importes, saldos = importes.tolist(), saldos.tolist()
+    movements = parser.movements(importes[:n_ok], saldos[:n_ok])
+    return movements, (saldos[-1] if saldos else previous_saldo), error
+
+class BankParser:
+    """How a bank prints its statements, for iter_movements().
+
+    Subclasses set the class attributes and implement add_row, plus new_rows
+    and movements to carry more columns or resolve dates. iter_movements
+    creates one instance per statement: it holds the rows matched since the
+    last batch and any state carried between lines.
+    """
+    name = ""              # registry key, also the batch CLI --bank value
+    choice = ""            # label of the bank in the web app
+    code = ""              # bank code in the download file names
+    fecha_style = None     # df.attrs["fecha_style"] of the Detalle
+    format_fechas = None   # datetime64 Series -> dates as printed, the FECHA_FORMATTERS entry
+    saldo_inicial_label = "Saldo Inicial"
+    table_headers = ()     # word engine: Fecha, the column after it, Débito, Crédito, Saldo
+    region = None          # RegionProfile of the movements table
+    fingerprints = ()      # (pattern, weight) pairs for detect_bank
+    classify_line = None   # (line, saldo_pending) -> (kind, match), see classify_santander_line
+    classify_words = None  # the same for a WordLine
+    to_cents = None        # printed amount -> integer cents
+    to_cents_many = None   # list of printed amounts -> int64 array of cents
+
+    def __init__(self):
+        self.rows = self.new_rows()
+
+    def new_rows(self) -> dict:
+        """Empty columns of a batch: fecha, referencia, importe (the printed
+        amount, None if there is none) and saldo, plus an optional "debito"
+        (bool, whether the amount sits in the Débito column) and any the bank
+        needs. len(rows["saldo"]) is its row count."""
+        return {"fecha": [], "referencia": [], "importe": [], "saldo": []}
+
+    def add_row(self, kind: str, m, line) -> Optional[Movement]:
+        """Buffer a movement, transfer detail or undated line. Returns a
+        movement to yield right away, if any."""
+        raise NotImplementedError
+
+    def unmatched(self, line) -> None:
+        """Called with each line no classifier matched (e.g. the statement period)."""
+
+    def movements(self, importes: list, saldos: list) -> list:
+        """Movements of the first len(saldos) buffered rows, whose amounts are
+        already signed cents that keep the balance chain."""
+        rows = self.rows
+        return [Movement(*row) for row in zip(rows["fecha"], rows["referencia"], importes, saldos)]
+
+    def save_state(self) -> dict:
+        """What the parser carries from one page to the next, JSON-ready, for
+        checkpoints. Only called right after a batch is settled, with no
+        buffered rows."""
+        return {}
+
+    def load_state(self, state: dict) -> None:
+        """Restore what save_state() returned."""
+
+BANK_PARSERS = {}
+_bank_entry_points = None
+
+def register_bank(cls):
+    """Class decorator adding a BankParser subclass to the registry."""
+    BANK_PARSERS[cls.name] = cls
+    if cls.fecha_style and cls.format_fechas is not None:
+        FECHA_FORMATTERS[cls.fecha_style] = cls.format_fechas
+    return cls
+
+def _entry_points() -> dict:
+    global _bank_entry_points
+    if _bank_entry_points is None:
+        from importlib.metadata import entry_points
+        _bank_entry_points = {ep.name: ep for ep in entry_points(group=BANK_ENTRY_POINT_GROUP)}
+    return _bank_entry_points
+
+def _load_bank(name: str) -> bool:
+    ep = _entry_points().get(name)
+    if ep is None:
+        return False
+    try:
+        register_bank(ep.load())
+    except Exception as e:
+        log.warning("No se pudo cargar el banco %s (%s): %s", name, ep.value, e)
+        return False
+    return True
+
+def get_bank_parser(name: str) -> type:
+    """The BankParser subclass registered as name, importing its entry point if needed."""
+    if name not in BANK_PARSERS and not _load_bank(name):
+        raise ValueError(f"Banco desconocido: {name}")
+    return BANK_PARSERS[name]
+
+def registered_banks() -> dict:
+    """Every bank, name -> BankParser subclass; loads all the entry points."""
+    for name in _entry_points():
+        if name not in BANK_PARSERS:
+            _load_bank(name)
+    return dict(BANK_PARSERS)
+
+def bank_for_choice(choice: str) -> type:
+    """The BankParser shown in the web app as choice."""
+    for parser in registered_banks().values():
+        if parser.choice == choice:
+            return parser
+    raise ValueError(f"Banco desconocido: {choice}")
+
+def iter_movements(file_like, bank, workers=None, cache=True, profile: Optional[ParseProfile] = None,
+                   engine: Optional[str] = None, checkpoint: bool = True):
+    """Yield a statement's movements page by page as they are parsed.
+
+    bank is a registered bank name or a BankParser subclass. Stops reading
+    pages at the line closing the movements. Raises ValueError as soon as a
+    row breaks the balance chain, or if that closing balance is not the last
+    row's saldo.
+
+    With checkpoint, the state is saved every CHECKPOINT_PAGES pages and a
+    parse of the same statement that didn't finish resumes from there: the
+    movements before it come from the checkpoint and its pages are not read.
+    While another parse of the statement holds the checkpoint, this one runs
+    without.
+    """
+    engine = _resolve_engine(engine)
+    parser = (get_bank_parser(bank) if isinstance(bank, str) else bank)()
+    layout = f"words:{parser.name}" if engine == "words" else _text_layout(parser.name)
+    store = None
+    if checkpoint and CHECKPOINT_PAGES > 0:
+        pdf_bytes = _read_pdf_bytes(file_like)
+        if not isinstance(file_like, OpenedPDF):
+            file_like = io.BytesIO(pdf_bytes)
+        store = get_checkpoint(pdf_bytes, parser.name, layout)
+        if store is not None and not store.acquire():
+            store = None
+    if store is None:
+        yield from _parse_movements(file_like, parser, workers, cache, profile, engine, None)
+        return
+    try:
+        saved = store.load()
+        if saved is None:
+            movements = _parse_movements(file_like, parser, workers, cache, profile, engine, store)
+        else:
+            state, done = saved
+            parser.load_state(state["parser"])
+            if profile is not None:
+                profile.resumed_pages = state["page"]
+            yield from done
+            movements = _parse_movements(file_like, parser, workers, cache, profile, engine, store,
+                                         state["page"], state["previous_saldo"], state["saldo_pending"])
+        for movement in movements:
+            store.pending.append(movement)
+            yield movement
+        store.discard()
+    finally:
+        store.release()
+
+def _parse_movements(file_like, parser: BankParser, workers, cache, profile: Optional[ParseProfile], engine: str,
+                     store: Optional[ParseCheckpoint], start: int = 0, previous_saldo=None, saldo_pending=True):
+    """The page loop of iter_movements(), from page `start` on."""
+
+    def settle():
+        nonlocal previous_saldo
+        if not parser.rows["saldo"]:
+            return
+        with _stage(profile, "convert"):
+            movements, previous_saldo, error = _settle_rows(parser, previous_saldo)
+        parser.rows = parser.new_rows()
+        yield from movements
+        if error is not None:
+            raise error
+
+    if engine == "words":
+        pages = iter_page_words(file_like, parser.name, workers, cache, profile, start)
+        classify = parser.classify_words
+    else:
+        pages = iter_page_texts(file_like, workers, cache, _text_layout(parser.name), profile, start)
+        classify = parser.classify_line
+    add_row, unmatched = parser.add_row, parser.unmatched
+    saldo_final = None
+    page_no = start
+    for page in (profile.timed_pages(pages) if profile is not None else pages):
+        page_no += 1
+        page_started = time.perf_counter()
+        lines = page if engine == "words" else [l.strip() for l in page.splitlines()]
+        matches = 0
+        for line in lines:
+            kind, m = classify(line, saldo_pending)
+            if kind is None:
+                unmatched(line)
+                continue
+            matches += 1
+
+            if kind == LINE_SALDO_INICIAL:
+                yield from settle()
+                saldo_inicial = parser.to_cents(m.group(1))
+                yield Movement("", parser.saldo_inicial_label, None, saldo_inicial)
+                previous_saldo = saldo_inicial
+                saldo_pending = False
+                continue
+
+            if kind == LINE_SALDO_FINAL:
+                saldo_final = parser.to_cents(m.group(1))
+                break
+
+            movement = add_row(kind, m, line)
+            if movement is not None:
+                yield movement
+            if len(parser.rows["saldo"]) >= MONEY_BATCH_ROWS:
+                yield from settle()
+
+        if profile is not None:
+            profile.end_page(time.perf_counter() - page_started, len(lines), matches)
+        if saldo_final is not None:
+            _stop_pages(pages)
+            break
+        yield from settle()
+        if store is not None and page_no % CHECKPOINT_PAGES == 0:
+            store.save({
+                "page": page_no, "previous_saldo": previous_saldo, "saldo_pending": saldo_pending,
+                "parser": parser.save_state(),
+            })
+
+    yield from settle()
+    if saldo_final is not None:
+        _check_saldo_final(saldo_final, previous_saldo)
+
+def parse_statement(file_like, bank, workers=None, cache=True, profile: Optional[ParseProfile] = None,
+                    engine: Optional[str] = None, checkpoint: bool = True) -> pd.DataFrame:
+    """iter_movements() collected into the Detalle DataFrame."""
+    parser = get_bank_parser(bank) if isinstance(bank, str) else bank
+    movements = iter_movements(file_like, parser, workers, cache, profile, engine, checkpoint)
+    return movements_to_frame(movements, parser.fecha_style, profile)
+
+# =========================
+# Santander parser
+# =========================
+saldo_inicial_stdr_re = re.compile(r"Saldo\s+Inicial\s+([-–—−]?\s*\$\s*[\d\.\,]+)")
+# Closing line of the pesos movements ("Saldo total -$ 202.351,53"); the
+# first-page "Saldo total en cuentas al ..." and "Saldo total U$S" don't match.
+saldo_total_stdr_re = re.compile(r"^Saldo\s+total\s+([-–—−]?\s*\$\s*[\d\.\,]+)$")
+
+linea_movimiento_stdr = re.compile(
+    r"""^
+    (?P<fecha>\d{2}/\d{2}/\d{2})?     # Fecha opcional
+    \s*
+    (?:\d+\s+)?                       # Comprobante opcional
+    (?P<movimiento>.*?)               # Movimiento (texto)
+    \s+
+    (?:
+        (?P<debito>[-–—−]?\s*\$\s*[\d\.\,]+)   # Débito
+        \s+
+        (?P<saldo>[-–—−]?\s*\$\s*[\d\.\,]+)    # Saldo si no hay crédito
+      |
+        (?P<credito>[-–—−]?\s*\$\s*[\d\.\,]+)  # Crédito
+        \s+
+        (?P<saldo2>[-–—−]?\s*\$\s*[\d\.\,]+)   # Saldo si no hay débito
+    )
+    $""",
+    re.VERBOSE
+)
+
+linea_transferencia_stdr = re.compile(
+    r'^(?:De|A)(?:\s+[A-Za-zÁÉÍÓÚÑáéíóúñ\s,.]+)?\s*/\s*.*?\s*-\s*.*?\s*/.*$',
+    re.IGNORECASE
+)
+
+@lru_cache(maxsize=4096)
+def _parse_fecha_stdr(fecha: Optional[str]) -> Optional[date]:
+    """dd/mm/yy as printed by Santander, or None."""
+    try:
+        return datetime.strptime(fecha, "%d/%m/%y").date()
+    except (TypeError, ValueError):
+        return None
+
+def classify_santander_line(line: str, saldo_pending: bool):
+    """Dispatch a stripped line to the one pattern that can match it.
+
+    Each regex is guarded by a cheap necessary condition (marker text,
+    `$` count, trailing amount, leading De/A) so most lines never reach the
+    backtracking movement pattern. Returns (kind, match) or (None, None), with
+    the same precedence as trying the three patterns in sequence.
+    """
+    if saldo_pending and "Inicial" in line:
+        m = saldo_inicial_stdr_re.search(line)
+        if m:
+            return LINE_SALDO_INICIAL, m
+    if line.startswith("Saldo total"):
+        m = saldo_total_stdr_re.match(line)
+        if m:
+            return LINE_SALDO_FINAL, m
+    if line.count("$") >= 2 and (line[-1].isdigit() or line[-1] in ".,"):
+        m = linea_movimiento_stdr.match(line)
+        if m:
+            return LINE_MOVIMIENTO, m
+    if line and line[0] in "DdAa" and line.count("/") >= 2 and "-" in line:
+        m = linea_transferencia_stdr.match(line)
+        if m:
+            return LINE_TRANSFERENCIA, m
+    return _NO_MATCH
+
+def classify_santander_words(line: WordLine, saldo_pending: bool):
+    """classify_santander_line for the word engine: a movement is a table
+    line with a Saldo cell and a Débito or Crédito cell, no regex needed.
+
+    The amount goes in the debito group whatever its column, as in the text
+    path, where the balance chain decides the sign.
+    """
+    if saldo_pending and "Inicial" in line:
+        m = saldo_inicial_stdr_re.search(line)
+        if m:
+            return LINE_SALDO_INICIAL, m
+    if line.startswith("Saldo total"):
+        m = saldo_total_stdr_re.match(line)
+        if m:
+            return LINE_SALDO_FINAL, m
+    if line.saldo and (line.debito or line.credito):
+        words = line.words
+        if words and words[0].isdigit():  # comprobante
+            words = words[1:]
+        return LINE_MOVIMIENTO, _Cells(
+            fecha=line.fecha or None, movimiento=" ".join(words),
+            debito=line.debito or line.credito, saldo=line.saldo,
+        )
+    if line and line[0] in "DdAa" and line.count("/") >= 2 and "-" in line:
+        m = linea_transferencia_stdr.match(line)
+        if m:
+            return LINE_TRANSFERENCIA, m
+    return _NO_MATCH
+
+@register_bank
+class SantanderParser(BankParser):
+    name, choice, code = "santander", "Santander OCR Extract", "STDR"
+    fecha_style = "stdr"
+    format_fechas = staticmethod(lambda fechas: fechas.dt.strftime("%d/%m/%y"))
+    table_headers = ("Fecha", "Comprobante", "Débito", "Crédito", "Saldo")
+    region = RegionProfile(anchors=("Fecha Comprobante Movimiento",), header="Comprobante", footer="Salvo error")
+    fingerprints = (
+        (saldo_inicial_stdr_re, 4),
+        (re.compile(r"Fecha\s+Comprobante\s+Movimiento"), 3),
+        (re.compile(r"(?m)^\d{2}/\d{2}/\d{2}\b"), 2),
+        (re.compile(r"[-–—−]?\s*\$\s*\d{1,3}(?:\.\d{3})*,\d{2}\b"), 1),
+        (re.compile(r"Desde:\s*\d{2}/\d{2}/\d{2}\b"), 2),
+        (re.compile(r"Resumen\s+de\s+cuenta"), 1),
+        (re.compile(r"Santander"), 2),
+    )
+    classify_line = staticmethod(classify_santander_line)
+    classify_words = staticmethod(classify_santander_words)
+    to_cents = staticmethod(_to_cents_money_arg)
+    to_cents_many = staticmethod(_to_cents_money_arg_many)
+
+    def __init__(self):
+        super().__init__()
+        self.fecha_anterior = None
+        self.held = None  # transfer of a settled batch still waiting for its detail line
+
+    def new_rows(self) -> dict:
+        # emit: True = yield, False = drop, None = transfer awaiting its detail line
+        return {"fecha": [], "referencia": [], "importe": [], "debito": [], "saldo": [], "emit": []}
+
+    def add_row(self, kind, m, line):
+        rows = self.rows
+        if kind == LINE_MOVIMIENTO:
+            fecha = m.group("fecha")
+            if fecha:
+                self.fecha_anterior = fecha
+
+            # A pending transfer whose detail line never came is dropped.
+            self.held = None
+            if rows["emit"] and rows["emit"][-1] is None:
+                rows["emit"][-1] = False
+
+            referencia = (m.group("movimiento") or "").strip()
+            rows["fecha"].append(self.fecha_anterior)
+            rows["referencia"].append(referencia)
+            rows["importe"].append(m.group("debito") or m.group("credito"))
+            rows["debito"].append(bool(m.group("debito")))
+            rows["saldo"].append(m.group("saldo") or m.group("saldo2"))
+            is_transfer = referencia.lower() in ("transferencia recibida", "transferencia realizada")
+            rows["emit"].append(None if is_transfer else True)
+        elif kind == LINE_TRANSFERENCIA:
+            detalle = str(line)
+            if rows["emit"] and rows["emit"][-1] is None:
+                rows["referencia"][-1] += " - " + detalle
+                rows["emit"][-1] = True
+            elif self.held is not None:
+                held, self.held = self.held, None
+                return held._replace(referencia=held.referencia + " - " + detalle)
+        return None
+
+    def movements(self, importes, saldos):
+        """A trailing transfer still waiting for its detail line is held for
+        the next batch."""
+        rows = self.rows
+        movements, self.held = [], None
+        for i in range(len(saldos)):
+            fecha = rows["fecha"][i]
+            movement = Movement(fecha, rows["referencia"][i], importes[i], saldos[i], _parse_fecha_stdr(fecha))
+            if rows["emit"][i] is None:
+                self.held = movement
+            elif rows["emit"][i]:
+                movements.append(movement)
+        return movements
+
+    def save_state(self) -> dict:
+        return {"fecha_anterior": self.fecha_anterior, "held": _movement_to_json(self.held)}
+
+    def load_state(self, state: dict) -> None:
+        self.fecha_anterior, self.held = state["fecha_anterior"], _movement_from_json(state["held"])
+
+def iter_santander_movements(file_like, workers=None, cache=True, profile: Optional[ParseProfile] = None,
+                             engine: Optional[str] = None):
+    """iter_movements() for Santander: stops at the "Saldo total" line."""
+    return iter_movements(file_like, SantanderParser, workers, cache, profile, engine)
+
+def parse_santander_pdf(file_like, workers=None, cache=True, profile: Optional[ParseProfile] = None,
+                        engine: Optional[str] = None) -> pd.DataFrame:
+    return parse_statement(file_like, SantanderParser, workers, cache, profile, engine)
+
+# =========================
+# HSBC parser
+# =========================
+saldo_anterior_hsbc_re = re.compile(
+    r"(?i)SALDO\s+ANTERIOR.*?((?:\d{1,3}(?:,\d{3})*|\d*)\.\d{2})$"
+)
+saldo_final_hsbc_re = re.compile(
+    r"^-?\s*SALDO\s+FINAL\s+((?:\d{1,3}(?:,\d{3})*|\d*)\.\d{2})$"
+)
+linea_con_fecha_hsbc = re.compile(
+    r"""^(?P<fecha>\d{2}-[A-Z]{3})\s+-\s+
+        (?P<referencia>.+?)\s+
+        \d{5}\s+
+        (?P<debito>(?:\d{1,3}(?:,\d{3})*|\d*)?\.\d{2})?\s*
+        (?P<credito>(?:\d{1,3}(?:,\d{3})*|\d*)?\.\d{2})?\s+
+        (?P<saldo>(?:\d{1,3}(?:,\d{3})*|\d*)?\.\d{2})
+    """, re.VERBOSE
+)
+linea_sin_fecha_hsbc = re.compile(
+    r"""^\s*-\s+
+        (?P<referencia>.+?)\s+
+        \d{5}\s+
+        (?P<debito>(?:\d{1,3}(?:,\d{3})*|\d*)?\.\d{2})?\s*
+        (?P<credito>(?:\d{1,3}(?:,\d{3})*|\d*)?\.\d{2})?\s+
+        (?P<saldo>(?:\d{1,3}(?:,\d{3})*|\d*)?\.\d{2})
+    """, re.VERBOSE
+)
+
+def classify_hsbc_line(line: str, saldo_pending: bool):
+    """Single-pass dispatch for a stripped HSBC line; see classify_santander_line.
+
+    Dated rows start with `dd-`, undated rows with `-`, so the leading
+    characters alone decide which movement pattern is worth trying.
+    """
+    if saldo_pending and "ANTERIOR" in line.upper():
+        m = saldo_anterior_hsbc_re.search(line)
+        if m:
+            return LINE_SALDO_INICIAL, m
+    if "." not in line:
+        return _NO_MATCH
+    if "SALDO FINAL" in line:
+        m = saldo_final_hsbc_re.match(line)
+        if m:
+            return LINE_SALDO_FINAL, m
+    if line[:1] == "-":
+        m = linea_sin_fecha_hsbc.match(line)
+        if m:
+            return LINE_SIN_FECHA, m
+    elif line[2:3] == "-" and line[:2].isdigit():
+        m = linea_con_fecha_hsbc.match(line)
+        if m:
+            return LINE_MOVIMIENTO, m
+    return _NO_MATCH
+
+def classify_hsbc_words(line: WordLine, saldo_pending: bool):
+    """classify_hsbc_line for the word engine: `[fecha] - referencia NNNNN`
+    left of the amounts, with a Saldo cell."""
+    if saldo_pending and "ANTERIOR" in line.upper():
+        m = saldo_anterior_hsbc_re.search(line)
+        if m:
+            return LINE_SALDO_INICIAL, m
+    if "SALDO FINAL" in line:
+        m = saldo_final_hsbc_re.match(line)
+        if m:
+            return LINE_SALDO_FINAL, m
+    words = line.words
+    if not line.saldo or len(words) < 3 or words[0] != "-" or not (len(words[-1]) == 5 and words[-1].isdigit()):
+        return _NO_MATCH
+    cells = _Cells(fecha=line.fecha or None, referencia=" ".join(words[1:-1]),
+                   debito=line.debito or None, credito=line.credito or None, saldo=line.saldo)
+    return (LINE_MOVIMIENTO if line.fecha else LINE_SIN_FECHA), cells
+
+periodo_hsbc_re = re.compile(r"EXTRACTO\s+DEL\s+(\d{2}/\d{2}/\d{4})\s+AL\s+(\d{2}/\d{2}/\d{4})")
+
+@lru_cache(maxsize=4096)
+def _parse_fecha_hsbc(fecha: Optional[str], periodo: Optional[tuple]) -> Optional[date]:
+    """dd-MON as printed by HSBC, with the year taken from the statement period.
+
+    periodo is (desde, hasta); months before the start month belong to the
+    end year when the period crosses New Year. None if either is missing.
+    """
+    if not fecha or periodo is None:
+        return None
+    try:
+        day, month = int(fecha[:2]), _MESES_HSBC.index(fecha[3:6]) + 1
+    except ValueError:
+        return None
+    desde, hasta = periodo
+    year = desde.year if month >= desde.month else hasta.year
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+@register_bank
+class HSBCParser(BankParser):
+    name, choice, code = "hsbc", "HSBC OCR Extract", "HSBC"
+    fecha_style = "hsbc"
+    format_fechas = staticmethod(lambda fechas: (
+        fechas.dt.strftime("%d-") + fechas.dt.month.map(lambda m: _MESES_HSBC[int(m) - 1], na_action="ignore")
+    ))
+    saldo_inicial_label = "SALDO ANTERIOR"
+    table_headers = ("FECHA", "REFERENCIA", "DEBITO", "CREDITO", "SALDO")
+    # The period line above the table dates the movements.
+    region = RegionProfile(anchors=("EXTRACTO DEL", "FECHA REFERENCIA"), header="REFERENCIA", footer="")
+    fingerprints = (
+        (re.compile(r"(?im)SALDO\s+ANTERIOR"), 4),
+        (re.compile(r"FECHA\s+REFERENCIA\s+NRO\s+DEBITO"), 3),
+        (re.compile(r"(?m)^\d{2}-[A-Z]{3}\s+-"), 2),
+        (re.compile(r"\b\d{1,3}(?:,\d{3})+\.\d{2}\b"), 1),
+        (re.compile(r"HSBC"), 2),
+        (re.compile(r"HOJA\s+\d+\s+DE\s+\d+"), 1),
+        (re.compile(r"EXTRACTO\s+DEL\s+\d{2}/\d{2}/\d{4}"), 2),
+    )
+    classify_line = staticmethod(classify_hsbc_line)
+    classify_words = staticmethod(classify_hsbc_words)
+    to_cents = staticmethod(_to_cents_money_us)
+    to_cents_many = staticmethod(_to_cents_money_us_many)
+
+    def __init__(self):
+        super().__init__()
+        self.fecha_actual = None
+        self.periodo = None
+
+    def add_row(self, kind, m, line):
+        if kind == LINE_MOVIMIENTO:
+            self.fecha_actual = m.group("fecha")
+        elif not self.fecha_actual:
+            return None
+        rows = self.rows
+        rows["fecha"].append(self.fecha_actual)
+        rows["referencia"].append((m.group("referencia") or "").strip())
+        rows["importe"].append(m.group("debito") or m.group("credito") or None)
+        rows["saldo"].append(m.group("saldo"))
+        return None
+
+    def unmatched(self, line) -> None:
+        if self.periodo is None and "EXTRACTO" in line:
+            m_periodo = periodo_hsbc_re.search(line)
+            if m_periodo:
+                self.periodo = tuple(datetime.strptime(d, "%d/%m/%Y").date() for d in m_periodo.groups())
+
+    def movements(self, importes, saldos):
+        rows, periodo = self.rows, self.periodo
+        return [
+            Movement(fecha, referencia, importe, saldo, _parse_fecha_hsbc(fecha, periodo))
+            for fecha, referencia, importe, saldo in zip(rows["fecha"], rows["referencia"], importes, saldos)
+        ]
+
+    def save_state(self) -> dict:
+        periodo = [d.isoformat() for d in self.periodo] if self.periodo else None
+        return {"fecha_actual": self.fecha_actual, "periodo": periodo}
+
+    def load_state(self, state: dict) -> None:
+        self.fecha_actual = state["fecha_actual"]
+        self.periodo = tuple(date.fromisoformat(d) for d in state["periodo"]) if state["periodo"] else None
+
+def iter_hsbc_movements(file_like, workers=None, cache=True, profile: Optional[ParseProfile] = None,
+                        engine: Optional[str] = None):
+    """iter_movements() for HSBC: stops at the "SALDO FINAL" line."""
+    return iter_movements(file_like, HSBCParser, workers, cache, profile, engine)
+
+def parse_hsbc_pdf(file_like, workers=None, cache=True, profile: Optional[ParseProfile] = None,
+                   engine: Optional[str] = None) -> pd.DataFrame:
+    return parse_statement(file_like, HSBCParser, workers, cache, profile, engine)
+
+# =========================
+# Bank detection
+# =========================
+# Each bank's fingerprints are (pattern, weight) pairs looked for in the first
+# page text. Each one counts once, so long pages of boilerplate can't outvote
+# the real markers.
+# Below this confidence the result is "unknown".
+DETECTION_MIN_CONFIDENCE = 0.6
+# Share of a bank's total fingerprint weight that counts as full evidence; a
+# page matching less (say, only a money amount) gets a proportionally lower
+# confidence, however alone the bank is.
+DETECTION_FULL_EVIDENCE = 0.3
+
+class BankDetection(NamedTuple):
+    choice: Optional[str]
+    confidence: float
+    scores: dict
+
+def detect_bank(first_page_text: str) -> BankDetection:
+    """Guess the bank of a statement from its first page text.
+
+    confidence is the winner's share of the total fingerprint score, scaled
+    down when the winner matched less than DETECTION_FULL_EVIDENCE of its own
+    fingerprints' weight; choice is None when nothing matched or the
+    confidence is below DETECTION_MIN_CONFIDENCE.
+    """
+    banks = registered_banks()
+    scores = {
+        bank: sum(weight for pattern, weight in parser.fingerprints if pattern.search(first_page_text))
+        for bank, parser in banks.items()
+    }
+    total = sum(scores.values())
+    if not total:
+        return BankDetection(None, 0.0, scores)
+    bank = max(scores, key=scores.get)
+    full = DETECTION_FULL_EVIDENCE * sum(weight for _, weight in banks[bank].fingerprints)
+    confidence = scores[bank] / total * min(1.0, scores[bank] / full)
+    choice = BANK_PARSERS[bank].choice if confidence >= DETECTION_MIN_CONFIDENCE else None
+    return BankDetection(choice, round(confidence, 4), scores)
+
+def read_first_page_text(pdf) -> str:
+    """First page text of PDF bytes or an OpenedPDF; other pages are not
+    touched. The text is kept in the page cache as a one-page entry of the
+    whole-page layout, so detecting the same upload again doesn't open it."""
+    pdf_bytes = _read_pdf_bytes(pdf) if isinstance(pdf, OpenedPDF) else pdf
+    page_cache = get_page_cache()
+    key = None
+    if page_cache is not None:
+        key = page_cache.key(pdf_bytes)
+        entry = page_cache.get_entry(key)
+        if entry is not None and entry[0]:
+            return entry[0][0]
+    document = pdf if isinstance(pdf, OpenedPDF) else OpenedPDF(pdf_bytes)
+    try:
+        text = document.first_page_text()
+        if key is not None and document.n_pages:
+            page_cache.put(key, [text], document.n_pages)
+    finally:
+        if document is not pdf:
+            document.close()
+    return text
+
+# =========================
+# Summary Builder
+# =========================
+def build_summary(df_movs: pd.DataFrame) -> pd.DataFrame:
+    if df_movs.empty:
+        return pd.DataFrame(columns=["Referencia", "Sum_Importe", "Cantidad", "Pct_Importe", "Pct_Cantidad"])
+
+    df_work = df_movs.loc[df_movs["Referencia"] != "Saldo Inicial", ["Referencia"]].copy()
+    df_work["Importe_cents"] = _series_to_cents(df_movs.loc[df_movs["Referencia"] != "Saldo Inicial", "Importe"])
+
+    summary = df_work.groupby("Referencia", dropna=False, observed=True).agg(
+        Sum_cents=("Importe_cents", "sum"),
+        Cantidad=("Referencia", "count")
+    ).reset_index()
+
+    # Sums are exact in cents; convert to display units only for the output.
+    sum_cents = summary.pop("Sum_cents")
+    summary.insert(1, "Sum_Importe", sum_cents / 100)
+    total_abs = int(sum_cents.abs().sum())
+    summary["Pct_Importe"] = (sum_cents.abs() / total_abs * 100).round(4) if total_abs else 0.0
+    summary["Pct_Cantidad"] = (summary["Cantidad"] / summary["Cantidad"].sum() * 100).round(4)
+
+    total_row = {
+        "Referencia": "TOTAL",
+        "Sum_Importe": int(sum_cents.sum()) / 100,
+        "Cantidad": summary["Cantidad"].sum(),
+        "Pct_Importe": summary["Pct_Importe"].sum(),
+        "Pct_Cantidad": summary["Pct_Cantidad"].sum(),
+    }
+    return pd.concat([summary, pd.DataFrame([total_row])], ignore_index=True)
+
+# Rows formatted per to_csv() chunk; with pandas' default (~25k rows for the
+# Detalle) the formatted chunk outweighs the encoded CSV itself.
+CSV_CHUNK_ROWS = 5000
+
+def export_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """df with its Fecha column formatted the way the bank prints it, as exported."""
+    style = df.attrs.get("fecha_style")
+    if style in FECHA_FORMATTERS and "Fecha" in df and pd.api.types.is_datetime64_any_dtype(df["Fecha"]):
+        df = df.assign(Fecha=FECHA_FORMATTERS[style](df["Fecha"]))
+    return df
+
+def to_csv_bytes(df: pd.DataFrame) -> bytes:
+    """CSV encoded chunk by chunk straight into one bytes buffer (no str copy)."""
+    df = export_frame(df)
+    buf = io.BytesIO()
+    df.to_csv(buf, index=False, encoding="utf-8", chunksize=CSV_CHUNK_ROWS)
+    return buf.getvalue()
+
+def write_movements_csv(movements: Iterable[Movement], dest) -> int:
+    """Write a movement stream as Detalle CSV row by row; returns the row count.
+
+    dest is a path or a text stream. The output matches to_csv_bytes() of the
+    equivalent DataFrame, without ever holding all rows in memory.
+    """
+    if isinstance(dest, (str, os.PathLike)):
+        with open(dest, "w", encoding="utf-8", newline="") as fh:
+            return write_movements_csv(movements, fh)
+    writer = csv.writer(dest, lineterminator="\n")
+    writer.writerow(MOVEMENT_COLUMNS)
+    count = 0
+    for m in movements:
+        writer.writerow(_movement_row(m))
+        count += 1
+    return count
+
+# =========================
+# Statement merge
+# =========================
+# Column added in front of a merged Detalle with the PDF each row came from.
+SOURCE_COLUMN = "Archivo"
+LINK_CONTINUOUS = "continuo"
+LINK_OVERLAP = "superpuesto"
+LINK_GAP = "faltan movimientos"
+
+class StatementMerge(NamedTuple):
+    df_movs: pd.DataFrame  # one Detalle, statements in period order, repeated rows dropped
+    links: pd.DataFrame    # one row per pair of consecutive statements
+    duplicates: int
+
+def _statement_period(df: pd.DataFrame):
+    """(first, last) movement date of a parsed statement, NaT if it has none."""
+    fechas = df["Fecha"] if pd.api.types.is_datetime64_any_dtype(df["Fecha"]) else pd.Series([], dtype="datetime64[ns]")
+    return fechas.min(), fechas.max()
+
+def merge_statements(named_frames) -> StatementMerge:
+    """Merge several parsed statements of one account into a single history.
+
+    Statements are sorted by period (undated ones last). Rows a later
+    statement repeats from an earlier one (same Fecha, Referencia, Importe
+    and Saldo) are dropped, as are the opening-balance rows after the first
+    statement. Every link must carry the balance over: the saldo before the
+    first new row of a statement has to equal the closing saldo of the
+    previous one, otherwise movements are missing in between. The checks
+    run over whole columns at once, so long histories stay cheap.
+    """
+    named_frames = [(name, df) for name, df in named_frames if not df.empty]
+    link_columns = ["Archivo anterior", "Archivo", "Hasta", "Desde", "Saldo final anterior",
+                    "Saldo inicial", "Diferencia", "Duplicados", "Estado"]
+    if not named_frames:
+        return StatementMerge(pd.DataFrame(columns=[SOURCE_COLUMN, *MOVEMENT_COLUMNS]),
+                              pd.DataFrame(columns=link_columns), 0)
+
+    periods = [_statement_period(df) for _, df in named_frames]
+
+    def period_key(i):
+        first, last = periods[i]
+        return (pd.isna(first), first if pd.notna(first) else pd.Timestamp.min,
+                last if pd.notna(last) else pd.Timestamp.min, i)
+
+    order = sorted(range(len(named_frames)), key=period_key)
+    names = [named_frames[i][0] for i in order]
+    frames = [named_frames[i][1] for i in order]
+    firsts = np.array([periods[i][0] for i in order], dtype="datetime64[ns]")
+    lasts = np.array([periods[i][1] for i in order], dtype="datetime64[ns]")
+    sizes = np.array([len(df) for df in frames])
+    merged = pd.concat(frames, ignore_index=True)
+    file_no = np.repeat(np.arange(len(frames)), sizes)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    ends = starts + sizes - 1
+
+    saldos = _series_to_cents(merged["Saldo"])
+    importes = _series_to_cents(merged["Importe"])
+    opening = np.zeros(len(merged), dtype=bool)
+    opening[starts] = merged["Importe"].isna().to_numpy()[starts]
+
+    # A row is repeated if the same (Fecha, Referencia, Importe, Saldo) first
+    # appears in an earlier statement.
+    row_keys = pd.util.hash_pandas_object(
+        pd.DataFrame({"f": merged["Fecha"], "r": merged["Referencia"].astype(str), "i": importes, "s": saldos}),
+        index=False,
+    ).to_numpy()
+    first_file = pd.Series(file_no).groupby(row_keys).transform("min").to_numpy()
+    repeated = ~opening & (first_file < file_no)
+    keep = ~repeated & ~(opening & (file_no > 0))
+
+    # Saldo before the first new row of each statement (its last saldo if all rows repeat).
+    new_rows = np.flatnonzero(keep & ~opening)
+    files_with_new, first_new = np.unique(file_no[new_rows], return_index=True)
+    entry = saldos[ends].copy()
+    entry[files_with_new] = (saldos - importes)[new_rows[first_new]]
+    closing = saldos[ends]
+    diff = entry[1:] - closing[:-1]
+    dup_counts = np.bincount(file_no[repeated], minlength=len(frames))[1:]
+    overlap = (dup_counts > 0) | (firsts[1:] < lasts[:-1])  # NaT never compares as earlier
+    estado = np.where(diff != 0, LINK_GAP, np.where(overlap, LINK_OVERLAP, LINK_CONTINUOUS))
+
+    links = pd.DataFrame({
+        "Archivo anterior": names[:-1],
+        "Archivo": names[1:],
+        "Hasta": lasts[:-1],
+        "Desde": firsts[1:],
+        "Saldo final anterior": closing[:-1] / 100,
+        "Saldo inicial": entry[1:] / 100,
+        "Diferencia": diff / 100,
+        "Duplicados": dup_counts,
+        "Estado": estado,
+    }, columns=link_columns)
+
+    df_movs = merged.loc[keep].reset_index(drop=True)
+    df_movs.insert(0, SOURCE_COLUMN, np.asarray(names, dtype=object)[file_no[keep]])
+    styles = {df.attrs.get("fecha_style") for df in frames}
+    if len(styles) == 1:
+        df_movs.attrs["fecha_style"] = styles.pop()
+    return StatementMerge(df_movs, links, int(repeated.sum()))
+
+# =========================
+# Parse pool
+# =========================
+# Long-lived worker processes owned by the web app: parses run off the
+# Streamlit script threads, so concurrent sessions don't queue behind each
+# other's GIL and CPU-bound parses spread across cores.
+PARSE_POOL_WORKERS = int(os.environ.get("OCR_EXTRACT_POOL_WORKERS", "0") or 0)  # 0 = one per CPU
+# Jobs queued or running at once; submit() waits for room beyond that.
+PARSE_POOL_MAX_PENDING = int(os.environ.get("OCR_EXTRACT_POOL_QUEUE", "16") or 16)
+# Seconds submit() waits for room in a full pool before raising ParsePoolFull.
+PARSE_POOL_QUEUE_WAIT = 30.0
+# Time limit of one statement, in seconds (0 = none).
+PARSE_JOB_TIMEOUT = float(os.environ.get("OCR_EXTRACT_JOB_TIMEOUT", "300") or 0)
+# How often parse_uploads() relays page progress to the calling thread.
+PROGRESS_POLL_SECONDS = 0.2
+
+class ParsePoolFull(RuntimeError):
+    """The parse pool had no room for another job within PARSE_POOL_QUEUE_WAIT."""
+
+class _JobTimeout(BaseException):
+    """Raised by a pool job's SIGALRM handler. Like KeyboardInterrupt it is no
+    Exception (TimeoutError is an OSError), so the page cache, checkpoint and
+    extraction fallbacks and pdfplumber's error wrapping can't swallow it."""
+
+_job_events = None  # in pool workers: the queue page progress is reported on
+
+def _init_parse_worker(events) -> None:
+    global _job_events
+    _job_events = events
+    warm_up()
+
+class _JobProfile(ParseProfile):
+    """ParseProfile that reports every parsed page of a pool job."""
+
+    def __init__(self, job: int):
+        super().__init__()
+        self.job = job
+
+    def end_page(self, parse_seconds: float, lines: int, matches: int):
+        super().end_page(parse_seconds, lines, matches)
+        if _job_events is not None:
+            _job_events.put((self.job, self.resumed_pages + len(self.pages), self.total_pages))
+
+def _parse_upload(bank: str, pdf_bytes: bytes, profile: Optional[ParseProfile] = None):
+    """(df_movs, profile) for one upload, or the exception it raised."""
+    profile = profile if profile is not None else ParseProfile()
+    try:
+        df_movs = parse_statement(io.BytesIO(pdf_bytes), bank, workers=1, profile=profile)
+    except Exception as e:
+        return e
+    return df_movs, profile
+
+def _parse_job(job: int, bank: str, pdf_bytes: bytes, timeout: float):
+    """Pool entry point: _parse_upload with page progress and a time limit.
+
+    The limit is a SIGALRM in the worker, so a runaway parse frees its
+    worker; where there is no SIGALRM the job runs to completion. A job over
+    the limit returns a TimeoutError.
+    """
+    def timed_out(signum, frame):
+        raise _JobTimeout()
+
+    alarm = timeout > 0 and hasattr(signal, "setitimer")
+    if alarm:
+        signal.signal(signal.SIGALRM, timed_out)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        outcome = _parse_upload(bank, pdf_bytes, _JobProfile(job))
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)  # an alarm past here would escape the except
+        return outcome
+    except _JobTimeout:
+        return TimeoutError(f"El PDF superó el límite de {timeout:g}s de procesamiento.")
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        if _job_events is not None:
+            _job_events.put((job, None, None))  # no more progress for this job
+
+class ParsePool:
+    """Long-lived pool of pre-warmed worker processes that parse statements.
+
+    Workers are started up front with numpy, pandas and pdfplumber already
+    imported. submit() returns a Future of (df_movs, profile), or of the
+    exception the parse raised. At most max_pending jobs are queued or
+    running. Each job is limited to timeout seconds. progress(pages_done,
+    total_pages) is called from the pool's listener thread after every page.
+    Workers that died are replaced on the next submit.
+    """
+
+    def __init__(self, workers: int = 0, max_pending: int = PARSE_POOL_MAX_PENDING,
+                 timeout: float = PARSE_JOB_TIMEOUT):
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._jobs = itertools.count()
+        self._progress = {}
+        self._lock = threading.Lock()
+        self._context = _mp_context()
+        self._events = self._context.SimpleQueue()
+        self._listener = threading.Thread(target=self._listen, name="parse-pool-progress", daemon=True)
+        self._listener.start()
+        self._start()
+
+    def _start(self) -> None:
+        self._executor = _process_pool(self.workers, self._context, initializer=_init_parse_worker,
+                                       initargs=(self._events,))
+        for _ in range(self.workers):  # start and warm up every worker now
+            self._executor.submit(int)
+
+    def _listen(self) -> None:
+        while True:
+            event = self._events.get()
+            if event is None:
+                return
+            job, done, total = event
+            if done is None:
+                self._progress.pop(job, None)
+                continue
+            callback = self._progress.get(job)
+            if callback is not None:
+                try:
+                    callback(done, total)
+                except Exception:
+                    log.exception("Error en el callback de progreso del trabajo %s", job)
+
+    def submit(self, bank: str, pdf_bytes: bytes, progress=None):
+        """Queue a statement; raises ParsePoolFull if the pool stays full for PARSE_POOL_QUEUE_WAIT."""
+        if not self._slots.acquire(timeout=PARSE_POOL_QUEUE_WAIT):
+            raise ParsePoolFull("Hay demasiados PDFs en proceso; probá de nuevo en unos minutos.")
+        job = next(self._jobs)
+        if progress is not None:
+            self._progress[job] = progress
+        try:
+            with self._lock:
+                try:
+                    future = self._executor.submit(_parse_job, job, bank, pdf_bytes, self.timeout)
+                except BrokenExecutor:
+                    self._executor.shutdown(wait=False, cancel_futures=True)
+                    self._start()
+                    future = self._executor.submit(_parse_job, job, bank, pdf_bytes, self.timeout)
+        except BaseException:
+            self._progress.pop(job, None)
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._events.put(None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def parse_uploads(pdfs, choice: str, jobs: int = 0, progress=None, pool: Optional[ParsePool] = None,
+                  on_pages=None) -> list:
+    """Parse several uploads in worker processes.
+
+    With a pool the jobs go to its workers; otherwise a pool of `jobs`
+    processes (0 = one per CPU) is started for the call, and if that can't
+    be done the PDFs are parsed serially. Returns one (df_movs, profile)
+    pair per PDF, in input order, or the exception that PDF raised.
+    progress(i, outcome) as each one finishes and on_pages(i, pages_done,
+    total_pages) as its pages are parsed are called in the calling thread.
+    """
+    bank = bank_for_choice(choice).name
+    outcomes = [None] * len(pdfs)
+
+    def finish(i, outcome):
+        outcomes[i] = outcome
+        if progress:
+            progress(i, outcome)
+
+    own_pool = None
+    if pool is None:
+        jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+        jobs = min(jobs, max(len(pdfs), 1))
+        if jobs > 1:
+            try:
+                pool = own_pool = ParsePool(jobs, max_pending=len(pdfs))
+            except (OSError, NotImplementedError):
+                pass
+    if pool is not None:
+        pages = {}
+        try:
+            futures = {
+                pool.submit(bank, pdf_bytes, lambda done, total, i=i: pages.__setitem__(i, (done, total))): i
+                for i, pdf_bytes in enumerate(pdfs)
+            }
+            pending = set(futures)
+            while pending:
+                finished, pending = wait(pending, timeout=PROGRESS_POLL_SECONDS, return_when=FIRST_COMPLETED)
+                if on_pages:
+                    for i in list(pages):
+                        on_pages(i, *pages.pop(i))
+                for future in finished:
+                    finish(futures[future], future.exception() or future.result())
+        except BrokenExecutor:
+            pass
+        finally:
+            if own_pool is not None:
+                own_pool.close()
+    for i, pdf_bytes in enumerate(pdfs):
+        if outcomes[i] is None:
+            finish(i, _parse_upload(bank, pdf_bytes))
+    return outcomes
+
+def build_zip(files) -> bytes:
+    """Deflated zip of (file name, bytes) pairs."""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, data in files:
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+# =========================
+# Batch CLI
+# =========================
+
+def collect_pdf_paths(inputs) -> list:
+    """Expand files, directories and glob patterns into a sorted list of PDFs."""
+    paths = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            candidates = glob.glob(os.path.join(item, "*.pdf")) + glob.glob(os.path.join(item, "*.PDF"))
+        elif os.path.isfile(item):
+            candidates = [item]
+        else:
+            candidates = glob.glob(item, recursive=True)
+        paths.update(c for c in candidates if c.lower().endswith(".pdf") and os.path.isfile(c))
+    return sorted(paths)
+
+def process_statement(path: str, output_dir: str, bank: str = "auto", engine: Optional[str] = None) -> dict:
+    """Parse one PDF and write its Detalle/Resumen CSVs. Never raises.
+
+    Runs inside batch worker processes, so page extraction stays serial here.
+    The PDF is read once and opened at most once, for detection and parsing
+    alike. "pages" is the page count, "pages_read" the pages actually parsed.
+    """
+    started = time.perf_counter()
+    profile = ParseProfile()
+    result = {"path": path, "choice": None, "confidence": None, "pages": 0, "pages_read": 0, "rows": 0,
+              "outputs": [], "error": None}
+    document = None
+    try:
+        with open(path, "rb") as fh:
+            document = OpenedPDF(fh.read())
+        choice = None if bank == "auto" else get_bank_parser(bank).choice
+        if choice is None:
+            detection = detect_bank(read_first_page_text(document))
+            result["confidence"] = detection.confidence
+            if detection.choice is None:
+                raise ValueError(
+                    f"No se pudo identificar el banco del extracto (confianza {detection.confidence:.0%})."
+                )
+            choice = detection.choice
+        result["choice"] = choice
+
+        df_movs = parse_statement(document, bank_for_choice(choice), workers=1, profile=profile, engine=engine)
+        if df_movs.empty:
+            raise ValueError("No se detectaron movimientos.")
+        result["rows"] = len(df_movs)
+
+        base_name = os.path.basename(path).rsplit(".", 1)[0]
+        detalle_filename, resumen_filename = generate_filenames(base_name, choice)
+        with profile.stage("summary"):
+            df_summary = build_summary(df_movs)
+        for filename, df in ((detalle_filename, df_movs), (resumen_filename, df_summary)):
+            out_path = os.path.join(output_dir, filename)
+            with profile.stage("csv"), open(out_path, "wb") as fh:
+                fh.write(to_csv_bytes(df))
+            result["outputs"].append(out_path)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        if document is not None:
+            result["pages"] = profile.total_pages or document.n_pages or 0
+            document.close()
+    result["pages_read"] = len(profile.pages)
+    result["seconds"] = time.perf_counter() - started
+    result["timings"] = profile.as_dict()
+    return result
+
+def run_batch(paths, output_dir: str, jobs: int = 0, bank: str = "auto", progress=None,
+              engine: Optional[str] = None) -> list:
+    """Process statements across `jobs` processes (0 = one per CPU)."""
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+    jobs = min(jobs, max(len(paths), 1))
+    results = []
+    if jobs <= 1:
+        for path in paths:
+            results.append(process_statement(path, output_dir, bank, engine))
+            if progress:
+                progress(results[-1])
+        return results
+    with _process_pool(jobs, initializer=warm_up) as pool:
+        futures = [pool.submit(process_statement, path, output_dir, bank, engine) for path in paths]
+        for future in as_completed(futures):
+            results.append(future.result())
+            if progress:
+                progress(results[-1])
+    order = {path: i for i, path in enumerate(paths)}
+    return sorted(results, key=lambda r: order[r["path"]])
+
+log = logging.getLogger("ocr_extract")
+
+def log_timings(result: dict):
+    """One JSON log line with a statement's stage timings, plus one per page at DEBUG."""
+    timings = result.get("timings")
+    if not timings:
+        return
+    log.info(json.dumps({
+        "event": "timings", "path": result["path"], "seconds": round(result["seconds"], 6),
+        "lines": timings["lines"], "matches": timings["matches"],
+        "skipped_pages": timings.get("skipped_pages", 0), "stages": timings["stages"],
+    }, ensure_ascii=False))
+    if log.isEnabledFor(logging.DEBUG):
+        for page in timings["pages"]:
+            log.debug(json.dumps({"event": "page", "path": result["path"], **page}, ensure_ascii=False))
+
+def format_throughput(results, elapsed: float) -> str:
+    """Human-readable throughput report for a batch run."""
+    failures = [r for r in results if r["error"]]
+    pages = sum(r["pages"] for r in results)
+    # Pages skipped after the end of the movements aren't work done.
+    pages_read = sum(r["pages_read"] for r in results)
+    rows = sum(r["rows"] for r in results)
+    elapsed = max(elapsed, 1e-9)
+    lines = [
+        f"Archivos: {len(results)} ({len(results) - len(failures)} ok, {len(failures)} con error)",
+        f"Páginas: {pages_read} leídas de {pages}  Movimientos: {rows}  Tiempo: {elapsed:.2f}s",
+        f"Throughput: {len(results) / elapsed:.2f} archivos/s, {pages_read / elapsed:.2f} páginas/s",
+    ]
+    lines += [f"  ERROR {r['path']}: {r['error']}" for r in failures]
+    return "\n".join(lines)
+
+def cli(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Extrae movimientos de extractos bancarios PDF (Santander / HSBC) en lote."
+    )
+    parser.add_argument("inputs", nargs="+", help="PDFs, directorios o patrones glob")
+    parser.add_argument("-o", "--output-dir", default=".", help="directorio de salida de los CSV")
+    parser.add_argument("-j", "--jobs", type=int, default=0, help="procesos en paralelo (0 = uno por CPU)")
+    parser.add_argument("--bank", choices=["auto", *registered_banks()], default="auto",
+                        help="forzar el parser en lugar de detectarlo")
+    parser.add_argument("--engine", choices=PARSE_ENGINES, default=None,
+                        help="motor de extracción: texto + regex o palabras por columna "
+                             "(por defecto OCR_EXTRACT_ENGINE o 'text')")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="incluir los tiempos por página en el log (stderr)")
+    args = parser.parse_args(argv)
+    # Only our own logger: pdfminer is very chatty at DEBUG.
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(handler)
+    log.setLevel(logging.DEBUG if args.verbose else logging.INFO)
+
+    paths = collect_pdf_paths(args.inputs)
+    if not paths:
+        print("No se encontraron PDFs.", file=sys.stderr)
+        return 2
+
+    def progress(result):
+        status = "ERROR" if result["error"] else "ok"
+        print(f"[{status}] {result['path']} ({result['pages_read']} de {result['pages']} páginas, {result['rows']} movimientos, "
+              f"{result['seconds']:.2f}s)", flush=True)
+        log_timings(result)
+
+    started = time.perf_counter()
+    results = run_batch(paths, args.output_dir, args.jobs, args.bank, progress, args.engine)
+    print(format_throughput(results, time.perf_counter() - started))
+    return 1 if any(r["error"] for r in results) else 0
+
+if __name__ == "__main__":
+    # Run the imported module rather than this __main__ copy, so banks loaded
+    # from entry points register where the parsers look them up.
+    from ocr_extract_core import cli as _cli
+    sys.exit(_cli())
@@ -0,0 +1,341 @@
+"""Local HTTP service for the parsing core: other tools post a statement PDF,
+get a job id back, and fetch its Detalle as NDJSON or CSV once parsed.
+
+asyncio and the standard library only. Parses run in a ParsePool, so the
+event loop only moves bytes. Run with:
+
+    python ocr_extract_service.py --port 8765
+
+Endpoints:
+    POST /jobs?bank=auto|santander|hsbc   body: the PDF (Content-Length required)
+    GET  /jobs/<id>                       job status and page progress
+    GET  /jobs/<id>/result?format=ndjson|csv
+                                          waits for the job, then streams the rows
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from http import HTTPStatus
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+import ocr_extract_core as core
+
+# =========================
+# Settings
+# =========================
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = int(os.environ.get("OCR_EXTRACT_SERVICE_PORT", "8765") or 8765)
+# Jobs uploading, queued or parsing at once; more get 429 before their body is read.
+SERVICE_MAX_JOBS = int(os.environ.get("OCR_EXTRACT_SERVICE_MAX_JOBS", "4") or 4)
+# Largest PDF accepted, in MB; bigger uploads get 413 before their body is read.
+SERVICE_MAX_UPLOAD_MB = float(os.environ.get("OCR_EXTRACT_SERVICE_MAX_MB", "50") or 50)
+# Seconds a finished job's result is kept for download.
+SERVICE_RESULT_TTL = 600.0
+# Seconds a client may take to send its request line, headers or body.
+SERVICE_READ_TIMEOUT = 30.0
+# Rows per NDJSON/CSV chunk; the writer is drained after each one, so a slow
+# client holds back the stream instead of growing the send buffer.
+STREAM_CHUNK_ROWS = core.CSV_CHUNK_ROWS
+MAX_HEADER_BYTES = 16 * 1024
+
+STREAM_FORMATS = {
+    "ndjson": "application/x-ndjson; charset=utf-8",
+    "csv": "text/csv; charset=utf-8",
+}
+
+class HTTPError(Exception):
+    """Ends a request with `status` and a JSON {"error": message} body."""
+
+    def __init__(self, status: HTTPStatus, message: str, headers=()):
+        super().__init__(message)
+        self.status = status
+        self.headers = tuple(headers)
+
+# =========================
+# Jobs
+# =========================
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+class Job:
+    """One uploaded statement and, once parsed, its Detalle."""
+
+    def __init__(self, bank: str, size: int):
+        self.id = uuid.uuid4().hex
+        self.bank = bank
+        self.size = size
+        self.status = JOB_QUEUED
+        self.pages_done = 0
+        self.total_pages = None
+        self.df_movs = None
+        self.error = None
+        self.finished_at = None
+        self.done = asyncio.Event()
+        self._lock = threading.Lock()  # progress() runs on the parse pool's listener thread
+
+    def progress(self, pages_done: int, total_pages: int) -> None:
+        # A late event must not reopen a finished job.
+        with self._lock:
+            if self.status in (JOB_QUEUED, JOB_RUNNING):
+                self.status = JOB_RUNNING
+                self.pages_done, self.total_pages = pages_done, total_pages
+
+    def finish(self, status: str, df_movs=None, error: Optional[str] = None,
+               total_pages: Optional[int] = None) -> None:
+        with self._lock:
+            self.status, self.df_movs, self.error = status, df_movs, error
+            if total_pages is not None:
+                # Pages after the closing balance are never read, yet the statement is complete.
+                self.pages_done = self.total_pages = total_pages
+
+    def as_dict(self) -> dict:
+        return {
+            "job": self.id,
+            "bank": self.bank,
+            "status": self.status,
+            "pages_done": self.pages_done,
+            "total_pages": self.total_pages,
+            "rows": None if self.df_movs is None else len(self.df_movs),
+            "error": self.error,
+        }
+
+def _detect_bank_name(pdf_bytes: bytes) -> str:
+    detection = core.detect_bank(core.read_first_page_text(pdf_bytes))
+    if detection.choice is None:
+        raise ValueError(f"No se pudo identificar el banco del extracto (confianza {detection.confidence:.0%}).")
+    return core.bank_for_choice(detection.choice).name
+
+# =========================
+# Service
+# =========================
+class ParseService:
+    """asyncio HTTP front end of a ParsePool.
+
+    At most max_jobs jobs are admitted at once (uploading, queued or
+    parsing), so the pool never blocks the event loop waiting for room.
+    Results are kept for SERVICE_RESULT_TTL seconds after the job ends.
+    """
+
+    def __init__(self, pool=None, max_jobs: int = SERVICE_MAX_JOBS,
+                 max_upload_bytes: int = int(SERVICE_MAX_UPLOAD_MB * 2**20)):
+        self.max_jobs = max_jobs
+        self.max_upload_bytes = max_upload_bytes
+        self._own_pool = pool is None
+        self.pool = pool if pool is not None else core.ParsePool(core.PARSE_POOL_WORKERS, max_pending=max_jobs)
+        self.jobs = {}
+        self.active = 0
+        self._tasks = set()
+
+    async def start(self, host: str = SERVICE_HOST, port: int = SERVICE_PORT) -> asyncio.base_events.Server:
+        """Start listening; port 0 picks a free port (see server.sockets)."""
+        return await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES)
+
+    def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        if self._own_pool:
+            self.pool.close()
+
+    # ---- jobs ----
+    def _purge(self) -> None:
+        cutoff = time.monotonic() - SERVICE_RESULT_TTL
+        for job_id in [j.id for j in self.jobs.values() if j.finished_at is not None and j.finished_at < cutoff]:
+            del self.jobs[job_id]
+
+    async def _run(self, job: Job, pdf_bytes: bytes) -> None:
+        try:
+            if job.bank == "auto":
+                job.bank = await asyncio.to_thread(_detect_bank_name, pdf_bytes)
+            outcome = await asyncio.wrap_future(self.pool.submit(job.bank, pdf_bytes, job.progress))
+            if isinstance(outcome, BaseException):
+                raise outcome
+            df_movs, profile = outcome
+            if df_movs.empty:
+                raise ValueError("No se detectaron movimientos.")
+            job.finish(JOB_DONE, df_movs=df_movs, total_pages=profile.total_pages)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.finish(JOB_FAILED, error=f"{type(e).__name__}: {e}")
+        finally:
+            self.active -= 1
+            job.finished_at = time.monotonic()
+            job.done.set()
+
+    # ---- HTTP ----
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """One request per connection (Connection: close)."""
+        try:
+            try:
+                method, target, headers = await asyncio.wait_for(_read_head(reader), SERVICE_READ_TIMEOUT)
+                await self.route(method, target, headers, reader, writer)
+            except HTTPError as e:
+                await _send_json(writer, e.status, {"error": str(e)}, e.headers)
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+                await _send_json(writer, HTTPStatus.BAD_REQUEST, {"error": "Pedido HTTP inválido."})
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method: str, target: str, headers: dict, reader, writer) -> None:
+        url = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        parts = [p for p in url.path.split("/") if p]
+        self._purge()
+        if parts == ["jobs"]:
+            if method != "POST":
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "Usá POST para subir un PDF.")
+            return await self.create_job(query, headers, reader, writer)
+        if len(parts) in (2, 3) and parts[0] == "jobs" and parts[2:] in ([], ["result"]):
+            if method != "GET":
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "Usá GET para consultar un trabajo.")
+            job = self.jobs.get(parts[1])
+            if job is None:
+                raise HTTPError(HTTPStatus.NOT_FOUND, "Trabajo inexistente o vencido.")
+            if len(parts) == 2:
+                return await _send_json(writer, HTTPStatus.OK, job.as_dict())
+            return await self.stream_result(job, query, headers, writer)
+        raise HTTPError(HTTPStatus.NOT_FOUND, "Ruta desconocida.")
+
+    async def create_job(self, query: dict, headers: dict, reader, writer) -> None:
+        bank = query.get("bank", "auto")
+        if bank != "auto":
+            try:
+                core.get_bank_parser(bank)
+            except ValueError as e:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, str(e))
+        if "transfer-encoding" in headers or "content-length" not in headers:
+            raise HTTPError(HTTPStatus.LENGTH_REQUIRED, "Falta Content-Length.")
+        try:
+            size = int(headers["content-length"])
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Content-Length inválido.")
+        if size <= 0:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "El PDF está vacío.")
+        if size > self.max_upload_bytes:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                            f"El PDF supera el máximo de {self.max_upload_bytes / 2**20:g} MB.")
+        if self.active >= self.max_jobs:
+            raise HTTPError(HTTPStatus.TOO_MANY_REQUESTS,
+                            "Hay demasiados PDFs en proceso; probá de nuevo en unos segundos.",
+                            [("Retry-After", "5")])
+
+        self.active += 1
+        try:
+            if headers.get("expect", "").lower() == "100-continue":
+                # The client waits for this before sending the body, so a refused upload is never sent at all.
+                writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+                await writer.drain()
+            pdf_bytes = await asyncio.wait_for(reader.readexactly(size), SERVICE_READ_TIMEOUT)
+        except BaseException:
+            self.active -= 1
+            raise
+        job = Job(bank, size)
+        self.jobs[job.id] = job
+        task = asyncio.create_task(self._run(job, pdf_bytes))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        await _send_json(writer, HTTPStatus.ACCEPTED, job.as_dict(), [("Location", f"/jobs/{job.id}")])
+
+    async def stream_result(self, job: Job, query: dict, headers: dict, writer) -> None:
+        fmt = query.get("format") or ("csv" if "text/csv" in headers.get("accept", "") else "ndjson")
+        if fmt not in STREAM_FORMATS:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Formato desconocido: {fmt} (ndjson o csv).")
+        await job.done.wait()
+        if job.status == JOB_FAILED:
+            raise HTTPError(HTTPStatus.UNPROCESSABLE_ENTITY, job.error)
+
+        await _send_head(writer, HTTPStatus.OK, [
+            ("Content-Type", STREAM_FORMATS[fmt]), ("Transfer-Encoding", "chunked"),
+        ])
+        df = core.export_frame(job.df_movs)
+        for start in range(0, max(len(df), 1), STREAM_CHUNK_ROWS):
+            chunk = df.iloc[start:start + STREAM_CHUNK_ROWS]
+            if fmt == "csv":
+                data = chunk.to_csv(index=False, header=start == 0, lineterminator="\n").encode("utf-8")
+            else:
+                data = _ndjson_bytes(chunk)
+            writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+# =========================
+# HTTP helpers
+# =========================
+def _ndjson_bytes(chunk) -> bytes:
+    """One JSON object per row, with the same shortest float repr as the CSV."""
+    columns = list(chunk.columns)
+    rows = chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None)
+    return "".join(
+        json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=lambda v: v.item()) + "\n" for row in rows
+    ).encode("utf-8")
+
+async def _read_head(reader: asyncio.StreamReader):
+    """(method, target, headers) of a request; header names are lowercased."""
+    request_line = (await reader.readuntil(b"\r\n")).decode("latin-1").rstrip("\r\n")
+    method, target, version = request_line.split(" ")
+    if not version.startswith("HTTP/1."):
+        raise ValueError(version)
+    headers = {}
+    while True:
+        line = (await reader.readuntil(b"\r\n")).decode("latin-1").rstrip("\r\n")
+        if not line:
+            return method.upper(), target, headers
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+async def _send_head(writer: asyncio.StreamWriter, status: HTTPStatus, headers) -> None:
+    lines = [f"HTTP/1.1 {status.value} {status.phrase}", "Connection: close"]
+    lines += [f"{name}: {value}" for name, value in headers]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+    await writer.drain()
+
+async def _send_json(writer: asyncio.StreamWriter, status: HTTPStatus, payload: dict, headers=()) -> None:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    await _send_head(writer, status, [
+        ("Content-Type", "application/json; charset=utf-8"), ("Content-Length", str(len(body))), *headers,
+    ])
+    writer.write(body)
+    await writer.drain()
+
+# =========================
+# Entry point
+# =========================
+async def serve(host: str = SERVICE_HOST, port: int = SERVICE_PORT, max_jobs: int = SERVICE_MAX_JOBS) -> None:
+    service = ParseService(max_jobs=max_jobs)
+    server = await service.start(host, port)
+    address = server.sockets[0].getsockname()
+    print(f"Escuchando en http://{address[0]}:{address[1]}", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Servicio HTTP local para extraer movimientos de extractos PDF.")
+    parser.add_argument("--host", default=SERVICE_HOST, help="dirección de escucha (por defecto solo localhost)")
+    parser.add_argument("--port", type=int, default=SERVICE_PORT, help="puerto (0 = uno libre)")
+    parser.add_argument("--max-jobs", type=int, default=SERVICE_MAX_JOBS,
+                        help="PDFs en proceso a la vez; el resto recibe 429")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_jobs))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,7 @@
+import pytest
+import ocr_extract_core as core
+
+@pytest.fixture(autouse=True)
+def isolated_page_cache(tmp_path, monkeypatch):
+    """Keep the on-disk page text cache out of the user's home during tests."""
+    monkeypatch.setattr(core, "PAGE_CACHE_DIR", str(tmp_path / "page_cache"))
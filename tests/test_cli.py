@@ -0,0 +1,160 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+from App_STDR_OCR_PDF_Extract import (
+    cli,
+    collect_pdf_paths,
+    detect_bank,
+    read_first_page_text,
+    format_throughput,
+    log,
+    log_timings,
+    process_statement,
+    run_batch,
+)
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PDF_DIR = os.path.join(REPO_DIR, "PDFs")
+
+def test_collect_pdf_paths_expands_dirs_and_globs(tmp_path):
+    (tmp_path / "a.pdf").write_bytes(b"")
+    (tmp_path / "b.PDF").write_bytes(b"")
+    (tmp_path / "notes.txt").write_bytes(b"")
+    sub = tmp_path / "sub"
+    sub.mkdir()
+    (sub / "c.pdf").write_bytes(b"")
+
+    assert collect_pdf_paths([str(tmp_path)]) == [str(tmp_path / "a.pdf"), str(tmp_path / "b.PDF")]
+    assert collect_pdf_paths([str(tmp_path / "**" / "*.pdf"), str(tmp_path / "a.pdf")]) == [
+        str(tmp_path / "a.pdf"), str(sub / "c.pdf")
+    ]
+
+def test_detect_bank_from_first_page_markers():
+    stdr = detect_bank("Fecha Comprobante Movimiento Débito Crédito Saldo en cuenta\n"
+                       "30/11/24 Saldo Inicial -$ 70.833,71")
+    assert stdr.choice == "Santander OCR Extract"
+    assert stdr.confidence == 1.0
+
+    hsbc = detect_bank("FECHA REFERENCIA NRO DEBITO CREDITO SALDO\n"
+                       "- SALDO ANTERIOR 1,121,084.25\n"
+                       "02-MAY - IMP. LEY 25.413 00000 .16 1,121,084.09")
+    assert hsbc.choice == "HSBC OCR Extract"
+    assert hsbc.scores["hsbc"] > hsbc.scores["santander"]
+
+    unknown = detect_bank("Lorem ipsum")
+    assert unknown.choice is None
+    assert unknown.confidence == 0.0
+
+def test_detect_bank_ambiguous_text_is_unknown():
+    detection = detect_bank("Santander HSBC")
+    assert detection.choice is None
+    assert detection.confidence < 0.5
+
+def test_detect_bank_needs_evidence_not_just_an_amount():
+    detection = detect_bank("Factura B\nTotal $ 1.234,56")
+    assert detection.scores["santander"] > 0 and detection.scores["hsbc"] == 0
+    assert detection.choice is None
+    assert detection.confidence < 0.6
+
+@pytest.mark.parametrize("filename, expected", [
+    ("03_Santander_Dic24.pdf", "Santander OCR Extract"),
+    ("04_Santander ago-25_NEW.pdf", "Santander OCR Extract"),
+    ("02_HSBC_Extracto.pdf", "HSBC OCR Extract"),
+])
+def test_detect_bank_on_sample_pdfs(filename, expected):
+    pdf_path = os.path.join(PDF_DIR, filename)
+    if not os.path.exists(pdf_path):
+        pytest.skip(f"Sample PDF {filename} not found.")
+    with open(pdf_path, "rb") as f:
+        detection = detect_bank(read_first_page_text(f.read()))
+    assert detection.choice == expected
+    assert detection.confidence >= 0.9
+
+def test_detection_reads_the_first_page_once_through_the_page_cache(monkeypatch):
+    import ocr_extract_core as core
+    pdf_path = os.path.join(PDF_DIR, "03_Santander_Dic24.pdf")
+    if not os.path.exists(pdf_path):
+        pytest.skip("Sample PDF not found.")
+    with open(pdf_path, "rb") as f:
+        pdf_bytes = f.read()
+    text = read_first_page_text(pdf_bytes)
+    cache = core.get_page_cache()
+    assert cache.get_entry(cache.key(pdf_bytes)) == ([text], 7)
+
+    monkeypatch.setattr("pdfplumber.open", lambda *a, **k: pytest.fail("the PDF was opened again"))
+    assert read_first_page_text(pdf_bytes) == text
+
+def test_run_batch_writes_csvs_and_reports_failures(tmp_path):
+    if not os.path.isdir(PDF_DIR):
+        pytest.skip("Sample PDFs not found.")
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"not a pdf")
+    paths = collect_pdf_paths([PDF_DIR]) + [str(broken)]
+    out_dir = tmp_path / "out"
+
+    results = run_batch(paths, str(out_dir), jobs=2)
+
+    assert [r["path"] for r in results] == paths
+    ok = [r for r in results if not r["error"]]
+    assert len(ok) == len(paths) - 1
+    assert results[-1]["error"]
+    assert sorted(os.listdir(out_dir)) == sorted(os.path.basename(p) for r in ok for p in r["outputs"])
+    assert all(r["confidence"] >= 0.9 for r in ok)
+    assert any("_HSBC_Detalle_Movimientos_" in p for r in ok for p in r["outputs"])
+    assert any("_STDR_Resumen_Referencias_" in p for r in ok for p in r["outputs"])
+
+    stages = ok[0]["timings"]["stages"]
+    assert {"extract", "match", "convert", "frame", "summary", "csv"} <= set(stages)
+    timings = ok[0]["timings"]
+    assert len(timings["pages"]) + timings["skipped_pages"] == ok[0]["pages"]
+
+    report = format_throughput(results, 2.0)
+    assert "1 con error" in report
+    assert "páginas/s" in report
+
+def test_batch_opens_each_pdf_once_and_rates_the_pages_read(tmp_path, monkeypatch):
+    import pdfplumber
+    import ocr_extract_core as core
+    pdf_path = os.path.join(PDF_DIR, "03_Santander_Dic24.pdf")
+    if not os.path.exists(pdf_path):
+        pytest.skip("Sample PDF not found.")
+    real_open, real_extract = pdfplumber.open, core._extract_page
+    opened, extracted = [], []
+    monkeypatch.setattr("pdfplumber.open", lambda *a, **k: opened.append(1) or real_open(*a, **k))
+    monkeypatch.setattr(core, "_extract_page", lambda page, *a: extracted.append(page.page_number) or real_extract(page, *a))
+
+    result = process_statement(pdf_path, str(tmp_path))
+
+    assert not result["error"]
+    assert len(opened) == 1
+    assert extracted == [1, 2, 3, 4]  # page 1 serves both detection and parsing
+    assert (result["pages_read"], result["pages"]) == (4, 7)  # stops at "Saldo total"
+    report = format_throughput([result], 2.0)
+    assert "Páginas: 4 leídas de 7" in report and "2.00 páginas/s" in report
+
+def test_cli_without_pdfs_returns_error(tmp_path, capsys):
+    assert cli([str(tmp_path)]) == 2
+    assert "No se encontraron PDFs" in capsys.readouterr().err
+
+def test_log_timings_emits_json_lines(caplog):
+    result = {"path": "x.pdf", "seconds": 0.5, "timings": {
+        "stages": {"extract": 0.25, "match": 0.1}, "lines": 40, "matches": 12,
+        "pages": [{"page": 1, "extract_seconds": 0.25, "parse_seconds": 0.1, "lines": 40, "matches": 12}],
+    }}
+    with caplog.at_level("DEBUG", logger=log.name):
+        log_timings(result)
+
+    records = [json.loads(r.getMessage()) for r in caplog.records]
+    assert records[0]["event"] == "timings"
+    assert records[0]["stages"] == {"extract": 0.25, "match": 0.1}
+    assert records[1] == {"event": "page", "path": "x.pdf", "page": 1, "extract_seconds": 0.25,
+                          "parse_seconds": 0.1, "lines": 40, "matches": 12}
+
+def test_parsing_core_imports_without_heavy_dependencies():
+    heavy = "('streamlit', 'pandas', 'numpy', 'pdfplumber', 'multiprocessing')"
+    code = (f"import sys, ocr_extract_core as core; print([m for m in {heavy} if m in sys.modules]); "
+            f"core.warm_up(); print(core.pd.__name__, core.pdfplumber.__name__)")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=REPO_DIR)
+    assert out.stdout.splitlines() == ["[]", "pandas pdfplumber"]
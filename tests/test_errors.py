@@ -1,8 +1,10 @@
 import pytest
+from datetime import date
 import io
 import pandas as pd
 from unittest.mock import MagicMock, patch
 from App_STDR_OCR_PDF_Extract import parse_santander_pdf
+import ocr_extract_core as core
 
 def test_parse_santander_consistency_error():
     # Mock pdfplumber to return a page with inconsistent data
@@ -30,3 +32,36 @@ def test_parse_santander_consistency_error():
         
         assert "Error de consistencia" in str(excinfo.value)
         assert "saldo anterior 1,000.00 + importe -100.00 = 900.00 pero el saldo registrado en el PDF es 800.00" in str(excinfo.value)
+
+@pytest.mark.parametrize("batch_rows", [1, 2, 4096])
+def test_consistency_error_after_valid_rows_in_any_batch_size(monkeypatch, batch_rows):
+    import App_STDR_OCR_PDF_Extract as app
+    from App_STDR_OCR_PDF_Extract import Movement, iter_santander_movements
+    pages = [
+        "Saldo Inicial $ 1.000,00\n01/01/24 Compra $ 100,00 $ 900,00\n"
+        "02/01/24 Transferencia recibida $ 50,00 $ 950,00",
+        "De juan perez / transf - var / 20111111111\n03/01/24 Compra $ 10,00 $ 900,00",
+    ]
+    monkeypatch.setattr(core, "iter_page_texts", lambda *a, **k: iter(pages))
+    monkeypatch.setattr(core, "MONEY_BATCH_ROWS", batch_rows)
+
+    seen = []
+    with pytest.raises(ValueError) as excinfo:
+        for movement in iter_santander_movements(io.BytesIO(b"")):
+            seen.append(movement)
+
+    assert seen == [
+        Movement("", "Saldo Inicial", None, 100000),
+        Movement("01/01/24", "Compra", -10000, 90000, date(2024, 1, 1)),
+        Movement("02/01/24", "Transferencia recibida - De juan perez / transf - var / 20111111111", 5000, 95000,
+                 date(2024, 1, 2)),
+    ]
+    assert "saldo anterior 950.00 + importe -10.00 = 940.00 pero el saldo registrado en el PDF es 900.00" in str(excinfo.value)
+
+def test_one_cent_gap_is_a_consistency_error(monkeypatch):
+    import App_STDR_OCR_PDF_Extract as app
+    pages = ["Saldo Inicial $ 1.000,00\n01/01/24 Compra $ 100,00 $ 899,99"]
+    monkeypatch.setattr(core, "iter_page_texts", lambda *a, **k: iter(pages))
+    with pytest.raises(ValueError) as excinfo:
+        list(app.iter_santander_movements(io.BytesIO(b"")))
+    assert "= 900.00 pero el saldo registrado en el PDF es 899.99" in str(excinfo.value)
@@ -0,0 +1,179 @@
+import io
+import os
+import pytest
+import App_STDR_OCR_PDF_Extract as app
+import ocr_extract_core as core
+from benchmarks.synthetic_statements import generate_statement, statement_pdf_bytes
+from App_STDR_OCR_PDF_Extract import (
+    PageTextCache,
+    _page_ranges,
+    _resolve_workers,
+    iter_page_texts,
+    parse_santander_pdf,
+    parse_hsbc_pdf,
+)
+
+PDF_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "PDFs")
+
+def test_page_ranges_cover_all_pages_in_order():
+    ranges = list(_page_ranges(10, 3))
+    assert ranges == [(0, 4), (4, 7), (7, 10)]
+    assert list(_page_ranges(2, 4)) == [(0, 1), (1, 2)]
+
+def test_resolve_workers_serial_for_small_pdfs():
+    assert _resolve_workers(4, app.PARALLEL_MIN_PAGES - 1) == 1
+    assert _resolve_workers(1, 100) == 1
+    assert _resolve_workers(4, 100) == 4
+    assert _resolve_workers(64, app.PARALLEL_MIN_PAGES) == app.PARALLEL_MIN_PAGES
+
+@pytest.mark.parametrize("filename, parser", [
+    ("03_Santander_Dic24.pdf", parse_santander_pdf),
+    ("02_HSBC_Extracto.pdf", parse_hsbc_pdf),
+])
+def test_parallel_extraction_matches_serial(monkeypatch, filename, parser):
+    pdf_path = os.path.join(PDF_DIR, filename)
+    if not os.path.exists(pdf_path):
+        pytest.skip(f"Sample PDF {filename} not found.")
+    monkeypatch.setattr(core, "PARALLEL_MIN_PAGES", 2)
+
+    with open(pdf_path, "rb") as f:
+        serial_pages = list(iter_page_texts(f, workers=1, cache=False))
+        parallel_pages = list(iter_page_texts(f, workers=3, cache=False))
+        assert parallel_pages == serial_pages
+
+        df_serial = parser(f, workers=1, cache=False)
+        df_parallel = parser(f, workers=3, cache=False)
+    assert df_parallel.equals(df_serial)
+
+def test_page_cache_hit_skips_pdfplumber(monkeypatch):
+    pdf_path = os.path.join(PDF_DIR, "03_Santander_Dic24.pdf")
+    if not os.path.exists(pdf_path):
+        pytest.skip("Sample PDF not found.")
+    with open(pdf_path, "rb") as f:
+        df_first = parse_santander_pdf(f, workers=1)
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("pdfplumber.open called on a cache hit")
+    monkeypatch.setattr("pdfplumber.open", _fail)
+    with open(pdf_path, "rb") as f:
+        df_cached = parse_santander_pdf(f, workers=1)
+    assert df_cached.equals(df_first)
+
+def test_page_cache_evicts_least_recently_used(tmp_path):
+    cache = PageTextCache(str(tmp_path), max_bytes=250)
+    page = "x" * 100
+    cache.put("a", [page])
+    cache.put("b", [page])
+    os.utime(tmp_path / "a.json", (0, 0))
+    os.utime(tmp_path / "b.json", (1, 1))
+    assert cache.get("a") == [page]  # refreshes "a", leaving "b" as the LRU entry
+    cache.put("c", [page])
+    assert cache.get("b") is None
+    assert cache.get("a") == [page]
+    assert cache.get("c") == [page]
+
+def test_page_cache_threads_writing_the_same_entry_use_their_own_temp_files(tmp_path, monkeypatch):
+    import threading
+    cache = PageTextCache(str(tmp_path))
+    temp_files = []
+    replace = os.replace
+    both_written = threading.Barrier(2)
+
+    def replace_after_both(src, dst):
+        temp_files.append(src)
+        both_written.wait(timeout=5)
+        replace(src, dst)
+
+    monkeypatch.setattr(core.os, "replace", replace_after_both)
+    threads = [threading.Thread(target=cache.put, args=("k", [text])) for text in ("one", "two")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(temp_files)) == 2
+    assert cache.get("k") in (["one"], ["two"])
+    assert not list(tmp_path.glob("*.tmp"))
+
+def test_page_cache_key_depends_on_content():
+    cache = PageTextCache("unused")
+    assert cache.key(b"one") == cache.key(b"one")
+    assert cache.key(b"one") != cache.key(b"two")
+    assert app.pdfplumber.__version__ in cache.key(b"one")
+    # word lines are cached apart from the page text
+    assert cache.key(b"one", "santander") not in (cache.key(b"one"), cache.key(b"one", "hsbc"))
+
+@pytest.mark.parametrize("filename, parser, bank", [
+    ("03_Santander_Dic24.pdf", parse_santander_pdf, "santander"),
+    ("02_HSBC_Extracto.pdf", parse_hsbc_pdf, "hsbc"),
+])
+def test_cropped_regions_parse_like_full_pages(monkeypatch, filename, parser, bank):
+    pdf_path = os.path.join(PDF_DIR, filename)
+    if not os.path.exists(pdf_path):
+        pytest.skip(f"Sample PDF {filename} not found.")
+
+    with open(pdf_path, "rb") as f:
+        cropped_pages = list(iter_page_texts(f, cache=False, layout=f"text:{bank}"))
+        full_pages = list(iter_page_texts(f, cache=False))
+        cropped = parser(f, cache=False)
+        monkeypatch.setattr(core, "CROP_REGIONS", False)
+        full = parser(f, cache=False)
+
+    assert app.to_csv_bytes(cropped) == app.to_csv_bytes(full)
+    assert sum(len(p.splitlines()) for p in cropped_pages) < sum(len(p.splitlines()) for p in full_pages)
+
+@pytest.mark.parametrize("bank", ["santander", "hsbc"])
+def test_cropped_regions_keep_rows_wherever_the_table_sits(bank):
+    # Synthetic pages put the table header at the very top, above where the banks print it.
+    pdf_bytes = statement_pdf_bytes(generate_statement(bank, 400, seed=1))
+    parser = parse_santander_pdf if bank == "santander" else parse_hsbc_pdf
+
+    df_movs = parser(io.BytesIO(pdf_bytes), cache=False)
+
+    assert len(df_movs) == 401
+    pages = list(iter_page_texts(io.BytesIO(pdf_bytes), cache=False, layout=f"text:{bank}"))
+    assert pages[1].splitlines()[0].startswith(("Fecha Comprobante", "FECHA REFERENCIA"))
+
+def test_first_page_region_starts_at_the_anchor():
+    class FakePage:
+        def extract_text(self):
+            return "HOJA 1 DE 9\nESTIMADOS SEÑORES\nEXTRACTO DEL 01/05/2025 AL 31/05/2025\nFECHA REFERENCIA"
+
+    region = app.get_bank_parser("hsbc").region
+    assert app._page_region_text(FakePage(), region, first=True) == "EXTRACTO DEL 01/05/2025 AL 31/05/2025\nFECHA REFERENCIA"
+    region = app.get_bank_parser("santander").region
+    assert app._page_region_text(FakePage(), region, first=True) == FakePage().extract_text()
+
+def test_early_stop_caches_the_pages_read_and_resumes_from_them():
+    pdf_path = os.path.join(PDF_DIR, "03_Santander_Dic24.pdf")
+    if not os.path.exists(pdf_path):
+        pytest.skip("Sample PDF not found.")
+    cache = app.get_page_cache()
+    with open(pdf_path, "rb") as f:
+        pdf_bytes = f.read()
+    key = cache.key(pdf_bytes)
+
+    pages = iter_page_texts(io.BytesIO(pdf_bytes), workers=1)
+    first_two = [next(pages), next(pages)]
+    pages.close()
+    assert cache.get(key) is None  # a partial entry is not a full hit
+    assert cache.get_entry(key) == (first_two, 7)
+
+    full = list(iter_page_texts(io.BytesIO(pdf_bytes), workers=1))
+    assert full[:2] == first_two and len(full) == 7
+    assert full == list(iter_page_texts(io.BytesIO(pdf_bytes), workers=1, cache=False))
+    assert cache.get(key) == full
+
+def _rss_mb():
+    with open("/proc/self/statm") as fh:
+        return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="RSS sampling needs /proc")
+def test_low_memory_extraction_keeps_rss_flat():
+    pdf_bytes = statement_pdf_bytes(generate_statement("santander", 1200, seed=4))  # 30 pages
+    pages = iter_page_texts(io.BytesIO(pdf_bytes), workers=1, cache=False)
+    next(pages)
+    base = peak = _rss_mb()
+    for _ in pages:
+        peak = max(peak, _rss_mb())
+    # Pages kept open hold about 6 MB each here, ~170 MB over the statement.
+    assert peak - base < 40
@@ -87,3 +87,80 @@ def test_generate_filenames():
     
     det_h, res_h = generate_filenames("test_file", "HSBC OCR Extract")
     assert "test_file_HSBC_Detalle_Movimientos_" in det_h
+
+def test_to_float_money_many_matches_scalar():
+    import numpy as np
+    from App_STDR_OCR_PDF_Extract import _to_float_money_arg_many, _to_float_money_us_many
+    arg_raws = ["$ 1.234,56", "-$ 1.234,56", "–$ 1.234,56", "— $ 0,04", "−$70.833,71", "1.000,00"]
+    us_raws = ["1,234.56", "-1,234.56", "–1,234.56", ".16", "1000.00"]
+
+    arg = _to_float_money_arg_many(pd.Series(arg_raws))
+    assert arg.dtype == np.float64
+    assert arg.tolist() == [_to_float_money_arg(r) for r in arg_raws]
+    assert _to_float_money_us_many(np.array(us_raws)).tolist() == [_to_float_money_us(r) for r in us_raws]
+    assert _to_float_money_arg_many([]).size == 0
+
+def test_to_float_money_many_rejects_garbage():
+    from App_STDR_OCR_PDF_Extract import _to_float_money_us_many
+    with pytest.raises(ValueError):
+        _to_float_money_us_many(["1.00", "abc"])
+
+def test_to_cents_money():
+    from App_STDR_OCR_PDF_Extract import (
+        _to_cents_money_arg, _to_cents_money_us, _to_cents_money_arg_many, _to_cents_money_us_many, format_cents
+    )
+    assert _to_cents_money_arg("-$ 70.833,71") == -7083371
+    assert _to_cents_money_us(".16") == 16
+    assert _to_cents_money_arg_many(["$ 0,29", "–$ 1.000,10"]).tolist() == [29, -100010]
+    assert _to_cents_money_us_many(["1,121,084.25"]).dtype == "int64"
+    assert format_cents(-100000) == "-1,000.00"
+    assert format_cents(5) == "0.05"
+
+def test_build_summary_and_kpis_sum_exactly_in_cents():
+    rows = [{"Fecha": "", "Referencia": "Saldo Inicial", "Importe": "", "Saldo": 0.0}]
+    rows += [{"Fecha": "01/01/24", "Referencia": "Fee", "Importe": 0.1, "Saldo": 0.0} for _ in range(10)]
+    rows += [{"Fecha": "01/01/24", "Referencia": "Tax", "Importe": 0.2, "Saldo": 0.0} for _ in range(10)]
+    df = pd.DataFrame(rows)
+    assert sum([0.1] * 10) != 1.0  # float drift the cents representation avoids
+
+    summary = build_summary(df)
+    assert summary.loc[summary["Referencia"] == "Fee", "Sum_Importe"].iloc[0] == 1.0
+    assert summary.loc[summary["Referencia"] == "TOTAL", "Sum_Importe"].iloc[0] == 3.0
+    assert get_kpis(df)[1] == 3.0
+
+def _statement(saldo_inicial, rows):
+    from datetime import date
+    from App_STDR_OCR_PDF_Extract import Movement, movements_to_frame
+    movements = [Movement("", "Saldo Inicial", None, saldo_inicial)]
+    movements += [Movement(f, r, i, s, date(2000 + int(f[6:]), int(f[3:5]), int(f[:2]))) for f, r, i, s in rows]
+    return movements_to_frame(movements, "stdr")
+
+def test_merge_statements_orders_by_period_and_drops_repeated_rows():
+    from App_STDR_OCR_PDF_Extract import LINK_CONTINUOUS, LINK_OVERLAP, SOURCE_COLUMN, merge_statements
+    enero = _statement(10000, [("10/01/24", "A", -1000, 9000), ("31/01/24", "B", 500, 9500)])
+    # febrero was downloaded from mid-January, so it repeats B
+    febrero = _statement(9000, [("31/01/24", "B", 500, 9500), ("02/02/24", "C", -200, 9300)])
+    marzo = _statement(9300, [("01/03/24", "D", 700, 10000)])
+
+    merge = merge_statements([("marzo.pdf", marzo), ("febrero.pdf", febrero), ("enero.pdf", enero)])
+
+    assert merge.df_movs[SOURCE_COLUMN].tolist() == ["enero.pdf"] * 3 + ["febrero.pdf", "marzo.pdf"]
+    assert merge.df_movs["Referencia"].tolist() == ["Saldo Inicial", "A", "B", "C", "D"]
+    assert merge.duplicates == 1
+    assert merge.links["Estado"].tolist() == [LINK_OVERLAP, LINK_CONTINUOUS]
+    assert merge.links["Duplicados"].tolist() == [1, 0]
+    assert (merge.links["Diferencia"] == 0).all()
+    assert get_kpis(merge.df_movs) == (100.0, 0.0, 100.0)
+    assert to_csv_bytes(merge.df_movs).decode("utf-8").splitlines()[4] == "febrero.pdf,02/02/24,C,-2.0,93.0"
+
+def test_merge_statements_flags_a_missing_month():
+    from App_STDR_OCR_PDF_Extract import LINK_GAP, merge_statements
+    enero = _statement(10000, [("10/01/24", "A", -1000, 9000)])
+    marzo = _statement(8000, [("01/03/24", "D", 700, 8700)])
+
+    links = merge_statements([("enero.pdf", enero), ("marzo.pdf", marzo)]).links
+
+    assert links["Estado"].tolist() == [LINK_GAP]
+    assert links["Saldo final anterior"].tolist() == [90.0]
+    assert links["Saldo inicial"].tolist() == [80.0]
+    assert links["Diferencia"].tolist() == [-10.0]
@@ -1,7 +1,19 @@
 import pytest
+from datetime import date
+import io
 import os
 import pandas as pd
-from App_STDR_OCR_PDF_Extract import parse_santander_pdf, parse_hsbc_pdf
+from App_STDR_OCR_PDF_Extract import (
+    Movement,
+    ParseProfile,
+    iter_hsbc_movements,
+    iter_santander_movements,
+    parse_santander_pdf,
+    parse_hsbc_pdf,
+    to_csv_bytes,
+    write_movements_csv,
+)
+import ocr_extract_core as core
 
 SAMPLE_PDF_DIR = "/home/marianoduran/Documents/TeamIT-Proyectos/00 - EstudioDM-01-OCRExtractPDF/PDFs"
 
@@ -39,3 +51,278 @@ def test_parse_hsbc_pdf():
     
     # Check if SALDO ANTERIOR is the first row (based on hsbc_parser logic)
     assert df.iloc[0]["Referencia"] == "SALDO ANTERIOR"
+
+LOCAL_PDF_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "PDFs")
+
+@pytest.mark.parametrize("filename, iter_movements, parser", [
+    ("03_Santander_Dic24.pdf", iter_santander_movements, parse_santander_pdf),
+    ("02_HSBC_Extracto.pdf", iter_hsbc_movements, parse_hsbc_pdf),
+])
+def test_streamed_csv_matches_dataframe_export(filename, iter_movements, parser):
+    pdf_path = os.path.join(LOCAL_PDF_DIR, filename)
+    if not os.path.exists(pdf_path):
+        pytest.skip(f"Sample PDF {filename} not found.")
+
+    with open(pdf_path, "rb") as f:
+        df = parser(f)
+        buf = io.StringIO()
+        count = write_movements_csv(iter_movements(f), buf)
+
+    assert count == len(df)
+    assert buf.getvalue().encode("utf-8") == to_csv_bytes(df)
+
+def test_iter_movements_yields_before_reading_every_page(monkeypatch):
+    import App_STDR_OCR_PDF_Extract as app
+    pages_read = []
+    def fake_pages(file_like, workers=None, cache=True, layout="text", profile=None, start=0):
+        for i, text in enumerate([
+            "Saldo Inicial $ 1.000,00\n01/01/24 Compra $ 100,00 $ 900,00",
+            "02/01/24 Transferencia recibida $ 50,00 $ 950,00\nDe juan perez / transf - var / 20111111111",
+        ]):
+            pages_read.append(i)
+            yield text
+    monkeypatch.setattr(core, "iter_page_texts", fake_pages)
+
+    movements = iter_santander_movements(io.BytesIO(b""))
+    assert next(movements) == Movement("", "Saldo Inicial", None, 100000)
+    assert next(movements) == Movement("01/01/24", "Compra", -10000, 90000, date(2024, 1, 1))
+    assert pages_read == [0]
+    transfer = next(movements)
+    assert transfer.referencia == "Transferencia recibida - De juan perez / transf - var / 20111111111"
+    assert transfer.importe_cents == 5000
+
+def _sequential_kind(line, attempts):
+    for kind, pattern, method in attempts:
+        if getattr(pattern, method)(line):
+            return kind
+    return None
+
+@pytest.mark.parametrize("saldo_pending", [True, False])
+def test_line_classifiers_match_sequential_regex_attempts(saldo_pending):
+    import App_STDR_OCR_PDF_Extract as app
+    stdr_attempts = [
+        (app.LINE_SALDO_INICIAL, app.saldo_inicial_stdr_re, "search"),
+        (app.LINE_SALDO_FINAL, app.saldo_total_stdr_re, "match"),
+        (app.LINE_MOVIMIENTO, app.linea_movimiento_stdr, "match"),
+        (app.LINE_TRANSFERENCIA, app.linea_transferencia_stdr, "match"),
+    ]
+    hsbc_attempts = [
+        (app.LINE_SALDO_INICIAL, app.saldo_anterior_hsbc_re, "search"),
+        (app.LINE_SALDO_FINAL, app.saldo_final_hsbc_re, "match"),
+        (app.LINE_MOVIMIENTO, app.linea_con_fecha_hsbc, "match"),
+        (app.LINE_SIN_FECHA, app.linea_sin_fecha_hsbc, "match"),
+    ]
+    if not saldo_pending:
+        stdr_attempts, hsbc_attempts = stdr_attempts[1:], hsbc_attempts[1:]
+
+    lines = [
+        "", "-", "A", "De", "$", "30/11/24 Saldo Inicial -$ 70.833,71",
+        "02/12/24 6064 Retiro de efectivo en santander adrogue $ 80.000,00 -$ 150.833,71",
+        "Im ley 25413 0.6% ex ef al gen reg $ 960,00 -$ 231.793,71",
+        "De fernandez,christian no / transf - var / 20218030425",
+        "A / varios - var / 30544398012", "a b / c - d / e", "Total depositos del dia $ 160000,00",
+        "- SALDO ANTERIOR 1,121,084.25", "saldo anterior 12.00",
+        "02-MAY - IMP. LEY 25.413 00000 .16 1,121,084.09",
+        "- IMP. LEY 25.413 00000 2.77 1,121,080.39", "- SALDO FINAL 1,571,691.51",
+        "Saldo total -$ 202.351,53", "Saldo total U$S 0,04", "Saldo total en cuentas al 30/12/24 *",
+        "CAJ.AUTOM.A CBU 0720093988000002864136 OPE: 621091 CREDI",
+    ]
+    for filename in ["03_Santander_Dic24.pdf", "02_HSBC_Extracto.pdf"]:
+        pdf_path = os.path.join(LOCAL_PDF_DIR, filename)
+        if os.path.exists(pdf_path):
+            with open(pdf_path, "rb") as f:
+                for text in app.iter_page_texts(f, workers=1):
+                    lines.extend(l.strip() for l in text.splitlines())
+
+    for line in lines:
+        assert app.classify_santander_line(line, saldo_pending)[0] == _sequential_kind(line, stdr_attempts), line
+        assert app.classify_hsbc_line(line, saldo_pending)[0] == _sequential_kind(line, hsbc_attempts), line
+
+def test_parsers_emit_typed_columns():
+    pdf_path = os.path.join(LOCAL_PDF_DIR, "02_HSBC_Extracto.pdf")
+    if not os.path.exists(pdf_path):
+        pytest.skip("Sample PDF not found.")
+    with open(pdf_path, "rb") as f:
+        df = parse_hsbc_pdf(f)
+
+    assert str(df["Fecha"].dtype) == "datetime64[ns]"
+    assert isinstance(df["Referencia"].dtype, pd.CategoricalDtype)
+    assert df["Importe"].dtype == "float64"
+    assert pd.isna(df["Fecha"].iloc[0]) and pd.isna(df["Importe"].iloc[0])
+    assert df["Fecha"].iloc[1] == pd.Timestamp(2022, 5, 2)  # "02-MAY", year from "EXTRACTO DEL ..."
+    assert to_csv_bytes(df).decode("utf-8").splitlines()[2].startswith("02-MAY,IMP. LEY 25.413,-0.16,")
+
+def test_frame_builder_keeps_printed_dates_it_cannot_resolve():
+    from App_STDR_OCR_PDF_Extract import MovementFrameBuilder
+    builder = MovementFrameBuilder("hsbc", capacity=1)
+    builder.extend([
+        Movement("", "SALDO ANTERIOR", None, 1000),
+        Movement("02-MAY", "B", -100, 900),  # no statement period, so no year
+        Movement("02-MAY", "A", 50, 950),
+    ])
+    df = builder.to_frame()
+
+    assert list(df["Fecha"]) == ["", "02-MAY", "02-MAY"]
+    assert list(df["Referencia"].cat.categories) == ["A", "B", "SALDO ANTERIOR"]
+    assert list(df["Referencia"]) == ["SALDO ANTERIOR", "B", "A"]
+    assert df["Importe"].tolist()[1:] == [-1.0, 0.5]
+    assert "fecha_style" not in df.attrs
+
+def test_hsbc_dates_across_new_year():
+    from App_STDR_OCR_PDF_Extract import _parse_fecha_hsbc
+    periodo = (date(2024, 12, 1), date(2025, 1, 31))
+    assert _parse_fecha_hsbc("30-DIC", periodo) == date(2024, 12, 30)
+    assert _parse_fecha_hsbc("02-ENE", periodo) == date(2025, 1, 2)
+    assert _parse_fecha_hsbc("02-XXX", periodo) is None
+    assert _parse_fecha_hsbc("02-ENE", None) is None
+
+def test_hsbc_first_row_without_saldo_anterior_has_no_amount(monkeypatch):
+    pages = ["EXTRACTO DEL 01/05/2025 AL 31/05/2025\n02-MAY - COMPRA 12345 100.00 900.00\n"
+             "03-MAY - PAGO 12345 50.00 850.00"]
+    monkeypatch.setattr(core, "iter_page_texts", lambda *a, **k: iter(pages))
+
+    df = parse_hsbc_pdf(io.BytesIO(b""), cache=False)
+
+    # Without a saldo before it, HSBC's row doesn't say whether 100.00 was a debit or a credit.
+    assert df["Importe"].tolist() == [0.0, -50.0]
+    assert df["Saldo"].tolist() == [900.0, 850.0]
+
+@pytest.mark.parametrize("filename, parser", [
+    ("03_Santander_Dic24.pdf", parse_santander_pdf),
+    ("02_HSBC_Extracto.pdf", parse_hsbc_pdf),
+])
+def test_parse_profile_records_stages_and_pages(filename, parser):
+    pdf_path = os.path.join(LOCAL_PDF_DIR, filename)
+    if not os.path.exists(pdf_path):
+        pytest.skip(f"Sample PDF {filename} not found.")
+
+    profile = ParseProfile()
+    with open(pdf_path, "rb") as f:
+        df = parser(f, profile=profile)
+        f.seek(0)
+        pd.testing.assert_frame_equal(df, parser(f))
+
+    assert set(profile.stages) == {"extract", "match", "convert", "frame"}
+    assert all(seconds >= 0 for seconds in profile.stages.values())
+    assert [p.page for p in profile.pages] == list(range(1, len(profile.pages) + 1))
+    assert profile.lines > profile.matches >= len(df)
+    assert len(profile.pages_frame()) == len(profile.pages)
+
+@pytest.mark.parametrize("filename, parser", [
+    ("03_Santander_Dic24.pdf", parse_santander_pdf),
+    ("04_Santander ago-25_NEW.pdf", parse_santander_pdf),
+    ("02_HSBC_Extracto.pdf", parse_hsbc_pdf),
+])
+def test_word_engine_matches_text_engine(filename, parser):
+    pdf_path = os.path.join(LOCAL_PDF_DIR, filename)
+    if not os.path.exists(pdf_path):
+        pytest.skip(f"Sample PDF {filename} not found.")
+
+    with open(pdf_path, "rb") as f:
+        by_text = parser(f, engine="text")
+        by_words = parser(f, engine="words")
+
+    assert to_csv_bytes(by_words) == to_csv_bytes(by_text)
+
+def _word(text, x0, x1, top=100.0):
+    return {"text": text, "x0": x0, "x1": x1, "top": top}
+
+def test_word_lines_assign_amounts_by_column():
+    import App_STDR_OCR_PDF_Extract as app
+
+    class FakePage:
+        def extract_words(self):
+            return [
+                _word("Fecha", 28, 44, 50), _word("Comprobante", 70, 108, 50), _word("Movimiento", 120, 153, 50),
+                _word("Débito", 385, 404, 50), _word("Crédito", 470, 490, 50.5), _word("Saldo", 529, 545, 50),
+                _word("en", 546, 553, 50), _word("cuenta", 555, 574, 50),
+                # credit: amount right-aligned under Crédito
+                _word("04/12/24", 23, 58, 80), _word("671576", 65, 90, 80), _word("Transferencia", 115, 170, 80),
+                _word("recibida", 172, 200, 80.4), _word("$", 440, 445, 80), _word("350.000,00", 447, 494, 80),
+                _word("-$", 524, 532, 80), _word("116.258,67", 534, 578, 80),
+                # amount-looking text far from any column stays in the words
+                _word("Total", 115, 132, 90), _word("$", 194, 199, 90), _word("160000,00", 201, 237, 90),
+            ]
+
+    rows = app._page_word_lines(FakePage(), app.SantanderParser.table_headers)
+    lines = [app.WordLine(*row) for row in rows]
+
+    assert lines[0] == "Fecha Comprobante Movimiento Débito Crédito Saldo en cuenta"
+    credit = lines[1]
+    assert credit == "04/12/24 671576 Transferencia recibida $ 350.000,00 -$ 116.258,67"
+    assert (credit.fecha, credit.debito, credit.credito, credit.saldo) == ("04/12/24", "", "$ 350.000,00", "-$ 116.258,67")
+    kind, cells = app.classify_santander_words(credit, saldo_pending=False)
+    assert kind == app.LINE_MOVIMIENTO
+    assert cells.group("movimiento") == "Transferencia recibida"
+    assert lines[2].saldo == "" and app.classify_santander_words(lines[2], False) == (None, None)
+
+def _demo_bank(app):
+    """A toy bank format: `dd.mm.yyyy Concepto -10.00 90.00` rows between
+    `Saldo previo` and `Saldo al cierre` lines."""
+    import re
+    fila = re.compile(r"^(?P<fecha>\d{2}\.\d{2}\.\d{4}) (?P<referencia>.+) (?P<importe>-?\d+\.\d{2}) (?P<saldo>-?\d+\.\d{2})$")
+
+    def classify(line, saldo_pending):
+        if saldo_pending and line.startswith("Saldo previo "):
+            return app.LINE_SALDO_INICIAL, re.match(r"Saldo previo (.+)", line)
+        if line.startswith("Saldo al cierre "):
+            return app.LINE_SALDO_FINAL, re.match(r"Saldo al cierre (.+)", line)
+        m = fila.match(line)
+        return (app.LINE_MOVIMIENTO, m) if m else (None, None)
+
+    class DemoParser(app.BankParser):
+        name, choice, code = "demo", "Demo OCR Extract", "DEMO"
+        fingerprints = ((re.compile("Banco Demo"), 3), (re.compile("Saldo previo"), 2))
+        classify_line = staticmethod(classify)
+        to_cents = staticmethod(app._to_cents_money_us)
+        to_cents_many = staticmethod(app._to_cents_money_us_many)
+
+        def add_row(self, kind, m, line):
+            for column in self.rows:
+                self.rows[column].append(m.group(column))
+
+    return DemoParser
+
+def test_registered_bank_runs_on_the_shared_core(monkeypatch):
+    import App_STDR_OCR_PDF_Extract as app
+    monkeypatch.setattr(core, "BANK_PARSERS", dict(app.BANK_PARSERS))
+    demo = app.register_bank(_demo_bank(app))
+    pages = ["Banco Demo\nSaldo previo 100.00\n01.02.2024 Compra -10.00 90.00",
+             "02.02.2024 Sueldo 50.00 140.00\nSaldo al cierre 140.00", "Anexo legal"]
+    pages_read = []
+    def fake_pages(file_like, workers=None, cache=True, layout="text", profile=None, start=0):
+        for i, text in enumerate(pages):
+            pages_read.append(i)
+            yield text
+    monkeypatch.setattr(core, "iter_page_texts", fake_pages)
+
+    assert app.detect_bank(pages[0]).choice == "Demo OCR Extract"
+    assert app.bank_for_choice("Demo OCR Extract") is demo
+    profile = app.ParseProfile()
+    df = app.parse_statement(io.BytesIO(b""), "demo", profile=profile)
+    assert df["Importe"].iloc[1:].tolist() == [-10.0, 50.0]
+    assert df["Saldo"].tolist() == [100.0, 90.0, 140.0]
+    assert pages_read == [0, 1]
+    assert len(profile.pages) == 2
+
+    pages[1] = pages[1].replace("140.00\nSaldo", "150.00\nSaldo")
+    with pytest.raises(ValueError, match="saldo anterior 90.00 \\+ importe 50.00 = 140.00"):
+        app.parse_statement(io.BytesIO(b""), "demo")
+
+def test_banks_load_lazily_from_entry_points(monkeypatch):
+    import App_STDR_OCR_PDF_Extract as app
+    monkeypatch.setattr(core, "BANK_PARSERS", dict(app.BANK_PARSERS))
+    loads = []
+    class FakeEntryPoint:
+        name, value = "demo", "ocr_demo:DemoParser"
+        def load(self):
+            loads.append(self.name)
+            return _demo_bank(app)
+    monkeypatch.setattr(core, "_bank_entry_points", {"demo": FakeEntryPoint()})
+
+    assert "demo" not in app.BANK_PARSERS
+    assert app.get_bank_parser("demo").choice == "Demo OCR Extract"
+    assert app.get_bank_parser("demo").code == "DEMO"
+    assert loads == ["demo"]
+    with pytest.raises(ValueError, match="Banco desconocido"):
+        app.get_bank_parser("nope")
@@ -0,0 +1,120 @@
+import asyncio
+import io
+import json
+import os
+from concurrent.futures import Future
+import pytest
+import ocr_extract_core as core
+from ocr_extract_service import ParseService
+
+PDF_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "PDFs")
+
+async def request(port, method, path, body=b"", headers=()):
+    """(status, headers, body) of one request; chunked bodies are reassembled."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    head = [f"{method} {path} HTTP/1.1", "Host: localhost", *headers]
+    if method == "POST" and not any(h.lower().startswith("content-length") for h in headers):
+        head.append(f"Content-Length: {len(body)}")
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + body)
+    raw = await reader.read()
+    writer.close()
+    head, _, payload = raw.partition(b"\r\n\r\n")
+    lines = head.decode().split("\r\n")
+    status = int(lines[0].split()[1])
+    response_headers = {k.lower(): v.strip() for k, _, v in (line.partition(":") for line in lines[1:])}
+    if response_headers.get("transfer-encoding") == "chunked":
+        chunks, rest = [], payload
+        while True:
+            size, _, rest = rest.partition(b"\r\n")
+            if int(size, 16) == 0:
+                break
+            chunks.append(rest[:int(size, 16)])
+            rest = rest[int(size, 16) + 2:]
+        payload = b"".join(chunks)
+    return status, response_headers, payload
+
+def run_service(scenario, **kwargs):
+    async def main():
+        service = ParseService(**kwargs)
+        server = await service.start("127.0.0.1", 0)
+        try:
+            async with server:
+                await scenario(service, server.sockets[0].getsockname()[1])
+        finally:
+            service.close()
+    asyncio.run(main())
+
+def test_service_parses_uploads_and_streams_ndjson_and_csv():
+    pdf_path = os.path.join(PDF_DIR, "03_Santander_Dic24.pdf")
+    if not os.path.exists(pdf_path):
+        pytest.skip("Sample PDF not found.")
+    with open(pdf_path, "rb") as f:
+        pdf_bytes = f.read()
+    expected = core.parse_santander_pdf(io.BytesIO(pdf_bytes))
+
+    async def scenario(service, port):
+        status, headers, body = await request(port, "POST", "/jobs", pdf_bytes)
+        assert status == 202
+        job = json.loads(body)["job"]
+        assert headers["location"] == f"/jobs/{job}"
+
+        status, headers, body = await request(port, "GET", f"/jobs/{job}/result?format=csv")
+        assert status == 200 and headers["content-type"].startswith("text/csv")
+        assert body == core.to_csv_bytes(expected)
+
+        status, headers, body = await request(port, "GET", f"/jobs/{job}/result")
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        assert headers["content-type"].startswith("application/x-ndjson")
+        assert len(rows) == len(expected)
+        assert rows[0] == {"Fecha": None, "Referencia": "Saldo Inicial", "Importe": None, "Saldo": expected["Saldo"].iloc[0]}
+        assert [row["Saldo"] for row in rows] == expected["Saldo"].tolist()
+
+        status, _, body = await request(port, "GET", f"/jobs/{job}")
+        assert status == 200
+        assert json.loads(body) == {
+            "job": job, "bank": "santander", "status": "done", "pages_done": 7,
+            "total_pages": 7, "rows": len(expected), "error": None,
+        }
+        service.jobs[job].progress(2, 7)  # a progress event that arrives late
+        assert json.loads((await request(port, "GET", f"/jobs/{job}"))[2])["status"] == "done"
+
+    with core.ParsePool(workers=1) as pool:
+        run_service(scenario, pool=pool)
+
+class ManualPool:
+    """Parse pool stand-in whose jobs finish when the test says so."""
+
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, bank, pdf_bytes, progress=None):
+        self.futures.append(Future())
+        return self.futures[-1]
+
+def test_service_limits_jobs_and_payload_size():
+    pool = ManualPool()
+
+    async def scenario(service, port):
+        status, _, body = await request(port, "POST", "/jobs", b"x" * 2048)
+        assert status == 413 and "MB" in json.loads(body)["error"]
+        assert (await request(port, "POST", "/jobs?bank=galicia", b"%PDF"))[0] == 400
+        assert (await request(port, "GET", "/jobs/nope"))[0] == 404
+
+        status, _, body = await request(port, "POST", "/jobs?bank=santander", b"%PDF")
+        assert status == 202
+        first = json.loads(body)["job"]
+        status, headers, _ = await request(port, "POST", "/jobs?bank=santander", b"%PDF")
+        assert status == 429 and headers["retry-after"] == "5"
+
+        # A refused upload is never read: the client only sent its headers.
+        status, _, _ = await request(port, "POST", "/jobs?bank=santander", b"",
+                                     ["Expect: 100-continue", "Content-Length: 1000"])
+        assert status == 429
+
+        pool.futures[0].set_result(ValueError("Error de consistencia"))
+        status, _, body = await request(port, "GET", f"/jobs/{first}/result")
+        assert status == 422 and "Error de consistencia" in json.loads(body)["error"]
+        assert service.active == 0
+        assert (await request(port, "POST", "/jobs?bank=santander", b"%PDF"))[0] == 202
+
+    run_service(scenario, pool=pool, max_jobs=1, max_upload_bytes=1024)
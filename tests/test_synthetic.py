@@ -0,0 +1,221 @@
+import io
+import json
+import os
+from datetime import date
+import pytest
+import App_STDR_OCR_PDF_Extract as app
+import ocr_extract_core as core
+from benchmarks.synthetic_statements import format_arg, format_us, generate_statement, statement_pdf_bytes
+
+@pytest.mark.parametrize("bank, parser", [
+    ("santander", app.parse_santander_pdf),
+    ("hsbc", app.parse_hsbc_pdf),
+])
+def test_synthetic_pages_parse_to_a_consistent_chain(monkeypatch, bank, parser):
+    statement = generate_statement(bank, 500, seed=7)
+    monkeypatch.setattr(core, "iter_page_texts", lambda *a, **k: iter(statement.pages))
+    monkeypatch.setattr(core, "MONEY_BATCH_ROWS", 64)
+
+    df = parser(io.BytesIO(b""))
+
+    assert len(df) == statement.movements + 1
+    assert round(df["Saldo"].iloc[-1] * 100) == statement.final_saldo_cents
+    merged = df["Referencia"].astype(str).str.startswith("Transferencia") & df["Referencia"].astype(str).str.contains(" / ")
+    assert merged.sum() == statement.transfers
+    assert df["Fecha"].notna().sum() == statement.movements
+
+def test_synthetic_statements_are_deterministic():
+    assert generate_statement("santander", 200, seed=3) == generate_statement("santander", 200, seed=3)
+    assert generate_statement("santander", 200, seed=3).pages != generate_statement("santander", 200, seed=4).pages
+
+@pytest.mark.parametrize("bank", ["santander", "hsbc"])
+def test_broken_chain_raises_at_the_broken_row(monkeypatch, bank):
+    statement = generate_statement(bank, 300, seed=1, broken_at=120)
+    monkeypatch.setattr(core, "iter_page_texts", lambda *a, **k: iter(statement.pages))
+
+    movements = []
+    with pytest.raises(ValueError, match="Error de consistencia"):
+        for movement in app.iter_movements(io.BytesIO(b""), bank):
+            movements.append(movement)
+    # Saldo Inicial plus the rows before the broken one (transfers included).
+    assert len(movements) == 1 + 120
+
+@pytest.mark.parametrize("bank", ["santander", "hsbc"])
+def test_synthetic_pdf_extracts_back_to_its_pages(bank):
+    statement = generate_statement(bank, 120, seed=2)
+    pages = list(app.iter_page_texts(io.BytesIO(statement_pdf_bytes(statement)), cache=False))
+    # WinAnsi has no U+2212, the PDF writer prints it as a hyphen.
+    assert pages == [page.replace("−", "-") for page in statement.pages]
+
+@pytest.mark.parametrize("bank, iter_movements", [
+    ("santander", app.iter_santander_movements),
+    ("hsbc", app.iter_hsbc_movements),
+])
+def test_parsing_stops_at_the_closing_balance(monkeypatch, bank, iter_movements):
+    statement = generate_statement(bank, 100, seed=5)
+    # Pages after the closing balance (other currencies, legal notes) are never read.
+    pages = statement.pages + ["Movimientos en dólares", "Información al usuario"]
+    pages_read = []
+
+    def fake_pages(file_like, workers=None, cache=True, layout="text", profile=None, start=0):
+        if profile is not None:
+            profile.total_pages = len(pages)
+        for i in range(start, len(pages)):
+            pages_read.append(i)
+            yield pages[i]
+    monkeypatch.setattr(core, "iter_page_texts", fake_pages)
+
+    profile = app.ParseProfile()
+    movements = list(iter_movements(io.BytesIO(b""), profile=profile))
+    assert len(movements) == statement.movements + 1
+    assert pages_read == list(range(len(statement.pages)))
+    assert profile.skipped_pages == 2
+
+@pytest.mark.parametrize("bank, iter_movements, closing", [
+    ("santander", app.iter_santander_movements, lambda cents: f"Saldo total {format_arg(cents)}"),
+    ("hsbc", app.iter_hsbc_movements, lambda cents: f"- SALDO FINAL {format_us(cents)}"),
+])
+def test_closing_balance_mismatch_raises(monkeypatch, bank, iter_movements, closing):
+    statement = generate_statement(bank, 50, seed=5)
+    body = statement.pages[-1].rsplit("\n", 1)[0]
+    pages = statement.pages[:-1] + [f"{body}\n{closing(statement.final_saldo_cents + 1)}"]
+    monkeypatch.setattr(core, "iter_page_texts", lambda *a, **k: iter(pages))
+
+    with pytest.raises(ValueError, match="El saldo final del extracto"):
+        list(iter_movements(io.BytesIO(b"")))
+
+@pytest.mark.parametrize("bank, carried", [
+    # a transfer whose detail line is on the next page, dated from the checkpointed fecha
+    ("santander", lambda lines, i: "Transferencia" in lines[i - 1]),
+    # an undated HSBC row, dated from the checkpointed fecha_actual
+    ("hsbc", lambda lines, i: lines[i].startswith("- ")),
+])
+def test_interrupted_parse_resumes_from_its_checkpoint(monkeypatch, tmp_path, bank, carried):
+    statement = generate_statement(bank, 400, seed=6)
+    # Split page 7 so that the run resumed at page 8 starts on a line that needs the saved state.
+    lines = statement.pages[6].splitlines()
+    cut = next(i for i in range(3, len(lines)) if carried(lines, i))
+    pages = [*statement.pages[:6], "\n".join(lines[:cut]), "\n".join(lines[cut:]), *statement.pages[7:]]
+    pages_read, crash_at = [], None
+
+    def fake_pages(file_like, workers=None, cache=True, layout="text", profile=None, start=0):
+        if profile is not None:
+            profile.total_pages = len(pages)
+        for i in range(start, len(pages)):
+            if i == crash_at:
+                raise RuntimeError("el proceso murió")
+            pages_read.append(i)
+            yield pages[i]
+    monkeypatch.setattr(core, "iter_page_texts", fake_pages)
+    monkeypatch.setattr(core, "CHECKPOINT_PAGES", 1)
+    expected = app.parse_statement(io.BytesIO(b"pdf"), bank, checkpoint=False)
+
+    crash_at = 7
+    with pytest.raises(RuntimeError):
+        app.parse_statement(io.BytesIO(b"pdf"), bank)
+    crash_at, pages_read[:] = None, []
+    monkeypatch.setattr(core, "CHECKPOINT_PAGES", 2)  # where the resumed run saves doesn't matter
+    profile = app.ParseProfile()
+    df = app.parse_statement(io.BytesIO(b"pdf"), bank, profile=profile)
+
+    assert pages_read == list(range(7, len(pages)))
+    assert profile.resumed_pages == 7 and len(profile.pages) == len(pages) - 7
+    assert df.equals(expected)
+    assert not os.listdir(tmp_path / "page_cache" / "checkpoints")  # dropped once the parse completes
+
+def test_checkpoint_ignores_journal_lines_written_after_its_state(tmp_path):
+    checkpoint = app.ParseCheckpoint(str(tmp_path), "key")
+    assert checkpoint.acquire()
+    saved = [app.Movement("", "Saldo Inicial", None, 100), app.Movement("01/02/24", "A", -10, 90, date(2024, 2, 1))]
+    checkpoint.pending.extend(saved)
+    checkpoint.save({"page": 1})
+    checkpoint.release()
+    # A crash after journaling the next rows but before recording their state.
+    with open(checkpoint.journal_path, "a", encoding="utf-8") as fh:
+        fh.write('["02/02/24", "B", -5, 85, "2024-02-02"]\n["03/02')
+
+    resumed = app.ParseCheckpoint(str(tmp_path), "key")
+    assert resumed.acquire()
+    state, movements = resumed.load()
+    assert state["page"] == 1 and movements == saved
+    assert os.path.getsize(checkpoint.journal_path) == state["offset"]
+
+    # A journal missing rows the state counted is not resumed from.
+    with open(checkpoint.journal_path, "r+b") as fh:
+        fh.truncate(fh.read().index(b"\n") + 1)
+    with open(checkpoint.state_path, "r+", encoding="utf-8") as fh:
+        truncated = json.load(fh) | {"offset": os.path.getsize(checkpoint.journal_path)}
+        fh.seek(0), fh.truncate(), json.dump(truncated, fh)
+    assert resumed.load() is None and not os.path.exists(checkpoint.state_path)
+
+def test_concurrent_parses_of_a_statement_never_share_its_checkpoint(monkeypatch, tmp_path):
+    statement = generate_statement("hsbc", 400, seed=6)
+    def fake_pages(file_like, workers=None, cache=True, layout="text", profile=None, start=0):
+        yield from statement.pages[start:]
+    monkeypatch.setattr(core, "iter_page_texts", fake_pages)
+    monkeypatch.setattr(core, "CHECKPOINT_PAGES", 1)
+    expected = app.parse_statement(io.BytesIO(b"pdf"), "hsbc", checkpoint=False)
+
+    first = app.iter_movements(io.BytesIO(b"pdf"), "hsbc")
+    second = app.iter_movements(io.BytesIO(b"pdf"), "hsbc")
+    seconds = []
+    for _ in range(150):
+        next(first)
+        seconds.append(next(second))
+    seconds.extend(second)  # finishes without a checkpoint of its own, and leaves the first's alone
+    first.close()  # interrupted: its checkpoint stays for the next parse
+
+    assert len(seconds) == len(expected)
+    profile = app.ParseProfile()
+    df = app.parse_statement(io.BytesIO(b"pdf"), "hsbc", profile=profile)
+    assert profile.resumed_pages > 0
+    assert df.equals(expected)
+    assert not os.listdir(tmp_path / "page_cache" / "checkpoints")
+
+def test_checkpoints_of_failed_parses_expire_and_older_parsers_are_not_resumed(monkeypatch, tmp_path):
+    import time
+    statement = generate_statement("hsbc", 400, seed=6, broken_at=300)
+    def fake_pages(file_like, workers=None, cache=True, layout="text", profile=None, start=0):
+        yield from statement.pages[start:]
+    monkeypatch.setattr(core, "iter_page_texts", fake_pages)
+    monkeypatch.setattr(core, "CHECKPOINT_PAGES", 1)
+    directory = tmp_path / "page_cache" / "checkpoints"
+
+    with pytest.raises(ValueError, match="Error de consistencia"):
+        app.parse_statement(io.BytesIO(b"pdf"), "hsbc")
+    left = sorted(os.listdir(directory))
+    assert [name.rsplit(".", 1)[1] for name in left] == ["json", "jsonl"]
+
+    # A new parser version starts over instead of replaying the old journal.
+    monkeypatch.setattr(core, "PARSER_VERSION", core.PARSER_VERSION + 1)
+    profile = app.ParseProfile()
+    with pytest.raises(ValueError):
+        app.parse_statement(io.BytesIO(b"pdf"), "hsbc", profile=profile)
+    assert profile.resumed_pages == 0
+
+    # Checkpoints nobody wrote for longer than CHECKPOINT_MAX_HOURS go, unless a parse holds them.
+    held = app.ParseCheckpoint(str(directory), left[0].rsplit(".", 1)[0])
+    assert held.acquire()
+    week_ago = time.time() - 8 * 24 * 3600
+    for name in os.listdir(directory):
+        os.utime(directory / name, (week_ago, week_ago))
+    app.get_checkpoint(b"other", "hsbc", "text")
+    assert sorted(os.listdir(directory)) == sorted([*left, os.path.basename(held.lock_path)])
+    held.release()
+    app.get_checkpoint(b"other", "hsbc", "text")
+    assert not os.listdir(directory)
+
+def test_csv_export_peak_memory_stays_near_the_payload(monkeypatch):
+    import tracemalloc
+    statement = generate_statement("santander", 100_000, seed=9)
+    monkeypatch.setattr(core, "iter_page_texts", lambda *a, **k: iter(statement.pages))
+    df = app.parse_santander_pdf(io.BytesIO(b""))
+
+    tracemalloc.start()
+    try:
+        payload = app.to_csv_bytes(df)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    # StringIO + getvalue() + encode() peaked at ~3.7x the encoded CSV here.
+    assert peak < 2 * len(payload)
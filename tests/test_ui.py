@@ -16,3 +16,119 @@ def test_ui_system_info():
     
     assert not at.exception
     assert "Librerías Instaladas" in at.subheader[0].value
+
+def test_process_upload_is_memoized_per_file_and_bank(monkeypatch):
+    import pandas as pd
+    import App_STDR_OCR_PDF_Extract as app
+
+    calls = []
+    def fake_parse(file_like, bank, profile=None):
+        calls.append(file_like.read())
+        return pd.DataFrame([
+            {"Fecha": "", "Referencia": "Saldo Inicial", "Importe": "", "Saldo": 100.0},
+            {"Fecha": "01/01/24", "Referencia": "A", "Importe": -10.0, "Saldo": 90.0},
+        ])
+    monkeypatch.setattr(app, "parse_statement", fake_parse)
+    app.process_upload.clear()
+
+    first = app.process_upload("hash-1", "Santander OCR Extract", b"pdf-1")
+    again = app.process_upload("hash-1", "Santander OCR Extract", b"pdf-1")
+    assert len(calls) == 1
+    assert again["detalle_csv"] == first["detalle_csv"]
+    assert again["kpis"] == (100.0, -10.0, 90.0)
+    assert {"summary", "csv"} <= set(first["profile"].stages)
+
+    app.process_upload("hash-1", "HSBC OCR Extract", b"pdf-1")
+    app.process_upload("hash-2", "Santander OCR Extract", b"pdf-2")
+    assert calls == [b"pdf-1", b"pdf-1", b"pdf-2"]
+    app.process_upload.clear()
+
+def test_parse_uploads_runs_files_concurrently_in_input_order():
+    import os
+    import App_STDR_OCR_PDF_Extract as app
+    pdf_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "PDFs")
+    paths = [os.path.join(pdf_dir, name) for name in ("03_Santander_Dic24.pdf", "04_Santander ago-25_NEW.pdf")]
+    if not all(os.path.exists(p) for p in paths):
+        pytest.skip("Sample PDFs not found.")
+    pdfs = [open(p, "rb").read() for p in paths] + [b"not a pdf"]
+
+    finished = []
+    outcomes = app.parse_uploads(pdfs, "Santander OCR Extract", jobs=2,
+                                 progress=lambda i, outcome: finished.append(i))
+
+    assert sorted(finished) == [0, 1, 2]
+    for path, (df_movs, profile) in zip(paths, outcomes[:2]):
+        with open(path, "rb") as f:
+            assert df_movs.equals(app.parse_santander_pdf(f))
+        assert profile.pages
+    assert isinstance(outcomes[2], Exception)
+
+def test_job_timeout_is_not_swallowed_by_oserror_handlers(monkeypatch):
+    import time
+    import ocr_extract_core as core
+
+    def parse_statement(*args, **kwargs):
+        try:
+            time.sleep(5)
+        except OSError:  # as the page cache, checkpoints and the serial extraction fallback do
+            return "swallowed"
+    monkeypatch.setattr(core, "parse_statement", parse_statement)
+
+    outcome = core._parse_job(1, "santander", b"", 0.05)
+    assert isinstance(outcome, TimeoutError) and "0.05s" in str(outcome)
+
+def test_parse_pool_reports_pages_bounds_its_queue_and_times_out(monkeypatch):
+    import time
+    import App_STDR_OCR_PDF_Extract as app
+    import ocr_extract_core as core
+    from benchmarks.synthetic_statements import generate_statement, statement_pdf_bytes
+    small = statement_pdf_bytes(generate_statement("santander", 120, seed=3))
+    large = statement_pdf_bytes(generate_statement("santander", 8000, seed=3))  # ~200 pages
+    monkeypatch.setattr(core, "PARSE_POOL_QUEUE_WAIT", 0.05)
+
+    with app.ParsePool(workers=1, max_pending=1, timeout=1.0) as pool:
+        slow = pool.submit("santander", large)
+        with pytest.raises(app.ParsePoolFull):
+            pool.submit("santander", small)
+        outcome = slow.result()
+        assert isinstance(outcome, TimeoutError) and "1s" in str(outcome)
+
+        seen = []
+        df_movs, profile = pool.submit("santander", small, progress=lambda done, total: seen.append((done, total))).result()
+        deadline = time.monotonic() + 5
+        while (not seen or seen[-1][0] < len(profile.pages)) and time.monotonic() < deadline:
+            time.sleep(0.01)
+    assert len(df_movs) == 121
+    assert seen == [(n, profile.total_pages) for n in range(1, len(profile.pages) + 1)]
+
+def test_combine_uploads_tags_rows_and_zips_every_csv():
+    import io
+    import zipfile
+    from datetime import date
+    import App_STDR_OCR_PDF_Extract as app
+
+    def upload(saldo_inicial, movements):
+        df = app.movements_to_frame([app.Movement("", "Saldo Inicial", None, saldo_inicial), *movements], "stdr")
+        return {"df_movs": df, "detalle_csv": app.to_csv_bytes(df), "resumen_csv": app.to_csv_bytes(app.build_summary(df))}
+
+    enero = upload(10000, [app.Movement("31/01/24", "A", -1000, 9000, date(2024, 1, 31))])
+    febrero = upload(9000, [app.Movement("01/02/24", "B", 500, 9500, date(2024, 2, 1))])
+    app.combine_uploads.clear()
+    combined = app.combine_uploads(("h2", "h1"), "Santander OCR Extract", [("febrero.pdf", febrero), ("enero.pdf", enero)])
+
+    df = combined["df_movs"]
+    assert list(df.columns) == [app.SOURCE_COLUMN, "Fecha", "Referencia", "Importe", "Saldo"]
+    # febrero's opening balance continues enero's closing one, so only its movement is kept
+    assert df[app.SOURCE_COLUMN].tolist() == ["enero.pdf"] * 2 + ["febrero.pdf"]
+    assert combined["kpis"] == (100.0, -5.0, 95.0)
+    assert combined["links"]["Estado"].tolist() == [app.LINK_CONTINUOUS]
+
+    with zipfile.ZipFile(io.BytesIO(combined["zip"])) as zf:
+        names = zf.namelist()
+        assert len(names) == 6
+        assert names[0].startswith("Consolidado_STDR_Detalle_Movimientos_")
+        assert any(n.startswith("febrero_STDR_Resumen_Referencias_") for n in names)
+        detalle = zf.read(names[0]).decode("utf-8").splitlines()
+    assert detalle[0] == "Archivo,Fecha,Referencia,Importe,Saldo"
+    assert detalle[2] == "enero.pdf,31/01/24,A,-10.0,90.0"
+    app.combine_uploads.clear()